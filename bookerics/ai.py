@@ -1,28 +1,39 @@
+import asyncio
+import hashlib
 import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
 
-from openai import AsyncOpenAI
+from openai import APIStatusError, AsyncOpenAI, RateLimitError
 
-from .constants import BOOKERICS_OPENROUTER_KEY, OPENROUTER_BASE_URL, TAG_GPT_MODEL
+from .archiver import parse_retry_after
+from .constants import (
+    AI_BATCH_SIZE,
+    AI_CACHE_MAX_ENTRIES,
+    AI_CONCURRENCY,
+    AI_MAX_RETRIES,
+    AI_MAX_RETRY_WAIT,
+    BOOKERICS_OPENROUTER_KEY,
+    OPENROUTER_BASE_URL,
+    TAG_GPT_MODEL,
+)
+from .database import apply_ai_results, fetch_bookmarks_all, get_ai_cache, put_ai_cache
+from .jobs import JobProgress
 from .utils import logger
 
 client = AsyncOpenAI(api_key=BOOKERICS_OPENROUTER_KEY, base_url=OPENROUTER_BASE_URL)
 
 
-async def get_tags_and_description_from_bookmark(bookmark):
-    if not isinstance(bookmark, dict):
-        raise ValueError("bookmark must be a dictionary")
+def format_tags(tags: List[str]) -> List[str]:
+    return [tag.lower().replace(" ", "-") for tag in tags]
 
-    required_keys = ["title", "url", "description"]
-    if not all(key in bookmark for key in required_keys):
-        raise ValueError(f"bookmark must contain all required keys: {required_keys}")
 
-    logger.info(f"🤖 Getting tags and description for {bookmark}...")
-    prompt = f"""You are an expert summarizer. Given metadata about a website bookmark, create a description and a list of tags.
+PROMPT_TEMPLATE = """You are an expert summarizer. Given metadata about a website bookmark, create a description and a list of tags.
 
 Metadata:
-Title: {bookmark["title"]}
-URL: {bookmark["url"]}
-Metadata Description: {bookmark["description"]}
+Title: {title}
+URL: {url}
+Metadata Description: {description}
 
 Your output should be a Python dictionary with the following keys:
 - "description": a sentence or two summarizing the content
@@ -30,6 +41,59 @@ Your output should be a Python dictionary with the following keys:
 
 Only return the dictionary. Do not add any extra commentary."""
 
+
+def cache_key(bookmark: Dict[str, Any], template: str) -> str:
+    """Everything that shapes the model's answer, hashed."""
+    parts = [
+        TAG_GPT_MODEL,
+        template,
+        bookmark.get("title") or "",
+        bookmark.get("url") or "",
+        bookmark.get("description") or "",
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def cache_entries(
+    bookmark: Dict[str, Any], template: str, answer: Tuple[List[str], str]
+) -> Dict[str, Tuple[List[str], str]]:
+    """Cache entries for an answer that is about to be written to `bookmark`.
+
+    Writing the answer replaces the description, which is part of the key,
+    so the answer is also stored under the key of the metadata it leaves
+    behind. Asking again for the same bookmark is then still a hit.
+    """
+    entries = {cache_key(bookmark, template): answer}
+    if answer[1]:
+        entries[cache_key({**bookmark, "description": answer[1]}, template)] = answer
+    return entries
+
+
+async def get_tags_and_description_from_bookmark(bookmark, force: bool = False):
+    """Tags and a description for one bookmark.
+
+    Answers are cached by `cache_key`, so asking again for unchanged
+    metadata costs no request. Pass `force=True` to ask the model anyway.
+    """
+    if not isinstance(bookmark, dict):
+        raise ValueError("bookmark must be a dictionary")
+
+    required_keys = ["title", "url", "description"]
+    if not all(key in bookmark for key in required_keys):
+        raise ValueError(f"bookmark must contain all required keys: {required_keys}")
+
+    key = cache_key(bookmark, PROMPT_TEMPLATE)
+    if not force:
+        cached = get_ai_cache([key]).get(key)
+        if cached:
+            logger.info(f"🤖 Using cached tags and description for {bookmark['url']}")
+            return cached
+
+    logger.info(f"🤖 Getting tags and description for {bookmark}...")
+    prompt = PROMPT_TEMPLATE.format(
+        title=bookmark["title"], url=bookmark["url"], description=bookmark["description"]
+    )
+
     completion = await client.chat.completions.create(
         model=TAG_GPT_MODEL,
         messages=[
@@ -44,11 +108,211 @@ Only return the dictionary. Do not add any extra commentary."""
     tags_and_description_dict = json.loads(tags_and_description)
 
     tags_list = tags_and_description_dict["tags"]
-    formatted_tags_list = [tag.lower().replace(" ", "-") for tag in tags_list]
+    formatted_tags_list = format_tags(tags_list)
 
     description = tags_and_description_dict["description"]
 
     logger.info(f"🏷️ Generated tags: {formatted_tags_list}")
     logger.info(f"📖 Generated decription: {description}")
 
+    put_ai_cache(
+        cache_entries(bookmark, PROMPT_TEMPLATE, (formatted_tags_list, description)),
+        AI_CACHE_MAX_ENTRIES,
+    )
     return formatted_tags_list, description
+
+
+BATCH_PROMPT = """You are an expert summarizer. You will receive a JSON list of website bookmarks, each with an "id", "title", "url" and "description". For every bookmark, create a description and a list of tags.
+
+Your output should be a JSON object mapping each bookmark's id (as a string) to an object with these keys:
+- "description": a sentence or two summarizing the content
+- "tags": a list of 3-4 simple, plural-form tags. Use ["like","this"] format. Avoid hyphens and keep them relevant.
+
+Include every id you were given. Only return the JSON object. Do not add any extra commentary."""
+
+
+def _parse_json_object(content: str) -> Dict[str, Any]:
+    """Parse the model's reply, tolerating a ```json fence around it."""
+    content = content.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", content, re.DOTALL)
+    if fenced:
+        content = fenced.group(1)
+    result = json.loads(content)
+    if not isinstance(result, dict):
+        raise ValueError("expected a JSON object")
+    return result
+
+
+async def get_tags_and_descriptions_for_batch(
+    bookmarks: List[Dict[str, Any]],
+    max_retries: int = AI_MAX_RETRIES,
+    force: bool = False,
+) -> Tuple[Dict[int, Tuple[List[str], str]], Dict[str, int]]:
+    """Tag and describe several bookmarks with one model request.
+
+    Returns `({bookmark_id: (tags, description)}, usage)`. Bookmarks the
+    model left out of its answer are simply missing from the result. On a
+    429 the request is retried after Retry-After (or an exponential
+    backoff) up to `max_retries` times; other errors are raised. Cached
+    answers are used without asking the model unless `force` is set.
+    """
+    max_retries = max(max_retries, 0)
+    usage = {
+        "requests": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "rate_limited": 0,
+        "cache_hits": 0,
+    }
+    keys = {b["id"]: cache_key(b, BATCH_PROMPT) for b in bookmarks}
+    results: Dict[int, Tuple[List[str], str]] = {}
+    if not force:
+        cached = get_ai_cache(list(keys.values()))
+        for b in bookmarks:
+            if keys[b["id"]] in cached:
+                results[b["id"]] = cached[keys[b["id"]]]
+        usage["cache_hits"] = len(results)
+        bookmarks = [b for b in bookmarks if b["id"] not in results]
+        if not bookmarks:
+            return results, usage
+
+    payload = [
+        {
+            "id": b["id"],
+            "title": b.get("title") or "",
+            "url": b["url"],
+            "description": b.get("description") or "",
+        }
+        for b in bookmarks
+    ]
+
+    completion = None
+    for attempt in range(max_retries + 1):
+        try:
+            usage["requests"] += 1
+            # We do our own 429 handling so the backoff shows up in the job stats
+            completion = await client.with_options(max_retries=0).chat.completions.create(
+                model=TAG_GPT_MODEL,
+                messages=[
+                    {"role": "system", "content": BATCH_PROMPT},
+                    {"role": "user", "content": json.dumps(payload)},
+                ],
+            )
+            break
+        except RateLimitError as e:
+            usage["rate_limited"] += 1
+            if attempt == max_retries:
+                raise
+            wait = parse_retry_after(e.response.headers.get("retry-after"))
+            wait = min(wait if wait is not None else 2.0**attempt * 5, AI_MAX_RETRY_WAIT)
+            logger.warning(f"🤖 Rate limited; retrying batch of {len(bookmarks)} in {wait:.0f}s")
+            await asyncio.sleep(wait)
+        except APIStatusError as e:
+            if e.status_code < 500 or attempt == max_retries:
+                raise
+            await asyncio.sleep(2.0**attempt)
+    if completion is None:
+        raise ValueError("No completion received from OpenRouter API")
+
+    if completion.usage is not None:
+        usage["prompt_tokens"] += completion.usage.prompt_tokens or 0
+        usage["completion_tokens"] += completion.usage.completion_tokens or 0
+
+    content = completion.choices[0].message.content
+    if content is None:
+        raise ValueError("No content received from OpenRouter API")
+    answer = _parse_json_object(content)
+
+    fresh: Dict[str, Tuple[List[str], str]] = {}
+    for b in bookmarks:
+        item = answer.get(str(b["id"]))
+        if not isinstance(item, dict):
+            continue
+        tags = [t for t in item.get("tags") or [] if isinstance(t, str) and t.strip()]
+        results[b["id"]] = (format_tags(tags), str(item.get("description") or ""))
+        fresh.update(cache_entries(b, BATCH_PROMPT, results[b["id"]]))
+    put_ai_cache(fresh, AI_CACHE_MAX_ENTRIES)
+    logger.info(
+        f"🤖 Batch of {len(bookmarks)}: {len(results) - usage['cache_hits']} answered, "
+        f"{usage['cache_hits']} cached, "
+        f"{usage['prompt_tokens'] + usage['completion_tokens']:,} tokens"
+    )
+    return results, usage
+
+
+ai_enrichment = JobProgress("ai-enrichment")
+_enrichment_task: Optional[asyncio.Task] = None
+
+
+async def run_ai_enrichment(
+    batch_size: int = AI_BATCH_SIZE, concurrency: int = AI_CONCURRENCY
+) -> None:
+    """Tag and describe every untagged bookmark, `batch_size` per request.
+
+    At most `concurrency` requests are in flight. Results are collected in
+    memory and written in a single transaction at the end (also when the
+    job is stopped), followed by a single feed publish.
+    """
+    bookmarks = fetch_bookmarks_all(kind="untagged")
+    ai_enrichment.start(len(bookmarks))
+    logger.info(f"🤖 AI enrichment starting for {len(bookmarks):,} untagged bookmarks")
+
+    batches = [bookmarks[i : i + batch_size] for i in range(0, len(bookmarks), max(1, batch_size))]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results: Dict[int, Tuple[List[str], str]] = {}
+
+    async def one(batch: List[Dict[str, Any]]) -> None:
+        async with semaphore:
+            if ai_enrichment.stop_requested:
+                return
+            try:
+                answered, usage = await get_tags_and_descriptions_for_batch(batch)
+            except Exception as e:
+                ai_enrichment.advance(False, error=f"Batch of {len(batch)} failed: {e}", count=len(batch))
+                return
+        ai_enrichment.add_stats(**usage)
+        if usage["rate_limited"]:
+            ai_enrichment.retry()
+        results.update(answered)
+        if answered:
+            ai_enrichment.advance(True, count=len(answered))
+        for b in batch:
+            if b["id"] not in answered:
+                ai_enrichment.advance(False, error=f"#{b['id']} {b['url']}: no answer")
+
+    try:
+        await asyncio.gather(*(one(batch) for batch in batches))
+    finally:
+        try:
+            await apply_ai_results(results)
+        finally:
+            ai_enrichment.finish()
+
+    state = ai_enrichment.snapshot()
+    stats = state["stats"]
+    tokens = stats.get("prompt_tokens", 0) + stats.get("completion_tokens", 0)
+    logger.info(
+        f"🤖 AI enrichment finished: {state['succeeded']:,} tagged, {state['failed']:,} failed, "
+        f"{stats.get('requests', 0):,} requests, {tokens:,} tokens "
+        f"in {state['elapsed']:.0f}s ({state['per_minute']:.1f}/min)"
+    )
+
+
+def start_ai_enrichment() -> bool:
+    """Start the enrichment job in the background unless one is already running."""
+    global _enrichment_task
+    if _enrichment_task is not None and not _enrichment_task.done():
+        return False
+    _enrichment_task = asyncio.create_task(run_ai_enrichment())
+    return True
+
+
+async def stop_ai_enrichment() -> None:
+    """Cancel a running job; whatever was answered so far is still saved."""
+    ai_enrichment.request_stop()
+    if _enrichment_task is not None and not _enrichment_task.done():
+        _enrichment_task.cancel()
+        try:
+            await _enrichment_task
+        except asyncio.CancelledError:
+            pass
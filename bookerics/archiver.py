@@ -0,0 +1,227 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+import aiohttp
+
+from .constants import (
+    ARCHIVE_BASE_URL,
+    ARCHIVE_BURST,
+    ARCHIVE_MAX_ATTEMPTS,
+    ARCHIVE_RATE_PER_MINUTE,
+)
+from .database import complete_archive, next_archive_job, reschedule_archive
+from .events import ARCHIVE_QUEUED, event_bus
+from .utils import logger
+
+# Outcomes of one submission
+ARCHIVED = "archived"
+RATE_LIMITED = "rate_limited"
+FAILED = "failed"
+
+
+class TokenBucket:
+    """Allows `rate_per_minute` requests on average, in bursts of up to `burst`.
+
+    `pause` empties the bucket until a given time, for when the server
+    says to back off (a 429 with Retry-After).
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Archiver:
+    """Works through the `archive_queue` table, one archive.ph request at a time.
+
+    All requests share one session and one token bucket, so neither new
+    bookmarks nor a full backfill can exceed the configured rate. A 429
+    pauses the whole archiver for Retry-After seconds and requeues the URL
+    without counting it as a failure; other failures back off exponentially
+    and are given up after `max_attempts`. The queue lives in SQLite, so
+    pending work survives restarts.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://archive.ph",
+        rate_per_minute: float = 4.0,
+        burst: int = 2,
+        max_attempts: int = 6,
+        timeout: float = 60.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                },
+            )
+        return self._session
+
+    async def submit(self, target_url: str) -> Tuple[str, Optional[str], Optional[float]]:
+        """Archive one URL; returns (outcome, archive_url, retry_after)."""
+        session = self._get_session()
+        try:
+            # First, check if the URL is already archived
+            await self.bucket.acquire()
+            async with session.get(
+                f"{self.base_url}/newest/{target_url}", allow_redirects=True
+            ) as check_resp:
+                if check_resp.status == 429:
+                    return RATE_LIMITED, None, parse_retry_after(
+                        check_resp.headers.get("Retry-After")
+                    )
+                check_url = str(check_resp.url)
+                # Redirected away from /newest/ means there's already a snapshot
+                if (
+                    check_resp.status < 400
+                    and check_url.startswith(self.base_url)
+                    and "/newest/" not in check_url
+                ):
+                    logger.info(f"🗄️ Already archived: {check_url}")
+                    return ARCHIVED, check_url, None
+
+            logger.info(f"🗄️ Submitting {target_url} to {self.base_url}...")
+            await self.bucket.acquire()
+            async with session.post(
+                f"{self.base_url}/submit/",
+                data={"url": target_url, "anyway": "1"},
+                allow_redirects=True,
+            ) as resp:
+                if resp.status == 429:
+                    return RATE_LIMITED, None, parse_retry_after(
+                        resp.headers.get("Retry-After")
+                    )
+                final_url = str(resp.url)
+                # A proper archive URL, not the submit page bounced back
+                if resp.status >= 400 or f"{self.base_url}/submit" in final_url:
+                    return FAILED, f"status {resp.status} at {final_url}", None
+                logger.info(f"🗄️ Archived {target_url} -> {final_url}")
+                return ARCHIVED, final_url, None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return FAILED, str(e) or type(e).__name__, None
+
+    async def process(self, job: dict) -> None:
+        outcome, result, retry_after = await self.submit(job["url"])
+        bookmark_id = job["bookmark_id"]
+        if outcome == ARCHIVED and result:
+            await complete_archive(bookmark_id, result)
+        elif outcome == RATE_LIMITED:
+            # Without Retry-After, assume a few minutes
+            wait = retry_after if retry_after is not None else 300.0
+            logger.warning(f"🗄️ Rate limited by {self.base_url}; pausing {wait:.0f}s")
+            self.bucket.pause(wait)
+            await reschedule_archive(
+                bookmark_id, time.time() + wait, job["attempts"], "rate limited"
+            )
+        else:
+            attempts = job["attempts"] + 1
+            if attempts >= self.max_attempts:
+                logger.warning(
+                    f"🗄️ Giving up archiving bookmark {bookmark_id} after {attempts} attempts: {result}"
+                )
+                await reschedule_archive(bookmark_id, None, attempts, result or "")
+            else:
+                # 2, 4, 8, ... minutes, capped at six hours
+                delay = min(120.0 * 2 ** (attempts - 1), 6 * 3600.0)
+                logger.info(
+                    f"🗄️ Archiving bookmark {bookmark_id} failed ({result}); retry in {delay:.0f}s"
+                )
+                await reschedule_archive(bookmark_id, time.time() + delay, attempts, result or "")
+
+    async def _run(self) -> None:
+        with event_bus.subscribe(ARCHIVE_QUEUED) as queued:
+            while True:
+                try:
+                    job = next_archive_job()
+                    if job is None:
+                        wait = 3600.0
+                    else:
+                        wait = job["next_attempt_at"] - time.time()
+                    if job is None or wait > 0:
+                        # Sleep until the next job is due or a new one arrives
+                        await event_bus.wait_for(
+                            ARCHIVE_QUEUED, lambda e: True, wait, queue=queued
+                        )
+                        continue
+                    await self.process(job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"💥 Archiver error: {e}")
+                    await asyncio.sleep(30)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+archiver = Archiver(
+    base_url=ARCHIVE_BASE_URL,
+    rate_per_minute=ARCHIVE_RATE_PER_MINUTE,
+    burst=ARCHIVE_BURST,
+    max_attempts=ARCHIVE_MAX_ATTEMPTS,
+)
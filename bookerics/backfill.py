@@ -0,0 +1,105 @@
+import asyncio
+from typing import Optional
+
+from .constants import (
+    THUMBNAIL_BACKFILL_CONCURRENCY,
+    THUMBNAIL_BACKFILL_RETRIES,
+    THUMBNAIL_BACKFILL_TIMEOUT,
+)
+from .database import (
+    Bookmark,
+    fetch_bookmarks_missing_thumbnails,
+    get_bookmark_thumbnail_image,
+    update_main_rss_feed,
+)
+from .jobs import JobProgress
+from .utils import logger
+
+thumbnail_backfill = JobProgress("thumbnail-backfill")
+_backfill_task: Optional[asyncio.Task] = None
+
+
+async def run_thumbnail_backfill(
+    concurrency: int = THUMBNAIL_BACKFILL_CONCURRENCY,
+    timeout: float = THUMBNAIL_BACKFILL_TIMEOUT,
+    retries: int = THUMBNAIL_BACKFILL_RETRIES,
+) -> None:
+    """Capture thumbnails for every bookmark that still lacks one.
+
+    Each success is written to the database as it happens, so stopping (or a
+    restart) loses nothing: the next run simply picks up whatever is still
+    missing. At most `concurrency` captures run at once, each capture gets
+    `timeout` seconds, and failed URLs are retried up to `retries` times out
+    of a job-wide budget so a run full of dead sites can't retry forever.
+    """
+    bookmarks = fetch_bookmarks_missing_thumbnails()
+    thumbnail_backfill.start(len(bookmarks))
+    logger.info(f"🖼️ Thumbnail backfill starting for {len(bookmarks):,} bookmarks")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for bookmark in bookmarks:
+        queue.put_nowait(bookmark)
+    retry_budget = max(10, len(bookmarks) // 10)
+
+    async def capture(bookmark: Bookmark) -> bool:
+        try:
+            url = await asyncio.wait_for(
+                get_bookmark_thumbnail_image(bookmark), timeout=timeout
+            )
+            return bool(url)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ Thumbnail for {bookmark['url']} timed out")
+            return False
+
+    async def worker() -> None:
+        nonlocal retry_budget
+        while not queue.empty() and not thumbnail_backfill.stop_requested:
+            bookmark = queue.get_nowait()
+            for attempt in range(retries + 1):
+                if await capture(bookmark):
+                    thumbnail_backfill.advance(True)
+                    break
+                if attempt < retries and retry_budget > 0 and not thumbnail_backfill.stop_requested:
+                    retry_budget -= 1
+                    thumbnail_backfill.retry()
+                    await asyncio.sleep(2**attempt)
+                    continue
+                thumbnail_backfill.advance(
+                    False, error=f"#{bookmark['id']} {bookmark['url']}"
+                )
+                break
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        thumbnail_backfill.finish()
+
+    state = thumbnail_backfill.snapshot()
+    logger.info(
+        f"🖼️ Thumbnail backfill finished: {state['succeeded']:,} captured, "
+        f"{state['failed']:,} failed, {state['retries']:,} retries "
+        f"in {state['elapsed']:.0f}s ({state['per_minute']:.1f}/min)"
+    )
+    if state["succeeded"]:
+        # New thumbnails show up as feed enclosures; publish the feed once
+        await update_main_rss_feed()
+
+
+def start_thumbnail_backfill() -> bool:
+    """Start the backfill in the background unless one is already running."""
+    global _backfill_task
+    if _backfill_task is not None and not _backfill_task.done():
+        return False
+    _backfill_task = asyncio.create_task(run_thumbnail_backfill())
+    return True
+
+
+async def stop_thumbnail_backfill() -> None:
+    """Cancel a running backfill, e.g. on shutdown before the browser closes."""
+    thumbnail_backfill.request_stop()
+    if _backfill_task is not None and not _backfill_task.done():
+        _backfill_task.cancel()
+        try:
+            await _backfill_task
+        except asyncio.CancelledError:
+            pass
@@ -1,6 +1,6 @@
 import json
-import httpx
-from typing import Any, Union
+from datetime import datetime
+from typing import Any, List, Optional, Tuple, Union
 
 from fasthtml.common import (
     Div,
@@ -15,11 +15,15 @@ from fasthtml.common import (
     Label,
     Textarea,
     Span,
+    Picture,
+    Source,
 )
 # For attributes, use dicts e.g. {'hx_get': '/search'}
 
-from .constants import GIPHY_API_KEY
 from .database import BOOKMARK_NAME, Bookmark
+from .placeholders import placeholder_pool
+from .thumbnails import THUMBNAIL_FORMATS, THUMBNAIL_MIME_TYPES, THUMBNAIL_SIZES
+from .thumbstore import local_url
 
 
 AnyComponent = Any
@@ -97,11 +101,30 @@ def TableStructure(structure: Union[list, None] = None, **attrs: Any) -> AnyComp
     return Div(Pre(Code(formatted_structure)), cls="table-structure-wrapper", **attrs)
 
 
-def TagCloud(tags: Union[list, None] = None, **attrs: Any) -> AnyComponent:
+def TagCloud(
+    tags: Union[list, None] = None, selectable: bool = False, **attrs: Any
+) -> AnyComponent:
     if tags is None:
         tags = []
     # CSS class "tag-cloud" handles flex layout.
     # CSS classes "btn tag info" are for styling individual tags.
+    if selectable:
+        # Tag management: clicking a tag adds it to the form instead of navigating
+        return Div(
+            *[
+                Button(
+                    tag_item["tag"],
+                    Span(f" {tag_item.get('frequency', '')}", cls="tag-count"),
+                    type="button",
+                    data_tag=tag_item["tag"],
+                    onclick="selectManagedTag(this)",
+                    cls="btn tag info",
+                )
+                for tag_item in tags
+            ],
+            cls="tag-cloud",
+            **attrs,
+        )
     return Div(
         *[
             A(
@@ -116,31 +139,59 @@ def TagCloud(tags: Union[list, None] = None, **attrs: Any) -> AnyComponent:
     )
 
 
-def _get_random_giphy_url() -> str:
-    _url = f"https://api.giphy.com/v1/gifs/random?api_key={GIPHY_API_KEY}&tag=waiting&rating=r"
-    try:
-        r = httpx.get(_url, timeout=5)
-        r.raise_for_status()
-        giphy_url = r.json()["data"]["images"]["original"]["url"]
-        return giphy_url
-    except httpx.RequestError as e:
-        print(f"Error fetching Giphy URL: {e}")
-        return "/static/images/placeholder.gif"
-    except (KeyError, json.JSONDecodeError) as e:
-        print(f"Error parsing Giphy response: {e}")
-        return "/static/images/placeholder.gif"
+def _srcset(variants: list, fmt: str) -> str:
+    return ", ".join(
+        f"{local_url(v['url'])} {v['width']}w" for v in variants if v["format"] == fmt
+    )
 
 
-def PreviewImage(src: Union[str, None] = None, **attrs: Any) -> AnyComponent:
-    placeholder_src = ""
+def PreviewImage(
+    src: Union[str, None] = None,
+    variants: Union[list, None] = None,
+    placeholder: Union[str, None] = None,
+    pending: bool = False,
+    **attrs: Any,
+) -> AnyComponent:
     if not src:
-        placeholder_src = _get_random_giphy_url()
-        src = placeholder_src  # Use the random Giphy URL as src
-        attrs["data_placeholder"] = "true"
-
-    # Ensure all necessary attributes from original are passed or handled
-    # Original attrs: src, height, width, id, hx_get, hx_target, hx_trigger, hx_swap
-    return Img(src=src, cls="image-placeholder", **attrs)
+        src = placeholder_pool.pick()
+        if pending:
+            # custom.js swaps this for the real image over /events/thumbnails
+            attrs["data_placeholder"] = "true"
+    else:
+        src = local_url(src)
+        attrs.setdefault("loading", "lazy")
+        attrs.setdefault("decoding", "async")
+        if placeholder:
+            # Inline blurred preview painted underneath until the real image decodes
+            attrs["style"] = f"background-image: url({placeholder})"
+            attrs["cls"] = "image-placeholder has-blur"
+
+    if not variants:
+        # Ensure all necessary attributes from original are passed or handled
+        # Original attrs: src, height, width, id, hx_get, hx_target, hx_trigger, hx_swap
+        attrs.setdefault("cls", "image-placeholder")
+        return Img(src=src, **attrs)
+
+    # Let the browser pick the smallest modern encoding that fits the card;
+    # the full-size JPEG in src stays as the fallback
+    largest = max(variants, key=lambda v: v["width"])
+    sources = [
+        Source(type=THUMBNAIL_MIME_TYPES[fmt], srcset=srcset, sizes=THUMBNAIL_SIZES)
+        for fmt, _ in THUMBNAIL_FORMATS
+        if (srcset := _srcset(variants, fmt))
+    ]
+    # The id goes on <picture> so swapping it replaces the <source>s as well
+    picture_id = attrs.pop("id", None)
+    return Picture(
+        *sources,
+        Img(
+            src=src,
+            width=largest["width"],
+            height=largest["height"],
+            **{"cls": "image-placeholder", **attrs},
+        ),
+        id=picture_id,
+    )
 
 
 def ImageSwitcher(*children: AnyComponent, **attrs: Any) -> AnyComponent:
@@ -315,11 +366,23 @@ def _render_bookmark_html(
     else:
         content = [title_link, created_at_html]
 
-    if is_image_list and thumbnail_url:
-        content.append(PreviewImage(src=thumbnail_url, id=f"thumbnail-{bookmark_id}"))
+    if is_image_list and (thumbnail_url or bookmark.get("thumbnail_pending")):
+        # While a capture is under way this renders the placeholder, and the
+        # page swaps in the real image when /events/thumbnails says it's ready
+        content.append(
+            PreviewImage(
+                src=thumbnail_url,
+                variants=bookmark.get("thumbnail_variants"),
+                placeholder=bookmark.get("thumbnail_placeholder"),
+                pending=bookmark.get("thumbnail_pending", False),
+                id=f"thumbnail-{bookmark_id}",
+            )
+        )
 
     if description:
         content.append(P(description))
+    if bookmark.get("content_snippet"):
+        content.append(P(bookmark["content_snippet"], cls="search-snippet"))
 
     # Add tags display or 'get tags' button
     tags_container_id = f"tags-{bookmark_id}"
@@ -330,11 +393,24 @@ def _render_bookmark_html(
             "Get Tags",
             hx_get=f"/ai/{bookmark_id}",
             hx_target=f"#{tags_container_id}",
-            hx_swap="outerHTML",
+            hx_swap="innerHTML",
             cls="btn small",
         )
     content.append(Div(tags_element, id=tags_container_id))
 
+    related = bookmark.get("related")
+    if is_image_list and related:
+        content.append(
+            Div(
+                Span("Related:", cls="related-label"),
+                *[
+                    A(r["title"] or r["url"], href=r["url"], target="_blank", cls="related-link")
+                    for r in related
+                ],
+                cls="related-strip",
+            )
+        )
+
     # Expand/Collapse button
     toggle_btn_text = "➖" if is_image_list else "➕"
     toggle_btn_hx_get = (
@@ -363,6 +439,15 @@ def _render_bookmark_html(
                 hx_swap="innerHTML",
                 cls="update-btn",
             ),  # type: ignore
+            A("🧭", href=f"/similar/{bookmark_id}", title="Similar", cls="similar-btn"),
+            GetTagsForBookmarkButton(
+                "🤖",
+                hx_get=f"/ai/{bookmark_id}?force=1",
+                hx_target=f"#{tags_container_id}",
+                hx_swap="innerHTML",
+                title="Ask the AI again for tags and a description",
+                cls="ai-btn",
+            ),
             HTMXDeleteButton(
                 "🗑️",
                 to="#",
@@ -382,6 +467,8 @@ def _render_bookmark_html(
         query_param = bookmark.get("query", "")
         if kind == "search" and query_param:
             hx_get_url = f"/bookmarks?page={next_page}&kind={kind}&query={query_param}"
+            if bookmark.get("scope", "all") != "all":
+                hx_get_url += f"&scope={bookmark['scope']}"
         else:
             hx_get_url = f"/bookmarks?page={next_page}&kind={kind}"
 
@@ -419,7 +506,7 @@ def BookmarkList(bookmarks: list[Bookmark], **attrs: Any) -> AnyComponent:
 
 def BookmarkImageList(bookmarks: list[Bookmark], **attrs: Any) -> AnyComponent:
     # Relies on PreviewImage's HTMX attributes for lazy loading thumbnails.
-    # The update_bookmarks_with_thumbnails can be called in the route handler if needed pre-render.
+    # Missing thumbnails are filled in by the backfill job (/thumbnails/backfill).
     return Div(
         *[_render_bookmark_html(bm, is_image_list=True) for bm in bookmarks],
         cls="bookmark-image-list-switcher",  # Or use "bookmark-list-switcher" if layout is identical
@@ -479,12 +566,153 @@ def EditBookmarkForm(bookmark: Bookmark, **attrs: Any) -> AnyComponent:
         Div(
             Label("Tags (space-separated)", for_="tags"),
             Input(type="text", name="tags", id="tags", value=tags_str),
+            # Filled in from the local tag suggester once the form is shown
+            Div(
+                hx_get=f"/suggest/{bookmark.get('id', '')}",
+                hx_trigger="load",
+                hx_swap="outerHTML",
+                cls="tag-suggestions",
+            )
+            if bookmark.get("id")
+            else "",
         ),
         Button("Save Changes", type="submit", cls="btn primary small"),
         **form_attrs,
     )
 
 
+def TagChangeReport(report: dict, applied: bool = False, error: str = "") -> AnyComponent:
+    """Preview (or result) of a bulk tag rename/merge/delete."""
+    if error:
+        return Div(Div(error, cls="cull-group-description"), id="tag-manage-results")
+    rows = []
+    for op in report.get("operations", []):
+        if op["new_tag"] is None:
+            action = f"🗑️ delete “{op['tag']}”"
+        elif op["merge"]:
+            action = f"🔀 merge “{op['tag']}” into “{op['new_tag']}”"
+        else:
+            action = f"✏️ rename “{op['tag']}” to “{op['new_tag']}”"
+        rows.append(
+            Div(
+                Div(action, cls="cull-item-title"),
+                Div(f"{op['bookmarks']:,} {BOOKMARK_NAME}s", cls="cull-item-url"),
+                cls="cull-item",
+            )
+        )
+    count = report.get("bookmarks", 0)
+    untagged = report.get("untagged_after", 0)
+    if applied:
+        summary = f"✅ Updated {count:,} {BOOKMARK_NAME}s."
+        if untagged:
+            summary += f" {untagged:,} are now untagged."
+    else:
+        summary = f"{count:,} {BOOKMARK_NAME}s would change."
+        if untagged:
+            summary += f" {untagged:,} would be left without tags."
+    children = [Div(summary, cls="cull-progress-label"), Div(*rows, cls="cull-group-items")]
+    if not applied and count:
+        children.append(
+            Button(
+                "Apply",
+                hx_post="/tags/manage/apply",
+                hx_include="#tag-manage-form",
+                hx_target="#tag-manage-results",
+                hx_swap="outerHTML",
+                hx_confirm=f"Rewrite the tags of {count:,} {BOOKMARK_NAME}s?",
+                cls="btn primary",
+            )
+        )
+    return Div(*children, id="tag-manage-results", cls="cull-results-container")
+
+
+def TagManagePage(tags: List[dict]) -> AnyComponent:
+    """Bulk tag rename/merge/delete page content (below nav/search)."""
+    from fasthtml.common import H1, Option, Select
+
+    return Div(
+        Div(
+            H1("Manage Tags", cls="cull-title"),
+            P(
+                "Rename, merge or delete tags across every bookmark at once. "
+                "Click tags below to pick them. Synonyms are one per line, like "
+                "“js = javascript”. Preview first; applying rewrites every affected "
+                "bookmark in one go and publishes the feed once.",
+                cls="cull-description",
+            ),
+            Form(
+                Div(
+                    Label("Operation", for_="operation"),
+                    Select(
+                        Option("Rename", value="rename"),
+                        Option("Merge", value="merge"),
+                        Option("Delete", value="delete"),
+                        name="operation",
+                        id="operation",
+                    ),
+                ),
+                Div(
+                    Label("Tags (space-separated)", for_="manage-tags"),
+                    Input(type="text", name="tags", id="manage-tags"),
+                ),
+                Div(
+                    Label("New tag (rename/merge)", for_="target"),
+                    Input(type="text", name="target", id="target"),
+                ),
+                Div(
+                    Label("Synonyms", for_="synonyms"),
+                    Textarea("", name="synonyms", id="synonyms", rows=3),
+                ),
+                Button(
+                    "Preview",
+                    type="submit",
+                    cls="btn primary small",
+                ),
+                id="tag-manage-form",
+                hx_post="/tags/manage/preview",
+                hx_target="#tag-manage-results",
+                hx_swap="outerHTML",
+                cls="edit-bookmark-form",
+            ),
+            cls="cull-header",
+        ),
+        Div(id="tag-manage-results"),
+        TagCloud(tags=tags, selectable=True),
+        cls="cull-page",
+    )
+
+
+def RelatedTags(related: List[Tuple[str, int]]) -> AnyComponent:
+    """Tags often used together with the current one."""
+    if not related:
+        return Div()
+    return Div(
+        Span("Often tagged with:", cls="related-label"),
+        *[A(tag, href=f"/tags/{tag}", cls="btn tag info") for tag, _ in related],
+        cls="related-tags tag-cloud",
+    )
+
+
+def TagSuggestions(suggestions: List[Tuple[str, float]]) -> AnyComponent:
+    """Clickable suggested tags; clicking one adds it to the form's tags."""
+    if not suggestions:
+        return Div(cls="tag-suggestions")
+    return Div(
+        Span("Suggested:", cls="tag-suggestions-label"),
+        *[
+            Button(
+                tag,
+                type="button",
+                title=f"{confidence:.0%} confident",
+                onclick="addSuggestedTag(this)",
+                cls="btn tag info",
+            )
+            for tag, confidence in suggestions
+        ],
+        cls="tag-suggestions",
+    )
+
+
 # ---------------------------------------------------------------------------
 # Cull feature components
 # ---------------------------------------------------------------------------
@@ -543,7 +771,15 @@ _CULL_GROUPS = [
 ]
 
 
-def _render_cull_item(result: dict) -> AnyComponent:
+def cull_group_index(result: dict) -> Optional[int]:
+    """Index into `_CULL_GROUPS` of the group a result belongs in, or None."""
+    for index, group in enumerate(_CULL_GROUPS):
+        if group["filter_fn"](result):
+            return index
+    return None
+
+
+def CullItem(result: dict) -> AnyComponent:
     item_id = result.get("id")
     title = result.get("title", "Unknown")
     url = result.get("url", "")
@@ -559,11 +795,20 @@ def _render_cull_item(result: dict) -> AnyComponent:
 
     target_id = f"cull-item-{item_id}"
 
+    details = []
+    if result.get("location"):
+        details.append(Div(f"↪ {result['location']}", cls="cull-item-url"))
+    if result.get("fail_streak", 0) > 1:
+        details.append(
+            Div(f"Failed the last {result['fail_streak']} checks", cls="cull-item-streak")
+        )
+
     return Div(
         Span(badge_text, cls=badge_cls),
         Div(
             A(title, href=url, target="_blank", cls="cull-item-title"),
             Div(url, cls="cull-item-url"),
+            *details,
             cls="cull-item-content",
         ),
         A(
@@ -579,82 +824,120 @@ def _render_cull_item(result: dict) -> AnyComponent:
     )
 
 
-def _render_cull_group(group: dict, items: list) -> AnyComponent:
+def _render_cull_group(index: int, items: list) -> AnyComponent:
     from fasthtml.common import H3
 
+    group = _CULL_GROUPS[index]
     return Div(
         Div(
             Span(group["icon"], cls="cull-group-icon"),
             Div(
-                H3(f"{group['title']} ({len(items)})", cls="cull-group-title"),
+                H3(
+                    f"{group['title']} (",
+                    Span(str(len(items)), cls="cull-group-count"),
+                    ")",
+                    cls="cull-group-title",
+                ),
                 P(group["description"], cls="cull-group-description"),
                 cls="cull-group-header-text",
             ),
             cls="cull-group-header",
         ),
-        Div(*[_render_cull_item(r) for r in items], cls="cull-group-items"),
+        Div(*[CullItem(r) for r in items], cls="cull-group-items"),
+        id=f"cull-group-{index}",
         cls=f"cull-group severity-{group['severity']}",
+        hidden=not items,
     )
 
 
 def CullResultsFragment(state: dict) -> AnyComponent:
-    """HTMX-pollable fragment showing cull progress and grouped results."""
+    """Cull progress and the latest result for every link.
+
+    While a run is going the fragment subscribes to /cull/stream, which
+    sends only the results that changed; custom.js moves them into their
+    group and updates the counters, and fetches /cull/progress for the
+    final render once the run is done.
+    """
     status = state.get("status", "idle")
     total = state.get("total", 0)
     checked = state.get("checked", 0)
     results = state.get("results", [])
+    known = state.get("known", 0)
 
     children = []
-    poll_attrs: dict = {}
+    stream_attrs: dict = {}
 
     if status == "running":
-        poll_attrs = {
-            "hx_get": "/cull/progress",
-            "hx_trigger": "every 2s",
-            "hx_target": "#cull-results",
-            "hx_swap": "outerHTML",
-        }
-
-    if status in ("running", "done") and total > 0:
-        ok_count = sum(1 for r in results if r.get("status_code") == 200)
-        issue_count = checked - ok_count
+        stream_attrs = {"data-cull-stream": "/cull/stream"}
         pct = int((checked / total) * 100) if total > 0 else 0
-        progress_label = (
-            f"Checking {checked:,} of {total:,}…"
-            if status == "running"
-            else f"Done — {total:,} bookmarks checked"
+        children.append(
+            Div(
+                Div(
+                    Div(style=f"width: {pct}%", id="cull-progress-fill", cls="cull-progress-fill"),
+                    cls="cull-progress-bar",
+                ),
+                Div(
+                    f"Checking {checked:,} of {total:,}… ({state.get('per_minute', 0):,.0f}/min)",
+                    id="cull-progress-label",
+                    cls="cull-progress-label",
+                ),
+                Div(id="cull-progress-counts", cls="cull-progress-stats"),
+                cls="cull-progress-section",
+            )
         )
-
+    elif status == "done" and total > 0:
         children.append(
             Div(
                 Div(
-                    Div(style=f"width: {pct}%", cls="cull-progress-fill"),
+                    Div(style="width: 100%", cls="cull-progress-fill"),
                     cls="cull-progress-bar",
                 ),
-                Div(progress_label, cls="cull-progress-label"),
+                Div(f"Done — {total:,} bookmarks checked", cls="cull-progress-label"),
+                cls="cull-progress-section",
+            )
+        )
+    elif status == "done":
+        children.append(
+            Div("✨ Every link was checked recently — nothing is due.", cls="cull-all-ok")
+        )
+
+    if known > 0 and status != "running":
+        last_checked = datetime.fromtimestamp(state["last_checked_at"]).strftime("%Y-%m-%d %H:%M")
+        children.append(
+            Div(
+                Div(
+                    f"✅ {state.get('ok', 0):,} alive  •  ⚠️ {len(results):,} need attention",
+                    cls="cull-progress-label",
+                ),
                 Div(
-                    f"✅ {ok_count:,} alive  •  ⚠️ {issue_count:,} need attention",
+                    f"{known:,} links checked, most recently {last_checked}  •  "
+                    f"{state.get('due', 0):,} due for a recheck",
                     cls="cull-progress-stats",
                 ),
                 cls="cull-progress-section",
             )
         )
 
-        non_ok = [r for r in results if r.get("status_code") != 200 or r.get("error")]
-        if non_ok:
-            for group in _CULL_GROUPS:
-                items = [r for r in non_ok if group["filter_fn"](r)]
-                if items:
-                    children.append(_render_cull_group(group, items))
-        elif status == "done":
-            children.append(
-                Div(
-                    "🎉 All bookmarks returned 200 OK — everything looks great!",
-                    cls="cull-all-ok",
-                )
+    # One pass over the results; a running page keeps every group's
+    # container around (hidden while empty) for streamed items to land in
+    groups: List[list] = [[] for _ in _CULL_GROUPS]
+    for r in results:
+        index = cull_group_index(r)
+        if index is not None:
+            groups[index].append(r)
+    for index, items in enumerate(groups):
+        if items or status == "running":
+            children.append(_render_cull_group(index, items))
+
+    if not results and status == "done" and total > 0:
+        children.append(
+            Div(
+                "🎉 All bookmarks returned 200 OK — everything looks great!",
+                cls="cull-all-ok",
             )
+        )
 
-    return Div(*children, id="cull-results", cls="cull-results-container", **poll_attrs)
+    return Div(*children, id="cull-results", cls="cull-results-container", **stream_attrs)
 
 
 def CullPage(state: dict) -> AnyComponent:
@@ -664,34 +947,449 @@ def CullPage(state: dict) -> AnyComponent:
     status = state.get("status", "idle")
     is_running = status == "running"
 
+    def start_button(text: str, cls: str, **extra) -> AnyComponent:
+        attrs: dict = {
+            "hx_post": "/cull/start",
+            "hx_target": "#cull-results",
+            "hx_swap": "outerHTML",
+            "cls": f"{cls} cull-start-btn",
+            **extra,
+        }
+        if is_running:
+            attrs["disabled"] = True
+        return Button("Culling in progress…" if is_running else text, **attrs)
+
+    return Div(
+        Div(
+            H1("Cull Bookerics", cls="cull-title"),
+            P(
+                "Run a live HTTP check on your bookmarked URLs. "
+                "Anything that isn't a clean 200 OK is surfaced and ranked — "
+                "from probably busted to possible server hiccup. "
+                "Links that keep passing are rechecked less and less often.",
+                cls="cull-description",
+            ),
+            Div(
+                start_button(f"Check {state.get('due', 0):,} due links", "btn primary"),
+                start_button("Recheck everything", "btn", hx_vals='{"full": "1"}'),
+                cls="cull-actions",
+            ),
+            cls="cull-header",
+        ),
+        CullResultsFragment(state=state),
+        cls="cull-page",
+    )
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def _JobProgressSection(state: dict, progress_label: str, *stat_lines: str) -> AnyComponent:
+    """Progress bar, counts and timing for a `JobProgress` snapshot."""
+    total = state.get("total", 0)
+    done = state.get("done", 0)
+    pct = int((done / total) * 100) if total > 0 else 0
+
+    rate = f"{state.get('per_minute', 0):.1f}/min"
+    eta = state.get("eta")
+    timing = f"⏱️ {_format_duration(state.get('elapsed', 0))} elapsed  •  {rate}"
+    if eta is not None:
+        timing += f"  •  ~{_format_duration(eta)} left"
+
+    return Div(
+        Div(
+            Div(style=f"width: {pct}%", cls="cull-progress-fill"),
+            cls="cull-progress-bar",
+        ),
+        Div(progress_label, cls="cull-progress-label"),
+        *[Div(line, cls="cull-progress-stats") for line in stat_lines],
+        Div(timing, cls="cull-progress-stats"),
+        cls="cull-progress-section",
+    )
+
+
+def ThumbnailBackfillFragment(state: dict) -> AnyComponent:
+    """HTMX-pollable fragment showing thumbnail backfill progress."""
+    status = state.get("status", "idle")
+    total = state.get("total", 0)
+    done = state.get("done", 0)
+
+    children = []
+    poll_attrs: dict = {}
+
+    if status in ("running", "stopping"):
+        poll_attrs = {
+            "hx_get": "/thumbnails/backfill/progress",
+            "hx_trigger": "every 2s",
+            "hx_target": "#backfill-results",
+            "hx_swap": "outerHTML",
+        }
+
+    if status == "done" and total == 0:
+        children.append(
+            Div("🎉 Every bookmark already has a thumbnail.", cls="cull-all-ok")
+        )
+    elif status != "idle":
+        if status == "running":
+            progress_label = f"Capturing {done:,} of {total:,}…"
+        elif status == "stopping":
+            progress_label = f"Stopping after the captures in flight ({done:,} of {total:,})…"
+        else:
+            progress_label = f"Done — {done:,} of {total:,} bookmarks processed"
+
+        children.append(
+            _JobProgressSection(
+                state,
+                progress_label,
+                f"✅ {state.get('succeeded', 0):,} captured  •  "
+                f"⚠️ {state.get('failed', 0):,} failed  •  "
+                f"🔁 {state.get('retries', 0):,} retries",
+            )
+        )
+
+        if status in ("running", "stopping"):
+            children.append(
+                Button(
+                    "Stop",
+                    hx_post="/thumbnails/backfill/stop",
+                    hx_target="#backfill-results",
+                    hx_swap="outerHTML",
+                    disabled=status == "stopping",
+                    cls="btn",
+                )
+            )
+
+        errors = state.get("errors", [])
+        if errors:
+            from fasthtml.common import H3
+
+            children.append(
+                Div(
+                    Div(
+                        Span("📸", cls="cull-group-icon"),
+                        Div(
+                            H3(f"Failed captures ({len(errors)})", cls="cull-group-title"),
+                            P(
+                                "These stay without a thumbnail and are picked up again on the next run.",
+                                cls="cull-group-description",
+                            ),
+                            cls="cull-group-header-text",
+                        ),
+                        cls="cull-group-header",
+                    ),
+                    Div(
+                        *[Div(Div(e, cls="cull-item-url"), cls="cull-item") for e in errors],
+                        cls="cull-group-items",
+                    ),
+                    cls="cull-group severity-high",
+                )
+            )
+
+    return Div(*children, id="backfill-results", cls="cull-results-container", **poll_attrs)
+
+
+def ThumbnailBackfillPage(state: dict, missing: int) -> AnyComponent:
+    """Full thumbnail backfill page content (below nav/search)."""
+    from fasthtml.common import H1
+
+    is_running = state.get("status") in ("running", "stopping")
+
     btn_attrs: dict = {
-        "hx_post": "/cull/start",
-        "hx_target": "#cull-results",
+        "hx_post": "/thumbnails/backfill/start",
+        "hx_target": "#backfill-results",
         "hx_swap": "outerHTML",
         "cls": "btn primary cull-start-btn",
     }
     if is_running:
         btn_attrs["disabled"] = True
 
-    btn_text = "Culling in progress…" if is_running else "Start Cull"
+    btn_text = "Backfill in progress…" if is_running else "Start Backfill"
 
     return Div(
         Div(
-            H1("Cull Bookerics", cls="cull-title"),
+            H1("Backfill Thumbnails", cls="cull-title"),
             P(
-                "Run a live HTTP check on every bookmarked URL. "
-                "Anything that isn't a clean 200 OK is surfaced and ranked — "
-                "from probably busted to possible server hiccup.",
+                f"{missing:,} {BOOKMARK_NAME}s have no thumbnail yet. "
+                "Capture them a few at a time in the background; "
+                "each one is saved as soon as it's done, so stopping loses nothing.",
                 cls="cull-description",
             ),
             Button(btn_text, **btn_attrs),
             cls="cull-header",
         ),
-        CullResultsFragment(state=state),
+        ThumbnailBackfillFragment(state=state),
         cls="cull-page",
     )
 
 
+def AIEnrichmentFragment(state: dict) -> AnyComponent:
+    """HTMX-pollable fragment showing bulk AI tagging progress."""
+    status = state.get("status", "idle")
+    total = state.get("total", 0)
+    done = state.get("done", 0)
+    stats = state.get("stats", {})
+
+    children = []
+    poll_attrs: dict = {}
+
+    if status in ("running", "stopping"):
+        poll_attrs = {
+            "hx_get": "/ai/backfill/progress",
+            "hx_trigger": "every 2s",
+            "hx_target": "#ai-results",
+            "hx_swap": "outerHTML",
+        }
+
+    if status == "done" and total == 0:
+        children.append(Div(f"🎉 Every {BOOKMARK_NAME} already has tags.", cls="cull-all-ok"))
+    elif status != "idle":
+        if status == "running":
+            progress_label = f"Tagging {done:,} of {total:,}…"
+        elif status == "stopping":
+            progress_label = f"Stopping after the requests in flight ({done:,} of {total:,})…"
+        else:
+            progress_label = f"Done — {done:,} of {total:,} bookmarks processed"
+
+        prompt_tokens = stats.get("prompt_tokens", 0)
+        completion_tokens = stats.get("completion_tokens", 0)
+        elapsed = state.get("elapsed", 0)
+        tokens_per_second = (prompt_tokens + completion_tokens) / elapsed if elapsed > 0 else 0
+        children.append(
+            _JobProgressSection(
+                state,
+                progress_label,
+                f"✅ {state.get('succeeded', 0):,} tagged  •  "
+                f"⚠️ {state.get('failed', 0):,} failed  •  "
+                f"🔁 {stats.get('rate_limited', 0):,} rate limited  •  "
+                f"💾 {stats.get('cache_hits', 0):,} from cache",
+                f"🤖 {stats.get('requests', 0):,} requests  •  "
+                f"{prompt_tokens:,} prompt + {completion_tokens:,} completion tokens  •  "
+                f"{tokens_per_second:,.0f} tokens/s",
+            )
+        )
+
+        if status in ("running", "stopping"):
+            children.append(
+                Button(
+                    "Stop",
+                    hx_post="/ai/backfill/stop",
+                    hx_target="#ai-results",
+                    hx_swap="outerHTML",
+                    disabled=status == "stopping",
+                    cls="btn",
+                )
+            )
+
+        errors = state.get("errors", [])
+        if errors:
+            from fasthtml.common import H3
+
+            children.append(
+                Div(
+                    Div(
+                        Span("🤖", cls="cull-group-icon"),
+                        Div(
+                            H3(f"Not tagged ({len(errors)})", cls="cull-group-title"),
+                            P(
+                                "These stay untagged and are picked up again on the next run.",
+                                cls="cull-group-description",
+                            ),
+                            cls="cull-group-header-text",
+                        ),
+                        cls="cull-group-header",
+                    ),
+                    Div(
+                        *[Div(Div(e, cls="cull-item-url"), cls="cull-item") for e in errors],
+                        cls="cull-group-items",
+                    ),
+                    cls="cull-group severity-high",
+                )
+            )
+
+    return Div(*children, id="ai-results", cls="cull-results-container", **poll_attrs)
+
+
+def AIEnrichmentPage(state: dict, untagged: int) -> AnyComponent:
+    """Full bulk AI tagging page content (below nav/search)."""
+    from fasthtml.common import H1
+
+    is_running = state.get("status") in ("running", "stopping")
+
+    btn_attrs: dict = {
+        "hx_post": "/ai/backfill/start",
+        "hx_target": "#ai-results",
+        "hx_swap": "outerHTML",
+        "cls": "btn primary cull-start-btn",
+    }
+    if is_running:
+        btn_attrs["disabled"] = True
+
+    btn_text = "Tagging in progress…" if is_running else "Start AI Tagging"
+
+    return Div(
+        Div(
+            H1("AI Tagging", cls="cull-title"),
+            P(
+                f"{untagged:,} {BOOKMARK_NAME}s have no tags yet. "
+                "They're sent to the model several at a time; the results are "
+                "saved together when the run ends or is stopped.",
+                cls="cull-description",
+            ),
+            Button(btn_text, **btn_attrs),
+            cls="cull-header",
+        ),
+        AIEnrichmentFragment(state=state),
+        cls="cull-page",
+    )
+
+
+def _render_suspect_item(item: dict) -> AnyComponent:
+    item_id = item.get("id")
+    details = []
+    if item.get("entropy") is not None:
+        details.append(f"entropy {item['entropy']:.2f}")
+    if item.get("phash"):
+        details.append(f"phash {item['phash']}")
+    target_id = f"suspect-item-{item_id}"
+
+    return Div(
+        Img(
+            src=local_url(item["thumbnail_url"]),
+            loading="lazy",
+            cls="suspect-thumb",
+        )
+        if item.get("thumbnail_url")
+        else Span("∅", cls="cull-badge cull-badge-error"),
+        Div(
+            A(
+                item.get("title") or item.get("url", ""),
+                href=item.get("url", ""),
+                target="_blank",
+                cls="cull-item-title",
+            ),
+            Div(item.get("url", ""), cls="cull-item-url"),
+            Div("  •  ".join(details), cls="cull-item-url"),
+            cls="cull-item-content",
+        ),
+        A(
+            "🗑️",
+            href="#",
+            hx_target=f"#{target_id}",
+            hx_swap="outerHTML",
+            **{"data-delete-url": f"/delete/{item_id}", "data-confirmed": "false"},
+            cls="btn delete-btn cull-item-delete",
+        ),
+        id=target_id,
+        cls="cull-item",
+    )
+
+
+def _render_suspect_group(
+    icon: str, title: str, description: str, severity: str, items: list
+) -> AnyComponent:
+    from fasthtml.common import H3
+
+    return Div(
+        Div(
+            Span(icon, cls="cull-group-icon"),
+            Div(
+                H3(title, cls="cull-group-title"),
+                P(description, cls="cull-group-description"),
+                cls="cull-group-header-text",
+            ),
+            cls="cull-group-header",
+        ),
+        Div(*[_render_suspect_item(item) for item in items], cls="cull-group-items"),
+        cls=f"cull-group severity-{severity}",
+    )
+
+
+def SuspectThumbnailsPage(report: dict) -> AnyComponent:
+    """Bookmarks whose screenshots look blank, duplicated or nearly empty."""
+    from fasthtml.common import H1
+
+    children = []
+    if report["blank"]:
+        children.append(
+            _render_suspect_group(
+                "⬜",
+                f"Blank captures ({len(report['blank'])})",
+                "Came back empty and weren't stored. The thumbnail backfill retries these.",
+                "critical",
+                report["blank"],
+            )
+        )
+    for group in report["duplicates"]:
+        children.append(
+            _render_suspect_group(
+                "👯",
+                f"Look-alike screenshots ({len(group['bookmarks'])})",
+                "These look nearly the same, which usually means an error page, "
+                "a cookie wall or a login screen — or just pages sharing a layout.",
+                "high",
+                group["bookmarks"],
+            )
+        )
+    if report["low_entropy"]:
+        children.append(
+            _render_suspect_group(
+                "🌫️",
+                f"Nearly empty ({len(report['low_entropy'])})",
+                "Very little on screen; worth a look.",
+                "medium",
+                report["low_entropy"],
+            )
+        )
+    if not children:
+        children.append(Div("🎉 No suspect thumbnails.", cls="cull-all-ok"))
+
+    return Div(
+        Div(
+            H1("Suspect Thumbnails", cls="cull-title"),
+            P(
+                "Every screenshot gets a perceptual hash and an entropy score when it's captured. "
+                "Blank ones are rejected, look-alikes share one file, and the rest of the oddities land here.",
+                cls="cull-description",
+            ),
+            cls="cull-header",
+        ),
+        Div(*children, cls="cull-results-container"),
+        cls="cull-page",
+    )
+
+
+def SnapshotPage(bookmark: Bookmark, meta: dict, text: str) -> AnyComponent:
+    """Readable local copy of a bookmarked page."""
+    from fasthtml.common import H1
+
+    bookmark_id = bookmark["id"]
+    links = [
+        BookericLink("Original", to=bookmark["url"]),
+        A("Raw HTML", href=f"/snapshot/{bookmark_id}/raw", target="_blank", cls="bookeric-link"),
+    ]
+    if bookmark.get("archive_url"):
+        links.append(BookericLink("archive.ph", to=bookmark["archive_url"]))
+
+    paragraphs = [P(block) for block in text.split("\n\n") if block.strip()]
+    return Div(
+        Div(
+            H1(meta.get("title") or bookmark.get("title", ""), cls="cull-title"),
+            P(
+                f"Saved {meta['fetched_at'][:10]} from {meta.get('final_url') or meta['url']}",
+                cls="cull-description",
+            ),
+            Div(*links, cls="snapshot-links"),
+            cls="cull-header",
+        ),
+        Div(*paragraphs, cls="snapshot-text")
+        if paragraphs
+        else P("No readable text was found on this page.", cls="cull-description"),
+        cls="cull-page snapshot-page",
+    )
+
+
 def KeyboardShortcutsHelpModal(**attrs: Any) -> AnyComponent:
     """Modal showing all keyboard shortcuts"""
     return Div(
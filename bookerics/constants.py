@@ -28,19 +28,93 @@ LOCAL_BACKUP_PATH = os.getenv("LOCAL_BACKUP_PATH")
 BOOKERICS_SERVER = os.getenv("BOOKERICS_SERVER")
 BOOKERICS_USERNAME = os.getenv("BOOKERICS_USERNAME")
 BOOKERICS_PASSWORD = os.getenv("BOOKERICS_PASSWORD")
+BOOKERICS_SFTP_PORT = int(os.getenv("BOOKERICS_SFTP_PORT", "22"))
+# Concurrent uploads over the single pooled SFTP connection
+BOOKERICS_SFTP_PARALLELISM = int(os.getenv("BOOKERICS_SFTP_PARALLELISM", "4"))
 BOOKERICS_BASE_URL = "https://bookerics.com"
-BOOKERICS_FEEDS_PATH = "/media/sdc1/eddielomax/www/bookerics.com/public_html/feeds"
-BOOKERICS_THUMBNAILS_PATH = (
-    "/media/sdc1/eddielomax/www/bookerics.com/public_html/thumbnails"
+BOOKERICS_REMOTE_ROOT = os.getenv(
+    "BOOKERICS_REMOTE_ROOT", "/media/sdc1/eddielomax/www/bookerics.com/public_html"
 )
 
+### Publishing: "sftp" (web hosting above) or "local" (a directory on this machine)
+BOOKERICS_PUBLISH_BACKEND = os.getenv("BOOKERICS_PUBLISH_BACKEND", "sftp")
+BOOKERICS_PUBLISH_DIR = os.getenv("BOOKERICS_PUBLISH_DIR", "./public_html")
+# Site-relative directories every backend publishes into
+PUBLISH_FEEDS_DIR = "feeds"
+PUBLISH_THUMBNAILS_DIR = "thumbnails"
+
+# Content hashes of everything last uploaded, so publishing only sends changes
+PUBLISH_MANIFEST_PATH = f"./{BOOKMARK_NAME}s-publish-manifest.json"
+
+## Screenshots (warm Playwright pool)
+SCREENSHOT_POOL_SIZE = int(os.getenv("SCREENSHOT_POOL_SIZE", "2"))
+SCREENSHOT_PAGE_TIMEOUT = float(os.getenv("SCREENSHOT_PAGE_TIMEOUT", "20"))
+# Browser contexts are recycled after this many captures
+SCREENSHOT_MAX_USES = int(os.getenv("SCREENSHOT_MAX_USES", "25"))
+
+# Thumbnail backfill job (/thumbnails/backfill)
+THUMBNAIL_BACKFILL_CONCURRENCY = int(os.getenv("THUMBNAIL_BACKFILL_CONCURRENCY", "2"))
+THUMBNAIL_BACKFILL_TIMEOUT = float(os.getenv("THUMBNAIL_BACKFILL_TIMEOUT", "60"))
+THUMBNAIL_BACKFILL_RETRIES = int(os.getenv("THUMBNAIL_BACKFILL_RETRIES", "1"))
+# Content-addressed thumbnail store, served by the app at THUMBS_MOUNT
+THUMBNAIL_STORE_DIR = os.getenv("THUMBNAIL_STORE_DIR", "./thumbs")
+THUMBS_MOUNT = "/thumbs"
+# Scratch space for captures while they are processed and published
+THUMBNAIL_WORK_DIR = os.getenv("THUMBNAIL_WORK_DIR", "/tmp/bookerics-thumbnails")
+
+## Cull link checker (see cull.py)
+CULL_CONCURRENCY = int(os.getenv("CULL_CONCURRENCY", "64"))
+# Politeness: at most this many connections to any one host at a time
+CULL_PER_HOST = int(os.getenv("CULL_PER_HOST", "4"))
+CULL_TIMEOUT = float(os.getenv("CULL_TIMEOUT", "10"))
+CULL_DNS_TTL = int(os.getenv("CULL_DNS_TTL", "300"))
+# A link that keeps answering 200 is rechecked after this many hours,
+# doubling with every healthy check up to CULL_RECHECK_MAX_DAYS
+CULL_RECHECK_HOURS = float(os.getenv("CULL_RECHECK_HOURS", "24"))
+CULL_RECHECK_MAX_DAYS = float(os.getenv("CULL_RECHECK_MAX_DAYS", "60"))
+
+## archive.ph submissions (see archiver.py). Point ARCHIVE_BASE_URL at a
+## local stand-in server to try the queue without hitting archive.ph.
+ARCHIVE_BASE_URL = os.getenv("ARCHIVE_BASE_URL", "https://archive.ph")
+# archive.ph starts answering 429 well before a request every few seconds
+ARCHIVE_RATE_PER_MINUTE = float(os.getenv("ARCHIVE_RATE_PER_MINUTE", "4"))
+ARCHIVE_BURST = int(os.getenv("ARCHIVE_BURST", "2"))
+ARCHIVE_MAX_ATTEMPTS = int(os.getenv("ARCHIVE_MAX_ATTEMPTS", "6"))
+
+## Local page snapshots (see snapshots.py)
+SNAPSHOT_CONCURRENCY = int(os.getenv("SNAPSHOT_CONCURRENCY", "4"))
+SNAPSHOT_TIMEOUT = float(os.getenv("SNAPSHOT_TIMEOUT", "30"))
+SNAPSHOT_MAX_BYTES = int(os.getenv("SNAPSHOT_MAX_BYTES", str(5 * 1024 * 1024)))
+
 ## Giphy API service
 GIPHY_API_KEY = os.getenv("GIPHY_API_KEY")
+# Placeholder GIFs are fetched in the background, never while rendering
+PLACEHOLDER_POOL_SIZE = int(os.getenv("PLACEHOLDER_POOL_SIZE", "20"))
+PLACEHOLDER_REFRESH_INTERVAL = float(os.getenv("PLACEHOLDER_REFRESH_INTERVAL", "600"))
 
 ## OpenRouter
 BOOKERICS_OPENROUTER_KEY = os.getenv("BOOKERICS_OPENROUTER_KEY")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
-TAG_GPT_MODEL = "google/gemini-2.5-flash"
+# Any OpenAI-compatible endpoint works, e.g. a local stub for testing
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+TAG_GPT_MODEL = os.getenv("TAG_GPT_MODEL", "google/gemini-2.5-flash")
+# Bulk AI tagging: bookmarks per request, requests in flight, 429 retries
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "10"))
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "3"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "5"))
+# Longest a 429 may pause a batch, whatever Retry-After asks for (seconds)
+AI_MAX_RETRY_WAIT = float(os.getenv("AI_MAX_RETRY_WAIT", "120"))
+# Answers are cached by prompt content; least recently used beyond this are evicted
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "20000"))
+# New bookmarks take the local tag suggestions when they're at least this confident
+SUGGEST_MIN_CONFIDENCE = float(os.getenv("SUGGEST_MIN_CONFIDENCE", "0.25"))
+
+## Local vector index for "similar" and hybrid search (see vectors.py)
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", f"./{BOOKMARK_NAME}s-vectors")
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "256"))
+# Above this many bookmarks, search probes IVF partitions instead of every row.
+# More probes find more of the true nearest neighbours but scan more rows
+VECTOR_IVF_THRESHOLD = int(os.getenv("VECTOR_IVF_THRESHOLD", "20000"))
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "32"))
 
 # Define the feeds directory relative to the project root
 FEEDS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "feeds")
@@ -0,0 +1,274 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from .constants import CULL_CONCURRENCY, CULL_DNS_TTL, CULL_PER_HOST, CULL_TIMEOUT
+from .database import (
+    fetch_bookmarks_all,
+    fetch_bookmarks_due_for_check,
+    fetch_cull_history,
+    record_cull_checks,
+)
+from .events import CULL_PROGRESS, event_bus
+from .jobs import JobProgress
+from .utils import logger
+
+USER_AGENT = "Mozilla/5.0 (compatible; bookerics-health-check/1.0)"
+
+# Servers that mishandle HEAD often answer these; a one-byte GET settles it
+HEAD_FALLBACK_STATUSES = frozenset({400, 403, 404, 405, 406, 500, 501})
+
+
+def interleave_by_host(bookmarks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order bookmarks round-robin across hosts.
+
+    With per-host connection limits, a run that reached 2,000 URLs on one
+    site in a row would leave most workers waiting on that site; spreading
+    each host's URLs out keeps every worker busy.
+    """
+    by_host: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    for bookmark in bookmarks:
+        host = urlparse(bookmark.get("url") or "").hostname or ""
+        by_host.setdefault(host, []).append(bookmark)
+    queues = [list(reversed(items)) for items in by_host.values()]
+    ordered: List[Dict[str, Any]] = []
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop())
+        queues = [q for q in queues if q]
+    return ordered
+
+
+class UrlChecker:
+    """Checks URLs over one shared aiohttp session.
+
+    The connector caps connections overall (`concurrency`), keeps them
+    alive between requests and caches DNS lookups for `dns_ttl` seconds.
+    At most `per_host` checks run against one host at a time; that limit
+    is a semaphore here rather than the connector's `limit_per_host`, so
+    time spent waiting for a turn doesn't count towards `timeout`. Each
+    URL gets a HEAD request without following redirects; if the server
+    rejects HEAD, a ranged GET for the first byte is tried instead.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 64,
+        per_host: int = 4,
+        timeout: float = 10.0,
+        dns_ttl: int = 300,
+    ):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.dns_ttl = dns_ttl
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                ttl_dns_cache=self.dns_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.timeout / 2),
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._session
+
+    async def _request(self, method: str, url: str) -> Dict[str, Any]:
+        session = self._get_session()
+        headers = {"Range": "bytes=0-0"} if method == "GET" else None
+        async with session.request(
+            method, url, allow_redirects=False, headers=headers
+        ) as resp:
+            status = resp.status
+            location = resp.headers.get("Location")
+        if method == "GET" and status == 206:
+            # Partial content is the server saying the page is there
+            status = 200
+        return {
+            "status_code": status,
+            "location": urljoin(url, location) if location and 300 <= status < 400 else None,
+            "method": method,
+        }
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).hostname or ""
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(max(1, self.per_host))
+        return self._host_slots[host]
+
+    async def check(self, bookmark: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._host_slot(bookmark["url"]):
+            return await self._check(bookmark)
+
+    async def _check(self, bookmark: Dict[str, Any]) -> Dict[str, Any]:
+        url = bookmark["url"]
+        result: Dict[str, Any] = {
+            "id": bookmark["id"],
+            "title": bookmark["title"],
+            "url": url,
+            "status_code": None,
+            "error": None,
+            "location": None,
+            "method": "HEAD",
+            "latency_ms": None,
+        }
+        started = time.perf_counter()
+        try:
+            response = await self._request("HEAD", url)
+            if response["status_code"] in HEAD_FALLBACK_STATUSES:
+                response = await self._request("GET", url)
+            result.update(response)
+        except asyncio.TimeoutError:
+            result["error"] = "timeout"
+        except (aiohttp.ClientError, ValueError, OSError):
+            result["error"] = "connection_error"
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000)
+        return result
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# ---------------------------------------------------------------------------
+# The cull job
+# ---------------------------------------------------------------------------
+
+# Results are written to cull_checks in batches of this size (or every
+# FLUSH_SECONDS), so the page sees them while the run is still going
+FLUSH_EVERY = 100
+FLUSH_SECONDS = 1.0
+
+cull_job = JobProgress("cull")
+_cull_task: Optional[asyncio.Task] = None
+# What this run changed on the page, in order, for /cull/stream: every
+# unhealthy result, plus {"id", "resolved"} for links that failed last
+# time and are healthy now. Streams keep their own offset into it.
+_changes: List[Dict[str, Any]] = []
+_previously_failing: Set[int] = set()
+
+
+def is_healthy(result: Dict[str, Any]) -> bool:
+    return result.get("status_code") == 200 and not result.get("error")
+
+
+def cull_changes(since: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Changes after the first `since`, and this run's progress counters."""
+    state = cull_job.snapshot()
+    return _changes[since:], {
+        "status": "running" if state["status"] in ("running", "stopping") else state["status"],
+        "total": state["total"],
+        "checked": state["done"],
+        "alive": state["succeeded"],
+        "issues": state["failed"],
+        "per_minute": state["per_minute"],
+    }
+
+
+async def run_cull(bookmarks: List[Dict[str, Any]]) -> None:
+    """Check every bookmark's URL, `CULL_CONCURRENCY` at a time, recording each result."""
+    checker = UrlChecker(
+        concurrency=CULL_CONCURRENCY,
+        per_host=CULL_PER_HOST,
+        timeout=CULL_TIMEOUT,
+        dns_ttl=CULL_DNS_TTL,
+    )
+    _changes.clear()
+    cull_job.start(len(bookmarks))
+    event_bus.publish(CULL_PROGRESS, {"changes": 0})
+    history = await asyncio.to_thread(fetch_cull_history)
+    _previously_failing.clear()
+    _previously_failing.update(r["id"] for r in history["results"])
+    logger.info(f"🪓 Cull starting for {len(bookmarks):,} URLs")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for bookmark in interleave_by_host(bookmarks):
+        queue.put_nowait(bookmark)
+
+    pending: List[Dict[str, Any]] = []
+    last_flush = time.monotonic()
+
+    async def flush() -> None:
+        nonlocal pending, last_flush
+        batch, pending = pending, []
+        last_flush = time.monotonic()
+        if batch:
+            await asyncio.to_thread(record_cull_checks, batch)
+
+    async def worker() -> None:
+        while not queue.empty() and not cull_job.stop_requested:
+            result = await checker.check(queue.get_nowait())
+            result["checked_at"] = time.time()
+            pending.append(result)
+            if not is_healthy(result):
+                _changes.append(result)
+            elif result["id"] in _previously_failing:
+                _changes.append({"id": result["id"], "resolved": True})
+            cull_job.advance(is_healthy(result))
+            event_bus.publish(CULL_PROGRESS, {"changes": len(_changes)})
+            if len(pending) >= FLUSH_EVERY or time.monotonic() - last_flush >= FLUSH_SECONDS:
+                await flush()
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, CULL_CONCURRENCY))))
+    finally:
+        await checker.close()
+        try:
+            await flush()
+        finally:
+            cull_job.finish()
+            event_bus.publish(CULL_PROGRESS, {"changes": len(_changes)})
+
+    state = cull_job.snapshot()
+    logger.info(
+        f"🪓 Cull finished: {state['done']:,} URLs in {state['elapsed']:.0f}s "
+        f"({state['per_minute']:.0f}/min), {state['failed']:,} need attention"
+    )
+
+
+def start_cull(full: bool = False) -> bool:
+    """Start a cull in the background unless one is already running.
+
+    Only links that are due (never checked, failing, or past their
+    recheck time) are checked unless `full` is set.
+    """
+    global _cull_task
+    if _cull_task is not None and not _cull_task.done():
+        return False
+    bookmarks = fetch_bookmarks_all(kind="newest") if full else fetch_bookmarks_due_for_check()
+    _cull_task = asyncio.create_task(run_cull(bookmarks))
+    return True
+
+
+async def stop_cull() -> None:
+    cull_job.request_stop()
+    if _cull_task is not None and not _cull_task.done():
+        _cull_task.cancel()
+        try:
+            await _cull_task
+        except asyncio.CancelledError:
+            pass
+
+
+def cull_state() -> Dict[str, Any]:
+    """This run's progress plus the stored history, for `CullResultsFragment`."""
+    state = cull_job.snapshot()
+    history = fetch_cull_history()
+    return {
+        "status": "running" if state["status"] in ("running", "stopping") else state["status"],
+        "total": state["total"],
+        "checked": state["done"],
+        "per_minute": state["per_minute"],
+        "elapsed": state["elapsed"],
+        **history,
+    }
@@ -4,31 +4,40 @@ import shutil
 import aiohttp
 import aiofiles
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Set, Tuple, Optional
 import asyncio
 import json
 import sqlite3
-import subprocess
+from playwright.async_api import Error as PlaywrightError
 from xml.sax.saxutils import escape
 from contextlib import contextmanager
 import threading
-import asyncssh
+import time
 
 from .constants import (
     BOOKMARK_NAME,
+    CULL_RECHECK_HOURS,
+    CULL_RECHECK_MAX_DAYS,
     LOCAL_BACKUP_PATH,
     RSS_METADATA,
     FEEDS_DIR,
-    BOOKERICS_SERVER,
-    BOOKERICS_USERNAME,
-    BOOKERICS_PASSWORD,
     BOOKERICS_BASE_URL,
-    BOOKERICS_FEEDS_PATH,
-    BOOKERICS_THUMBNAILS_PATH,
+    PUBLISH_FEEDS_DIR,
+    PUBLISH_THUMBNAILS_DIR,
+    THUMBNAIL_WORK_DIR,
 )
 
 from .utils import logger
 from .cache import cache
+from .static_files import write_precompressed
+from .publish import sync_files
+from .screenshots import screenshot_service
+from .events import ARCHIVE_QUEUED, BOOKMARK_CREATED, THUMBNAIL_READY, event_bus
+from .thumbnails import LOW_ENTROPY_THRESHOLD, analyze_screenshot, process_screenshot
+from .thumbstore import key_from_url, public_url, thumbnail_store
+from .related import related_index
+from .suggest import tag_suggester
+from .vectors import embed, vector_index
 
 
 Bookmark = Dict[str, Any]
@@ -63,26 +72,6 @@ def get_db_connection():
         raise e
 
 
-async def upload_file_via_sftp(local_path: str, remote_path: str) -> None:
-    """Upload a file to web hosting via SFTP."""
-    if not all([BOOKERICS_SERVER, BOOKERICS_USERNAME, BOOKERICS_PASSWORD]):
-        logger.error("💥 Web hosting credentials not configured")
-        return
-
-    try:
-        async with asyncssh.connect(
-            BOOKERICS_SERVER,
-            username=BOOKERICS_USERNAME,
-            password=BOOKERICS_PASSWORD,
-            known_hosts=None,
-        ) as conn:
-            async with conn.start_sftp_client() as sftp:
-                await sftp.put(local_path, remote_path)
-                logger.info(f"⬆️ Uploaded {local_path} to {remote_path}")
-    except Exception as e:
-        logger.error(f"💥 Error uploading {local_path} via SFTP: {e}")
-
-
 def _column_exists(table: str, column: str) -> bool:
     """Check if a column exists in a table."""
     with get_db_connection() as conn:
@@ -98,6 +87,160 @@ def migrate_db():
             conn.commit()
             logger.info("🧱 Added archive_url column to bookmarks")
 
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                bookmark_id INTEGER PRIMARY KEY,
+                variants TEXT,
+                updated_at TEXT
+            )
+            """
+        )
+        conn.commit()
+
+        for column, column_type in (
+            ("placeholder", "TEXT"),
+            ("phash", "TEXT"),
+            ("entropy", "REAL"),
+            ("status", "TEXT"),  # ok | blank | duplicate
+            ("duplicate_of", "INTEGER"),
+            ("pixel_hash", "TEXT"),
+        ):
+            if not _column_exists("thumbnails", column):
+                conn.execute(f"ALTER TABLE thumbnails ADD COLUMN {column} {column_type}")
+                conn.commit()
+                logger.info(f"🧱 Added {column} column to thumbnails")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_thumbnails_phash ON thumbnails (phash)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_thumbnails_pixel_hash ON thumbnails (pixel_hash)"
+        )
+        conn.commit()
+
+        # Bookmarks waiting to be archived (see archiver.py); a NULL
+        # next_attempt_at means the archiver gave up after too many failures
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS archive_queue (
+                bookmark_id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL,
+                last_error TEXT,
+                created_at TEXT
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_archive_queue_next ON archive_queue (next_attempt_at)"
+        )
+        conn.commit()
+
+        # Local page snapshots (see snapshots.py): zstd-compressed,
+        # content-defined chunks shared between pages, and the ordered list
+        # of chunks that makes up each bookmark's html and text
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS snapshots (
+                bookmark_id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                final_url TEXT,
+                status_code INTEGER,
+                content_type TEXT,
+                title TEXT,
+                html_size INTEGER,
+                text_size INTEGER,
+                fetched_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS snapshot_chunks (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                dict_id INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS snapshot_parts (
+                bookmark_id INTEGER NOT NULL,
+                part TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                PRIMARY KEY (bookmark_id, part, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_snapshot_parts_chunk ON snapshot_parts (chunk_hash);
+            CREATE TABLE IF NOT EXISTS snapshot_dicts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data BLOB NOT NULL,
+                created_at TEXT
+            );
+            """
+        )
+
+        # Full-text index of snapshot text; rowid is the bookmark id. It is
+        # contentless: the text itself lives compressed in snapshot_chunks
+        fts_sql = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'snapshot_fts'"
+        ).fetchone()
+        if fts_sql and "content=''" not in fts_sql[0]:
+            conn.execute("DROP TABLE snapshot_fts")
+            logger.info("🧱 Dropped the old snapshot text index; it is rebuilt from snapshots")
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS snapshot_fts USING fts5(
+                title, body, content='', contentless_delete=1,
+                tokenize = 'porter unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        conn.commit()
+
+        # AI tag/description answers, keyed by a hash of everything in the prompt
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ai_cache (
+                key TEXT PRIMARY KEY,
+                tags TEXT NOT NULL,
+                description TEXT NOT NULL,
+                created_at TEXT,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_cache_last_used ON ai_cache(last_used)")
+        conn.commit()
+
+        # The latest link check for each bookmark (see cull.py). ok_streak
+        # and fail_streak count consecutive results; ok_streak, or
+        # stable_streak for an unchanged redirect or non-200 success, drives
+        # next_check_at.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cull_checks (
+                bookmark_id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER,
+                error TEXT,
+                location TEXT,
+                method TEXT,
+                latency_ms INTEGER,
+                checked_at REAL NOT NULL,
+                ok_streak INTEGER NOT NULL DEFAULT 0,
+                fail_streak INTEGER NOT NULL DEFAULT 0,
+                stable_streak INTEGER NOT NULL DEFAULT 0,
+                next_check_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cull_checks_next ON cull_checks (next_check_at)"
+        )
+        conn.commit()
+        if not _column_exists("cull_checks", "stable_streak"):
+            conn.execute(
+                "ALTER TABLE cull_checks ADD COLUMN stable_streak INTEGER NOT NULL DEFAULT 0"
+            )
+            conn.commit()
+            logger.info("🧱 Added stable_streak column to cull_checks")
+
 
 def load_db_on_startup():
     logger.info("🔖 Bookerics starting up…")
@@ -195,9 +338,40 @@ def fetch_data(query: str, params: tuple = ()) -> List[Bookmark]:
             )
         else:
             logger.error(f"💥 Unexpected row format: {row}")
+    _attach_thumbnails(bookmarks)
     return bookmarks
 
 
+# Bookmarks whose screenshot is being captured right now. Only their
+# placeholders wait on /events/thumbnails; a failed or never-started
+# capture must not keep a page's EventSource open.
+_pending_thumbnails: Set[int] = set()
+
+
+def _attach_thumbnails(bookmarks: List[Bookmark]) -> None:
+    """Add `thumbnail_variants`, `thumbnail_placeholder` and `thumbnail_pending`."""
+    by_id = {b["id"]: b for b in bookmarks}
+    for b in bookmarks:
+        b["thumbnail_variants"] = []
+        b["thumbnail_placeholder"] = None
+        b["thumbnail_pending"] = not b.get("thumbnail_url") and b["id"] in _pending_thumbnails
+    ids = list(by_id)
+    # Stay well under SQLite's bound-parameter limit on big listings
+    for start in range(0, len(ids), 500):
+        chunk = ids[start : start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows, _ = execute_query(
+            f"SELECT bookmark_id, variants, placeholder FROM thumbnails WHERE bookmark_id IN ({placeholders})",
+            tuple(chunk),
+        )
+        for bookmark_id, variants_json, placeholder in rows:
+            by_id[bookmark_id]["thumbnail_placeholder"] = placeholder
+            try:
+                by_id[bookmark_id]["thumbnail_variants"] = json.loads(variants_json or "[]")
+            except json.JSONDecodeError:
+                pass
+
+
 def fetch_bookmarks(kind: str, page: int = 1, per_page: int = 25) -> List[Bookmark]:
     bq = "SELECT id, title, url, thumbnail_url, description, tags, archive_url, created_at, updated_at FROM bookmarks "
     offset = (page - 1) * per_page
@@ -223,6 +397,26 @@ def fetch_bookmarks_all(kind: str) -> List[Bookmark]:
     return fetch_data(query)
 
 
+def fetch_bookmarks_missing_thumbnails() -> List[Bookmark]:
+    query = """
+    SELECT id, title, url, thumbnail_url, description, tags, archive_url, created_at, updated_at
+    FROM bookmarks
+    WHERE thumbnail_url IS NULL OR thumbnail_url = ''
+    ORDER BY created_at DESC;
+    """
+    return fetch_data(query)
+
+
+def fetch_bookmarks_missing_snapshots() -> List[Bookmark]:
+    query = """
+    SELECT id, title, url, thumbnail_url, description, tags, archive_url, created_at, updated_at
+    FROM bookmarks
+    WHERE id NOT IN (SELECT bookmark_id FROM snapshots)
+    ORDER BY created_at DESC;
+    """
+    return fetch_data(query)
+
+
 def get_bookmark_count(kind: str = "newest") -> int:
     """Get count of bookmarks efficiently using cache."""
     if kind == "newest":
@@ -252,52 +446,116 @@ def get_bookmark_count(kind: str = "newest") -> int:
             return result[0] if result else 0
 
 
-def search_bookmarks(query: str, page: int = 1, per_page: int = 25) -> List[Bookmark]:
-    print(
-        f"🔍 SEARCH_BOOKMARKS: Searching for query: '{query}', page: {page}, per_page: {per_page}"
-    )
-    search_query = f"%{query}%"
-    offset = (page - 1) * per_page
-    sql_query = """
-    SELECT id, title, url, thumbnail_url, description, tags, archive_url, created_at, updated_at
-    FROM bookmarks
-    WHERE title LIKE ?
-    OR url LIKE ?
-    OR description LIKE ?
-    OR tags LIKE ?
-    ORDER BY created_at DESC, updated_at DESC
-    LIMIT ? OFFSET ?;
+SEARCH_SCOPES = ("all", "meta", "title", "hybrid")
+
+# Reciprocal rank fusion constant: higher flattens the difference between ranks
+RRF_K = 60
+
+
+def _fts_query(query: str) -> str:
+    """Turn free text into a safe FTS5 query: every word, last one as a prefix."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+def search_bookmark_ids(query: str, scope: str = "all") -> List[int]:
+    """Ids of bookmarks matching `query`, best first.
+
+    Matches on what I typed (title, URL, description, tags) come first,
+    newest first, as they always have. With scope "all", bookmarks whose
+    saved page text matches follow, ranked by bm25. Scope "title" only
+    looks at titles and never touches the content index.
     """
-    print(
-        f"🔍 SEARCH_BOOKMARKS: Executing SQL with search_query: '{search_query}', limit: {per_page}, offset: {offset}"
-    )
-    results = fetch_data(
-        sql_query,
-        (search_query, search_query, search_query, search_query, per_page, offset),
+    if scope == "hybrid":
+        return hybrid_search_ids(query)
+
+    search_query = f"%{query}%"
+    if scope == "title":
+        rows, _ = execute_query(
+            "SELECT id FROM bookmarks WHERE title LIKE ? ORDER BY created_at DESC, updated_at DESC",
+            (search_query,),
+        )
+        return [row[0] for row in rows]
+
+    rows, _ = execute_query(
+        """
+        SELECT id FROM bookmarks
+        WHERE title LIKE ? OR url LIKE ? OR description LIKE ? OR tags LIKE ?
+        ORDER BY created_at DESC, updated_at DESC
+        """,
+        (search_query, search_query, search_query, search_query),
     )
-    print(f"🔍 SEARCH_BOOKMARKS: Found {len(results)} bookmarks")
-    return results
+    ids = [row[0] for row in rows]
+
+    fts_query = _fts_query(query)
+    if scope == "all" and fts_query:
+        seen = set(ids)
+        rows, _ = execute_query(
+            "SELECT rowid FROM snapshot_fts WHERE snapshot_fts MATCH ? ORDER BY bm25(snapshot_fts, 2.0, 1.0)",
+            (fts_query,),
+        )
+        ids.extend(row[0] for row in rows if row[0] not in seen)
+    return ids
 
 
-def search_bookmarks_all(query: str) -> List[Bookmark]:
-    """Search all bookmarks without pagination - for compatibility and getting total count"""
-    print(f"🔍 SEARCH_BOOKMARKS_ALL: Searching for query: '{query}' (no pagination)")
-    search_query = f"%{query}%"
-    sql_query = """
-    SELECT id, title, url, thumbnail_url, description, tags, archive_url, created_at, updated_at
-    FROM bookmarks
-    WHERE title LIKE ?
-    OR url LIKE ?
-    OR description LIKE ?
-    OR tags LIKE ?
-    ORDER BY created_at DESC, updated_at DESC;
+def hybrid_search_ids(query: str, vector_limit: int = 100) -> List[int]:
+    """Lexical and vector matches merged by reciprocal rank fusion.
+
+    Each list contributes 1 / (RRF_K + rank) per bookmark, so something
+    near the top of either list ranks well, and something found by both
+    ranks best. The vectors are hashed words and character trigrams of the
+    title, description and tags, so they add bookmarks that share a word
+    or a variant of one ("database" for "databases"), ranked by overlap.
+    They don't know synonyms.
     """
-    print(f"🔍 SEARCH_BOOKMARKS_ALL: Executing SQL with search_query: '{search_query}'")
-    results = fetch_data(
-        sql_query, (search_query, search_query, search_query, search_query)
+    lexical = search_bookmark_ids(query, "all")
+    nearest = [
+        bookmark_id
+        for bookmark_id, _ in vector_index.search(embed(query), k=vector_limit)
+    ]
+    scores: Dict[int, float] = {}
+    for ranked in (lexical, nearest):
+        for rank, bookmark_id in enumerate(ranked):
+            scores[bookmark_id] = scores.get(bookmark_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(scores, key=lambda bookmark_id: -scores[bookmark_id])
+
+
+def similar_bookmarks(bookmark_id: int, limit: int = 12) -> List[Bookmark]:
+    """Bookmarks whose title, description and tags are closest to this one's."""
+    vec = vector_index.vector(bookmark_id)
+    if vec is None:
+        return []
+    matches = vector_index.search(vec, k=limit, exclude=[bookmark_id])
+    return _fetch_bookmarks_in_order([bid for bid, _ in matches])
+
+
+def _fetch_bookmarks_in_order(ids: List[int]) -> List[Bookmark]:
+    if not ids:
+        return []
+    placeholders = ",".join("?" * len(ids))
+    bookmarks = fetch_data(
+        f"""
+        SELECT id, title, url, thumbnail_url, description, tags, archive_url, created_at, updated_at
+        FROM bookmarks WHERE id IN ({placeholders})
+        """,
+        tuple(ids),
     )
-    print(f"🔍 SEARCH_BOOKMARKS_ALL: Found {len(results)} bookmarks")
-    return results
+    by_id = {b["id"]: b for b in bookmarks}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def search_bookmarks(
+    query: str, page: int = 1, per_page: int = 25, scope: str = "all"
+) -> Tuple[List[Bookmark], int]:
+    """One page of search results and the total number of matches."""
+    ids = search_bookmark_ids(query, scope)
+    offset = (page - 1) * per_page
+    bookmarks = _fetch_bookmarks_in_order(ids[offset : offset + per_page])
+    logger.info(f"🔍 Search for '{query}' ({scope}): {len(ids)} matches, page {page}")
+    return bookmarks, len(ids)
 
 
 def fetch_unique_tags(kind: str = "frequency") -> List[Dict[str, Any]]:
@@ -338,8 +596,184 @@ def fetch_bookmarks_by_tag(tag: str) -> List[Bookmark]:
     return fetch_data(query, (tag,))
 
 
+def rewrite_tags(tags: List[str], mapping: Dict[str, Optional[str]]) -> List[str]:
+    """Apply a tag mapping (None deletes) to one bookmark's tags, dropping duplicates."""
+    result: List[str] = []
+    for tag in tags:
+        new_tag = mapping.get(tag, tag)
+        if new_tag and new_tag not in result:
+            result.append(new_tag)
+    return result
+
+
+def resolve_tag_mapping(mapping: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    """Follow chains like js → javascript → ecmascript to their last tag.
+
+    Raises ValueError if a chain loops back on itself.
+    """
+    resolved: Dict[str, Optional[str]] = {}
+    for tag in mapping:
+        chain = [tag]
+        new_tag = mapping[tag]
+        while new_tag is not None and new_tag in mapping and mapping[new_tag] != new_tag:
+            if new_tag in chain:
+                raise ValueError(f"Tag changes loop: {' → '.join(chain + [new_tag])}")
+            chain.append(new_tag)
+            new_tag = mapping[new_tag]
+        resolved[tag] = new_tag
+    return resolved
+
+
+def _plan_tag_changes(
+    mapping: Dict[str, Optional[str]],
+) -> List[Tuple[int, Optional[str], List[str]]]:
+    """Bookmarks touched by `mapping`: (id, current tags JSON, tags it would end up with)."""
+    sources = [tag for tag, new_tag in mapping.items() if tag != new_tag]
+    if not sources:
+        return []
+    placeholders = ",".join("?" * len(sources))
+    rows, _ = execute_query(
+        f"""
+        SELECT id, tags FROM bookmarks
+        WHERE EXISTS (
+            SELECT 1 FROM json_each(bookmarks.tags) WHERE json_each.value IN ({placeholders})
+        )
+        """,
+        tuple(sources),
+    )
+    changes = []
+    for bookmark_id, tags_json in rows:
+        try:
+            tags = json.loads(tags_json) if tags_json else []
+        except json.JSONDecodeError:
+            continue
+        new_tags = rewrite_tags(tags, mapping)
+        if new_tags != tags:
+            changes.append((bookmark_id, tags_json, new_tags))
+    return changes
+
+
+def preview_tag_changes(
+    mapping: Dict[str, Optional[str]],
+    changes: Optional[List[Tuple[int, Optional[str], List[str]]]] = None,
+) -> Dict[str, Any]:
+    """Counts of what `apply_tag_changes` would do, without changing anything."""
+    mapping = resolve_tag_mapping(mapping)
+    if changes is None:
+        changes = _plan_tag_changes(mapping)
+    frequencies = {t["tag"]: t["frequency"] for t in fetch_unique_tags(kind="frequency")}
+    operations = []
+    for tag, new_tag in mapping.items():
+        if tag == new_tag:
+            continue
+        operations.append(
+            {
+                "tag": tag,
+                "new_tag": new_tag,
+                "bookmarks": frequencies.get(tag, 0),
+                # Merging into an existing tag rather than renaming
+                "merge": bool(new_tag) and new_tag in frequencies,
+            }
+        )
+    return {
+        "operations": operations,
+        "bookmarks": len(changes),
+        "untagged_after": sum(1 for _, _, tags in changes if not tags),
+    }
+
+
+def _apply_tag_changes(
+    mapping: Dict[str, Optional[str]],
+    changes: List[Tuple[int, Optional[str], List[str]]],
+) -> List[Tuple[int, List[str]]]:
+    """Write planned tag changes in one transaction; returns what was written.
+
+    Each UPDATE only matches if the row still has the tags it was planned
+    from. A bookmark edited in the meantime is re-read and rewritten from
+    its current tags, so the edit isn't lost.
+    """
+    updated_at = datetime.now(timezone.utc).isoformat()
+    written: List[Tuple[int, List[str]]] = []
+    with get_db_connection() as conn:
+        for bookmark_id, tags_json, new_tags in changes:
+            while True:
+                cursor = conn.execute(
+                    "UPDATE bookmarks SET tags = ?, updated_at = ? WHERE id = ? AND tags IS ?",
+                    (json.dumps(new_tags) if new_tags else None, updated_at, bookmark_id, tags_json),
+                )
+                if cursor.rowcount:
+                    written.append((bookmark_id, new_tags))
+                    break
+                row = conn.execute(
+                    "SELECT tags FROM bookmarks WHERE id = ?", (bookmark_id,)
+                ).fetchone()
+                if row is None:
+                    break
+                tags_json = row[0]
+                try:
+                    tags = json.loads(tags_json) if tags_json else []
+                except json.JSONDecodeError:
+                    break
+                new_tags = rewrite_tags(tags, mapping)
+                if new_tags == tags:
+                    break
+        conn.commit()
+    return written
+
+
+async def apply_tag_changes(mapping: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """Rename, merge or delete tags across every bookmark at once.
+
+    `mapping` sends each old tag to its new name, or to None to delete it;
+    several old tags pointing at one new tag merge them, and chains are
+    followed to their end. All affected rows are rewritten in one
+    transaction and the feed is published once.
+    """
+    mapping = resolve_tag_mapping(mapping)
+    changes = _plan_tag_changes(mapping)
+    report = preview_tag_changes(mapping, changes)
+    if not changes:
+        return report
+    written = await asyncio.to_thread(_apply_tag_changes, mapping, changes)
+    report["bookmarks"] = len(written)
+    report["untagged_after"] = sum(1 for _, tags in written if not tags)
+    cache.invalidate()
+    _reindex_bookmarks(*[bookmark_id for bookmark_id, _ in written])
+    logger.info(f"🏷️ Bulk tag change rewrote {len(written):,} bookmarks: {mapping}")
+    await update_main_rss_feed()
+    return report
+
+
+def _delete_snapshot(bookmark_id: int) -> None:
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM snapshots WHERE bookmark_id = ?", (bookmark_id,))
+        conn.execute("DELETE FROM snapshot_parts WHERE bookmark_id = ?", (bookmark_id,))
+        conn.execute("DELETE FROM snapshot_fts WHERE rowid = ?", (bookmark_id,))
+        conn.execute(
+            """
+            DELETE FROM snapshot_chunks
+            WHERE NOT EXISTS (SELECT 1 FROM snapshot_parts p WHERE p.chunk_hash = snapshot_chunks.hash)
+            """
+        )
+        conn.commit()
+
+
 async def delete_bookmark_by_id(bookmark_id: int) -> None:
     await execute_query_async("DELETE FROM bookmarks WHERE id = ?", (bookmark_id,))
+    await execute_query_async(
+        "DELETE FROM thumbnails WHERE bookmark_id = ?", (bookmark_id,)
+    )
+    await execute_query_async(
+        "DELETE FROM archive_queue WHERE bookmark_id = ?", (bookmark_id,)
+    )
+    await execute_query_async(
+        "DELETE FROM cull_checks WHERE bookmark_id = ?", (bookmark_id,)
+    )
+    await asyncio.to_thread(_delete_snapshot, bookmark_id)
+    tag_suggester.forget(int(bookmark_id))
+    vector_index.remove(int(bookmark_id))
+    vector_index.save()
+    related_index.remove(int(bookmark_id))
     cache.invalidate()
 
     async def _post_delete():
@@ -381,26 +815,34 @@ def backup_bookerics_db():
                 logger.info(f"🗑️ Pruned old backup: {old_backup}")
 
 
-async def schedule_upload_to_hosting():
+async def schedule_upload_to_hosting(dry_run: bool = False) -> Dict[str, Any]:
+    """Sync the feeds directory to hosting, uploading only files that changed."""
     logger.info("🚀 Scheduling hosting upload...")
+    report: Dict[str, Any] = {}
     try:
+        files = []
         if FEEDS_DIR and os.path.exists(FEEDS_DIR):
-            for feed_file in os.listdir(FEEDS_DIR):
-                if feed_file.endswith(".xml") or feed_file.endswith(".xsl"):
+            for feed_file in sorted(os.listdir(FEEDS_DIR)):
+                if feed_file.endswith((".xml", ".xsl", ".json")):
                     local_path = os.path.join(FEEDS_DIR, feed_file)
-                    remote_path = f"{BOOKERICS_FEEDS_PATH}/{feed_file}"
-                    await upload_file_via_sftp(local_path, remote_path)
+                    files.append((local_path, f"{PUBLISH_FEEDS_DIR}/{feed_file}"))
+            index_path = os.path.join(FEEDS_DIR, "index.html")
+            if os.path.exists(index_path):
+                files.append((index_path, "index.html"))
+        report = await sync_files(files, dry_run=dry_run)
         logger.info("✅ Hosting upload complete.")
     except Exception as e:
         logger.error(f"💥 Hosting upload failed: {e}")
+    return report
 
 
 async def schedule_thumbnail_fetch_and_save(
     bookmark: Bookmark, schedule_hosting_upload: bool = True
 ):
-    await get_bookmark_thumbnail_image(bookmark)
-    if schedule_hosting_upload:
-        await schedule_upload_to_hosting()
+    img_url = await get_bookmark_thumbnail_image(bookmark)
+    if img_url and schedule_hosting_upload:
+        # The feed carries the thumbnail as an enclosure
+        await update_main_rss_feed()
 
 
 def verify_table_structure(table_name: str = "bookmarks") -> List[Dict[str, Any]]:
@@ -424,32 +866,8 @@ async def get_file_size(url: str) -> int:
         return -1
 
 
-async def update_main_rss_feed() -> None:
-    """Update the main RSS feed with all bookmarks"""
-    all_bookmarks = fetch_bookmarks_all(kind="newest")
-    await create_feed(tag=None, bookmarks=all_bookmarks, publish=True)
-
-
-async def create_feed(
-    tag: Optional[str], bookmarks: List[Bookmark], publish: bool = False
-) -> None:
-    logger.info("🗂️ Creating main RSS feed")
-    if FEEDS_DIR and not os.path.exists(FEEDS_DIR):
-        os.makedirs(FEEDS_DIR)
-    feed_content = create_rss_feed(bookmarks, tag)
-    feed_filename = f"rss-{tag}.xml" if tag else "rss.xml"
-    if FEEDS_DIR:
-        feed_path = os.path.join(FEEDS_DIR, feed_filename)
-        async with aiofiles.open(feed_path, "w") as f:
-            await f.write(feed_content)
-        logger.info(f"✅ Main RSS feed created at {feed_path}")
-
-        if publish:
-            remote_path = f"{BOOKERICS_FEEDS_PATH}/{feed_filename}"
-            await upload_file_via_sftp(feed_path, remote_path)
-
-            # Create index.html that displays RSS feed with XSL transformation
-            index_html = """<!DOCTYPE html>
+# Displays the RSS feed with its XSL transformation on the hosted site
+FEEDS_INDEX_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -477,15 +895,55 @@ async def create_feed(
 </body>
 </html>"""
 
-            index_path = os.path.join(FEEDS_DIR, "index.html")
-            async with aiofiles.open(index_path, "w") as f:
-                await f.write(index_html)
 
-            remote_index_path = (
-                "/media/sdc1/eddielomax/www/bookerics.com/public_html/index.html"
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+async def update_main_rss_feed() -> None:
+    """Update the main RSS feed with all bookmarks"""
+    all_bookmarks = fetch_bookmarks_all(kind="newest")
+    await create_feed(tag=None, bookmarks=all_bookmarks, publish=True)
+
+
+async def create_feed(
+    tag: Optional[str], bookmarks: List[Bookmark], publish: bool = False
+) -> None:
+    logger.info("🗂️ Creating main feeds")
+    if FEEDS_DIR and not os.path.exists(FEEDS_DIR):
+        os.makedirs(FEEDS_DIR)
+    # One pass over the bookmarks; every format renders from the same items
+    items = build_feed_items(bookmarks, tag)
+    if FEEDS_DIR:
+        feed_paths = []
+        for kind in FEED_FORMATS:
+            feed_content = FEED_RENDERERS[kind](bookmarks, tag, items=items)
+            feed_filename = feed_filename_for(kind, tag)
+            feed_path = os.path.join(FEEDS_DIR, feed_filename)
+            # Also writes .gz/.br siblings and the content hash used as ETag
+            await asyncio.to_thread(
+                write_precompressed, feed_path, feed_content.encode("utf-8")
             )
-            await upload_file_via_sftp(index_path, remote_index_path)
-            logger.info(f"✅ Index page uploaded to {remote_index_path}")
+            feed_paths.append((feed_path, feed_filename))
+        logger.info(f"✅ Main feeds ({', '.join(FEED_FORMATS)}) created in {FEEDS_DIR}")
+
+        if publish:
+            files = [
+                (feed_path, f"{PUBLISH_FEEDS_DIR}/{feed_filename}")
+                for feed_path, feed_filename in feed_paths
+            ]
+            # The index page never changes, so only (re)write it when missing
+            # or different; the manifest then keeps it from being re-uploaded
+            index_path = os.path.join(FEEDS_DIR, "index.html")
+            if await asyncio.to_thread(_read_text, index_path) != FEEDS_INDEX_HTML:
+                async with aiofiles.open(index_path, "w") as f:
+                    await f.write(FEEDS_INDEX_HTML)
+            files.append((index_path, "index.html"))
+            await sync_files(files)
     return
 
 
@@ -506,17 +964,6 @@ async def fetch_bookmark_by_url(url: str) -> Optional[Bookmark]:
     return results[0] if results else None
 
 
-async def wait_for_thumbnail(
-    bookmark_id: int, max_retries: int = 5
-) -> Optional[Bookmark]:
-    for i in range(max_retries):
-        bookmark = await fetch_bookmark_by_id(str(bookmark_id))
-        if bookmark and bookmark.get("thumbnail_url"):
-            return bookmark
-        await asyncio.sleep(1)  # Wait 1 second between attempts
-    return None
-
-
 async def create_bookmark(
     title: str,
     url: str,
@@ -542,9 +989,16 @@ async def create_bookmark(
 
             new_bookmark = await fetch_bookmark_by_id(str(bookmark_id))
             if new_bookmark:
-                await schedule_thumbnail_fetch_and_save(new_bookmark)
-                # Archive the URL in the background (non-blocking)
-                asyncio.create_task(archive_and_update(bookmark_id, url))
+                _index_bookmark(new_bookmark)
+                vector_index.save()
+                # Capture in the background; open pages get the image pushed
+                # to them over /events/thumbnails as soon as it is ready
+                _pending_thumbnails.add(int(bookmark_id))
+                asyncio.create_task(schedule_thumbnail_fetch_and_save(new_bookmark))
+                # The archiver submits it to archive.ph at a rate it tolerates
+                await enqueue_archive(bookmark_id, url)
+                # ...and the snapshot service keeps a local copy
+                event_bus.publish(BOOKMARK_CREATED, {"bookmark_id": bookmark_id, "url": url})
 
             # Update the main RSS feed with all bookmarks
             await update_main_rss_feed()
@@ -569,6 +1023,154 @@ async def update_bookmark_thumbnail_url(bookmark_id: int, img_url: str):
     logger.info(f"🖼️ Thumbnail URL updated for bookmark {bookmark_id}")
 
 
+async def update_bookmark_thumbnail_variants(
+    bookmark_id: int,
+    variants: List[Dict[str, Any]],
+    placeholder: Optional[str] = None,
+    analysis: Optional[Dict[str, Any]] = None,
+    status: str = "ok",
+    duplicate_of: Optional[int] = None,
+) -> None:
+    query = """
+    INSERT INTO thumbnails
+        (bookmark_id, variants, placeholder, phash, pixel_hash, entropy, status, duplicate_of,
+         updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(bookmark_id) DO UPDATE SET
+        variants = excluded.variants,
+        placeholder = excluded.placeholder,
+        phash = excluded.phash,
+        pixel_hash = excluded.pixel_hash,
+        entropy = excluded.entropy,
+        status = excluded.status,
+        duplicate_of = excluded.duplicate_of,
+        updated_at = excluded.updated_at
+    """
+    analysis = analysis or {}
+    updated_at = datetime.now(timezone.utc).isoformat()
+    await execute_query_async(
+        query,
+        (
+            bookmark_id,
+            json.dumps(variants),
+            placeholder,
+            analysis.get("phash"),
+            analysis.get("pixel_hash"),
+            analysis.get("entropy"),
+            status,
+            duplicate_of,
+            updated_at,
+        ),
+    )
+
+
+def find_thumbnail_by_pixels(pixel_hash: str, exclude_id: int) -> Optional[Dict[str, Any]]:
+    """A stored thumbnail of another bookmark with exactly the same pixels, if any."""
+    query = """
+    SELECT t.bookmark_id, t.variants, t.placeholder, b.thumbnail_url
+    FROM thumbnails t JOIN bookmarks b ON b.id = t.bookmark_id
+    WHERE t.pixel_hash = ? AND t.bookmark_id != ? AND t.status != 'blank'
+        AND b.thumbnail_url IS NOT NULL AND b.thumbnail_url != ''
+    ORDER BY t.bookmark_id
+    LIMIT 1
+    """
+    rows, _ = execute_query(query, (pixel_hash, exclude_id))
+    if not rows:
+        return None
+    bookmark_id, variants_json, placeholder, thumbnail_url = rows[0]
+    return {
+        "bookmark_id": bookmark_id,
+        "variants": json.loads(variants_json or "[]"),
+        "placeholder": placeholder,
+        "thumbnail_url": thumbnail_url,
+    }
+
+
+def fetch_suspect_thumbnails() -> Dict[str, List[Dict[str, Any]]]:
+    """Bookmarks whose capture looks wrong, for the /thumbnails/suspect report.
+
+    - `blank`: captures rejected as blank; still waiting for a good one
+    - `duplicates`: groups of bookmarks sharing one perceptual hash
+    - `low_entropy`: kept, but with very little on screen
+    """
+    columns = "b.id, b.title, b.url, b.thumbnail_url, t.phash, t.entropy, t.status"
+
+    def rows_to_dicts(rows):
+        keys = ["id", "title", "url", "thumbnail_url", "phash", "entropy", "status"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    blank_rows, _ = execute_query(
+        f"""
+        SELECT {columns} FROM thumbnails t JOIN bookmarks b ON b.id = t.bookmark_id
+        WHERE t.status = 'blank' ORDER BY t.updated_at DESC
+        """
+    )
+    duplicate_rows, _ = execute_query(
+        f"""
+        SELECT {columns} FROM thumbnails t JOIN bookmarks b ON b.id = t.bookmark_id
+        WHERE t.status != 'blank' AND t.phash IN (
+            SELECT phash FROM thumbnails
+            WHERE phash IS NOT NULL AND status != 'blank'
+            GROUP BY phash HAVING COUNT(*) > 1
+        )
+        ORDER BY t.phash, b.id
+        """
+    )
+    low_rows, _ = execute_query(
+        f"""
+        SELECT {columns} FROM thumbnails t JOIN bookmarks b ON b.id = t.bookmark_id
+        WHERE t.status = 'ok' AND t.entropy < ? ORDER BY t.entropy
+        """,
+        (LOW_ENTROPY_THRESHOLD,),
+    )
+
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for item in rows_to_dicts(duplicate_rows):
+        groups.setdefault(item["phash"], []).append(item)
+    return {
+        "blank": rows_to_dicts(blank_rows),
+        "duplicates": [
+            {"phash": phash, "bookmarks": items}
+            for phash, items in sorted(groups.items(), key=lambda g: -len(g[1]))
+        ],
+        "low_entropy": rows_to_dicts(low_rows),
+    }
+
+
+def build_local_indexes() -> None:
+    """Train the tag suggester, sync the vector index and precompute related
+    bookmarks; run once at startup."""
+    bookmarks = fetch_bookmarks_all(kind="newest")
+    tag_suggester.rebuild(bookmarks)
+    vector_index.sync(bookmarks)
+    related_index.rebuild(bookmarks)
+
+
+def _index_bookmark(bookmark: Bookmark) -> None:
+    tag_suggester.learn(bookmark)
+    vector_index.upsert(bookmark)
+    related_index.update(bookmark)
+
+
+def _reindex_bookmarks(*bookmark_ids: Any) -> None:
+    """Keep the local indexes in step with edited bookmarks."""
+    if not bookmark_ids:
+        return
+    # Bulk tag changes can touch more ids than SQLite allows parameters
+    for start in range(0, len(bookmark_ids), 500):
+        chunk = bookmark_ids[start : start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for bookmark in fetch_data(
+            f"""
+            SELECT id, title, url, thumbnail_url, description, tags, archive_url, created_at, updated_at
+            FROM bookmarks WHERE id IN ({placeholders})
+            """,
+            tuple(chunk),
+        ):
+            _index_bookmark(bookmark)
+    vector_index.save()
+
+
 async def update_bookmark_description(id: str, description: str):
     query = """
     UPDATE bookmarks
@@ -578,6 +1180,7 @@ async def update_bookmark_description(id: str, description: str):
     updated_at = datetime.now(timezone.utc).isoformat()
     await execute_query_async(query, (description, updated_at, id))
     logger.info(f"📝 Description updated for bookmark {id}")
+    _reindex_bookmarks(id)
 
     # Update the main RSS feed
     await update_main_rss_feed()
@@ -592,6 +1195,7 @@ async def update_bookmark_title(id: str, title: str):
     updated_at = datetime.now(timezone.utc).isoformat()
     await execute_query_async(query, (title, updated_at, id))
     logger.info(f"✏️ Title updated for bookmark {id}")
+    _reindex_bookmarks(id)
 
     # Update the main RSS feed
     await update_main_rss_feed()
@@ -607,61 +1211,45 @@ async def update_bookmark_tags(id: str, tags: List[str]):
     await execute_query_async(query, (tags_json, updated_at, id))
     cache.invalidate()
     logger.info(f"🏷️ Tags updated for bookmark {id}")
+    _reindex_bookmarks(id)
 
     # Update the main RSS feed
     await update_main_rss_feed()
 
 
-async def archive_url_for(target_url: str) -> Optional[str]:
-    """Submit a URL to archive.ph and return the archive URL."""
-    if not target_url or not target_url.startswith(("http://", "https://")):
-        return None
+def _apply_ai_results(results: Dict[int, Tuple[List[str], str]]) -> int:
+    updated_at = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for bookmark_id, (tags, description) in results.items():
+        tags = [tag for tag in tags if tag.strip()]
+        rows.append((json.dumps(tags) if tags else None, description or None, updated_at, bookmark_id))
+    with get_db_connection() as conn:
+        # Keep whatever is already there when the model returned nothing for a field
+        conn.executemany(
+            """
+            UPDATE bookmarks
+            SET tags = COALESCE(?, tags), description = COALESCE(?, description), updated_at = ?
+            WHERE id = ?
+            """,
+            rows,
+        )
+        conn.commit()
+    return len(rows)
 
-    timeout = aiohttp.ClientTimeout(total=30)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    }
 
-    try:
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            # First, check if the URL is already archived
-            logger.info(f"🗄️ Checking if {target_url} is already archived...")
-            async with session.get(
-                f"https://archive.ph/newest/{target_url}", allow_redirects=True
-            ) as check_resp:
-                check_url = str(check_resp.url)
-                # If we're redirected away from /newest/, it means it's already archived
-                if "archive.ph/" in check_url and "/newest/" not in check_url:
-                    logger.info(f"🗄️ Already archived: {check_url}")
-                    return check_url
-
-            # If not archived, submit it
-            logger.info(f"🗄️ Submitting {target_url} to archive.ph...")
-            async with session.post(
-                "https://archive.ph/submit/",
-                data={"url": target_url, "anyway": "1"},
-                allow_redirects=True,
-            ) as resp:
-                final_url = str(resp.url)
-
-                # Check for rate limiting
-                if resp.status == 429:
-                    logger.warning(f"🗄️ Rate limited by archive.ph for {target_url}")
-                    return None
-
-                # Validate that we got a proper archive URL, not the submit page
-                if "archive.ph/submit" in final_url:
-                    logger.warning(
-                        f"🗄️ archive.ph returned submit page (status {resp.status}) for {target_url}"
-                    )
-                    return None
-
-                logger.info(f"🗄️ Archived {target_url} -> {final_url}")
-                return final_url
-    except Exception as e:
-        logger.warning(f"🗄️ archive.ph submission failed for {target_url}: {e}")
-        return None
+async def apply_ai_results(results: Dict[int, Tuple[List[str], str]]) -> int:
+    """Write AI tags and descriptions for many bookmarks in one transaction.
+
+    Publishes the feed once afterwards instead of once per field per bookmark.
+    """
+    if not results:
+        return 0
+    count = await asyncio.to_thread(_apply_ai_results, results)
+    _reindex_bookmarks(*results)
+    cache.invalidate()
+    logger.info(f"🏷️ AI tags and descriptions stored for {count} bookmarks")
+    await update_main_rss_feed()
+    return count
 
 
 async def update_bookmark_archive_url(bookmark_id: int, archive_url: str) -> None:
@@ -672,20 +1260,307 @@ async def update_bookmark_archive_url(bookmark_id: int, archive_url: str) -> Non
     logger.info(f"🗄️ Archive URL stored for bookmark {bookmark_id}")
 
 
-async def archive_and_update(bookmark_id: int, url: str) -> None:
-    """Archive a URL and update the bookmark with the archive URL."""
-    # Add a small delay to avoid rate limiting
-    await asyncio.sleep(2)
+async def enqueue_archive(bookmark_id: int, url: str) -> None:
+    """Queue a bookmark for archive.ph; the archiver picks it up when due."""
+    query = """
+    INSERT INTO archive_queue (bookmark_id, url, attempts, next_attempt_at, last_error, created_at)
+    VALUES (?, ?, 0, ?, NULL, ?)
+    ON CONFLICT(bookmark_id) DO UPDATE SET
+        url = excluded.url, attempts = 0, next_attempt_at = excluded.next_attempt_at, last_error = NULL
+    """
+    created_at = datetime.now(timezone.utc).isoformat()
+    await execute_query_async(query, (bookmark_id, url, time.time(), created_at))
+    event_bus.publish(ARCHIVE_QUEUED, {"bookmark_id": int(bookmark_id)})
+
 
-    archive_url = await archive_url_for(url)
-    if archive_url:
-        await update_bookmark_archive_url(bookmark_id, archive_url)
-        # Trigger hosting sync after updating
-        await schedule_upload_to_hosting()
-    else:
-        logger.info(
-            f"🗄️ Skipping archive for bookmark {bookmark_id} due to rate limit or error"
+def enqueue_missing_archives() -> int:
+    """Queue every bookmark without an archive URL that isn't queued yet."""
+    query = """
+    INSERT OR IGNORE INTO archive_queue (bookmark_id, url, attempts, next_attempt_at, created_at)
+    SELECT id, url, 0, ?, ? FROM bookmarks
+    WHERE archive_url IS NULL AND url LIKE 'http%'
+    ORDER BY created_at DESC
+    """
+    with get_db_connection() as conn:
+        cursor = conn.execute(query, (time.time(), datetime.now(timezone.utc).isoformat()))
+        conn.commit()
+        queued = cursor.rowcount
+    if queued:
+        event_bus.publish(ARCHIVE_QUEUED, {"bookmark_id": None})
+    logger.info(f"🗄️ Queued {queued:,} bookmarks for archiving")
+    return queued
+
+
+def next_archive_job() -> Optional[Dict[str, Any]]:
+    """The queued archive job due soonest (it may not be due yet)."""
+    rows, _ = execute_query(
+        """
+        SELECT bookmark_id, url, attempts, next_attempt_at FROM archive_queue
+        WHERE next_attempt_at IS NOT NULL
+        ORDER BY next_attempt_at
+        LIMIT 1
+        """
+    )
+    if not rows:
+        return None
+    bookmark_id, url, attempts, next_attempt_at = rows[0]
+    return {
+        "bookmark_id": bookmark_id,
+        "url": url,
+        "attempts": attempts,
+        "next_attempt_at": next_attempt_at,
+    }
+
+
+async def reschedule_archive(
+    bookmark_id: int, next_attempt_at: Optional[float], attempts: int, error: str
+) -> None:
+    """Push a job back; `next_attempt_at=None` gives up on it for good."""
+    await execute_query_async(
+        "UPDATE archive_queue SET next_attempt_at = ?, attempts = ?, last_error = ? WHERE bookmark_id = ?",
+        (next_attempt_at, attempts, error, bookmark_id),
+    )
+
+
+async def complete_archive(bookmark_id: int, archive_url: str) -> None:
+    await update_bookmark_archive_url(bookmark_id, archive_url)
+    await execute_query_async(
+        "DELETE FROM archive_queue WHERE bookmark_id = ?", (bookmark_id,)
+    )
+
+
+def archive_queue_stats() -> Dict[str, Any]:
+    rows, _ = execute_query(
+        """
+        SELECT
+            SUM(next_attempt_at IS NOT NULL),
+            SUM(next_attempt_at IS NOT NULL AND next_attempt_at <= ?),
+            SUM(next_attempt_at IS NULL),
+            MIN(next_attempt_at)
+        FROM archive_queue
+        """,
+        (time.time(),),
+    )
+    pending, due, given_up, next_at = rows[0]
+    return {
+        "pending": pending or 0,
+        "due": due or 0,
+        "given_up": given_up or 0,
+        "next_attempt_in": max(0.0, next_at - time.time()) if next_at else None,
+    }
+
+
+def fetch_bookmarks_due_for_check() -> List[Bookmark]:
+    """Bookmarks never checked, failing, past their recheck time or whose URL changed."""
+    query = """
+    SELECT b.id, b.title, b.url, b.thumbnail_url, b.description, b.tags, b.archive_url,
+           b.created_at, b.updated_at
+    FROM bookmarks b
+    LEFT JOIN cull_checks c ON c.bookmark_id = b.id
+    WHERE c.bookmark_id IS NULL OR c.next_check_at <= ? OR c.url != b.url
+    ORDER BY b.created_at DESC;
+    """
+    return fetch_data(query, (time.time(),))
+
+
+def cull_recheck_delay(ok_streak: int) -> float:
+    """Seconds until a link with `ok_streak` healthy checks in a row is due again."""
+    if ok_streak <= 0:
+        return 0.0
+    delay = CULL_RECHECK_HOURS * 3600 * 2 ** min(ok_streak - 1, 32)
+    return min(delay, CULL_RECHECK_MAX_DAYS * 86400)
+
+
+def record_cull_checks(results: List[Dict[str, Any]]) -> None:
+    """Store link check results, advancing each bookmark's streaks and recheck time.
+
+    Healthy links (a plain 200) wait exponentially longer between checks.
+    So do redirects and other 2xx answers once the same answer has come
+    back twice in a row (same status and redirect target); they stay
+    listed, but a permanent redirect isn't rechecked on every run.
+    Anything else is due again on the next run.
+    """
+    if not results:
+        return
+    ids = [r["id"] for r in results]
+    placeholders = ",".join("?" * len(ids))
+    with get_db_connection() as conn:
+        previous = {
+            row[0]: tuple(row[1:])
+            for row in conn.execute(
+                f"""
+                SELECT bookmark_id, ok_streak, fail_streak, stable_streak, url, status_code, location
+                FROM cull_checks WHERE bookmark_id IN ({placeholders})
+                """,
+                tuple(ids),
+            ).fetchall()
+        }
+        rows = []
+        for r in results:
+            checked_at = r.get("checked_at") or time.time()
+            ok_streak, fail_streak, stable_streak, last_url, last_status, last_location = (
+                previous.get(r["id"], (0, 0, 0, None, None, None))
+            )
+            status_code = r.get("status_code")
+            if status_code == 200 and not r.get("error"):
+                ok_streak, fail_streak, stable_streak = ok_streak + 1, 0, 0
+                delay = cull_recheck_delay(ok_streak)
+            elif status_code and 200 <= status_code < 400 and not r.get("error"):
+                same = (last_url, last_status, last_location) == (
+                    r["url"],
+                    status_code,
+                    r.get("location"),
+                )
+                stable_streak = stable_streak + 1 if same else 1
+                ok_streak, fail_streak = 0, 0
+                delay = cull_recheck_delay(stable_streak - 1)
+            else:
+                ok_streak, fail_streak, stable_streak = 0, fail_streak + 1, 0
+                delay = 0.0
+            rows.append(
+                (
+                    r["id"],
+                    r["url"],
+                    r.get("status_code"),
+                    r.get("error"),
+                    r.get("location"),
+                    r.get("method"),
+                    r.get("latency_ms"),
+                    checked_at,
+                    ok_streak,
+                    fail_streak,
+                    stable_streak,
+                    checked_at + delay,
+                )
+            )
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO cull_checks (
+                bookmark_id, url, status_code, error, location, method, latency_ms,
+                checked_at, ok_streak, fail_streak, stable_streak, next_check_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        conn.commit()
+
+
+def fetch_cull_history() -> Dict[str, Any]:
+    """The latest check of every bookmark: the unhealthy ones in full, the rest as counts.
+
+    Checks made before a bookmark's URL was edited are ignored.
+    """
+    rows, _ = execute_query(
+        """
+        SELECT b.id, b.title, b.url, c.status_code, c.error, c.location, c.method,
+               c.latency_ms, c.checked_at, c.fail_streak
+        FROM cull_checks c
+        JOIN bookmarks b ON b.id = c.bookmark_id AND b.url = c.url
+        WHERE c.error IS NOT NULL OR c.status_code IS NULL OR c.status_code != 200
+        ORDER BY c.fail_streak DESC, c.checked_at DESC
+        """
+    )
+    results = [
+        {
+            "id": row[0],
+            "title": row[1],
+            "url": row[2],
+            "status_code": row[3],
+            "error": row[4],
+            "location": row[5],
+            "method": row[6],
+            "latency_ms": row[7],
+            "checked_at": row[8],
+            "fail_streak": row[9],
+        }
+        for row in rows
+    ]
+    counts, _ = execute_query(
+        """
+        SELECT
+            COUNT(c.bookmark_id),
+            SUM(c.status_code = 200 AND c.error IS NULL),
+            MAX(c.checked_at),
+            (SELECT COUNT(*) FROM bookmarks b2
+             LEFT JOIN cull_checks c2 ON c2.bookmark_id = b2.id
+             WHERE c2.bookmark_id IS NULL OR c2.next_check_at <= ? OR c2.url != b2.url)
+        FROM cull_checks c
+        JOIN bookmarks b ON b.id = c.bookmark_id AND b.url = c.url
+        """,
+        (time.time(),),
+    )
+    known, ok, last_checked_at, due = counts[0]
+    return {
+        "results": results,
+        "known": known or 0,
+        "ok": ok or 0,
+        "last_checked_at": last_checked_at,
+        "due": due or 0,
+    }
+
+
+def get_ai_cache(keys: List[str]) -> Dict[str, Tuple[List[str], str]]:
+    """Cached AI answers for `keys`; hits are marked as recently used."""
+    if not keys:
+        return {}
+    placeholders = ",".join("?" * len(keys))
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            f"SELECT key, tags, description FROM ai_cache WHERE key IN ({placeholders})",
+            tuple(keys),
+        ).fetchall()
+        if rows:
+            conn.executemany(
+                "UPDATE ai_cache SET last_used = ? WHERE key = ?",
+                [(time.time(), row[0]) for row in rows],
+            )
+            conn.commit()
+    return {row[0]: (json.loads(row[1]), row[2]) for row in rows}
+
+
+def put_ai_cache(entries: Dict[str, Tuple[List[str], str]], max_entries: int) -> None:
+    """Store AI answers, evicting the least recently used beyond `max_entries`."""
+    if not entries:
+        return
+    now = time.time()
+    created_at = datetime.now(timezone.utc).isoformat()
+    with get_db_connection() as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO ai_cache (key, tags, description, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (key, json.dumps(tags), description, created_at, now)
+                for key, (tags, description) in entries.items()
+            ],
         )
+        conn.execute(
+            """
+            DELETE FROM ai_cache WHERE key IN (
+                SELECT key FROM ai_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (max_entries,),
+        )
+        conn.commit()
+
+
+def _announce_thumbnail(
+    bookmark_id: int,
+    thumbnail_url: str,
+    variants: List[Dict[str, Any]],
+    placeholder: Optional[str],
+) -> None:
+    event_bus.publish(
+        THUMBNAIL_READY,
+        {
+            "bookmark_id": int(bookmark_id),
+            "thumbnail_url": thumbnail_url,
+            "variants": variants,
+            "placeholder": placeholder,
+        },
+    )
 
 
 async def get_bookmark_thumbnail_image(bookmark: dict) -> str:
@@ -703,108 +1578,127 @@ async def get_bookmark_thumbnail_image(bookmark: dict) -> str:
     else:
         logger.info(f"🐕 Generating thumbnail for bookmark id {bookmark['id']}... ")
 
-        thumbnail_filename = f"{bookmark['id']}.jpg"
-        local_path = f"/tmp/{thumbnail_filename}"
-        remote_path = f"{BOOKERICS_THUMBNAILS_PATH}/{thumbnail_filename}"
+        stem = str(bookmark["id"])
+        work_dir = os.path.join(THUMBNAIL_WORK_DIR, stem)
+        _pending_thumbnails.add(int(bookmark["id"]))
+        img_url = ""
 
         try:
-            # Attempt to run shot-scraper
-            process = await asyncio.create_subprocess_exec(
-                "shot-scraper",
-                bookmark["url"],
-                "-o",
-                local_path,
-                "--width",
-                "1280",
-                "--height",
-                "720",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+            # Capture with the warm browser pool instead of a process per bookmark
+            image_bytes = await screenshot_service.capture(bookmark["url"])
+
+            # Reject blank captures before spending any encoding or upload on them
+            analysis = await asyncio.to_thread(analyze_screenshot, image_bytes)
+            if analysis["blank"]:
+                await update_bookmark_thumbnail_variants(
+                    bookmark["id"], [], analysis=analysis, status="blank"
+                )
+                raise RuntimeError(
+                    f"capture of {bookmark['url']} is blank (entropy {analysis['entropy']})"
+                )
+
+            # A pixel-identical capture reuses the files we already have. Ones
+            # that merely look alike (same perceptual hash) are stored as
+            # usual and show up as possible duplicates in /thumbnails/suspect.
+            existing = find_thumbnail_by_pixels(analysis["pixel_hash"], bookmark["id"])
+            if existing:
+                await update_bookmark_thumbnail_variants(
+                    bookmark["id"],
+                    existing["variants"],
+                    existing["placeholder"],
+                    analysis=analysis,
+                    status="duplicate",
+                    duplicate_of=existing["bookmark_id"],
+                )
+                await update_bookmark_thumbnail_url(bookmark["id"], existing["thumbnail_url"])
+                _announce_thumbnail(
+                    bookmark["id"],
+                    existing["thumbnail_url"],
+                    existing["variants"],
+                    existing["placeholder"],
+                )
+                logger.info(
+                    f"👯 Thumbnail for bookmark id # {bookmark['id']} matches "
+                    f"# {existing['bookmark_id']}; reusing its files"
+                )
+                img_url = existing["thumbnail_url"]
+                return img_url
+
+            # JPEG fallback (for feeds and old browsers) plus sized AVIF/WebP variants
+            fallback_path, variants, placeholder = await asyncio.to_thread(
+                process_screenshot, image_bytes, work_dir, stem
             )
-            stdout, stderr = await process.communicate()
-
-            if process.returncode != 0:
-                error_output = stderr.decode()
-                if (
-                    "Executable doesn't exist" in error_output
-                    and "Please run the following command to download new browsers"
-                    in error_output
-                ):
-                    logger.info("Installing Playwright browsers...")
-                    install_process = await asyncio.create_subprocess_exec(
-                        "playwright", "install"
-                    )
-                    await install_process.communicate()
-
-                    # Retry shot-scraper after installation
-                    process = await asyncio.create_subprocess_exec(
-                        "shot-scraper",
-                        bookmark["url"],
-                        "-o",
-                        local_path,
-                        "--width",
-                        "1280",
-                        "--height",
-                        "720",
-                    )
-                    await process.communicate()
-                else:
-                    if process.returncode is not None:
-                        raise subprocess.CalledProcessError(
-                            process.returncode, "shot-scraper", stderr=error_output
-                        )
-                    else:
-                        raise Exception(f"shot-scraper failed: {error_output}")
+            # Keep every image locally under its content hash; a re-capture
+            # gets new names, so nothing cached anywhere is ever stale
+            fallback_key = await asyncio.to_thread(thumbnail_store.put, fallback_path)
+            for v in variants:
+                v["key"] = await asyncio.to_thread(thumbnail_store.put, v["path"])
+            files = [
+                (thumbnail_store.path_for(key), f"{PUBLISH_THUMBNAILS_DIR}/{key}")
+                for key in [fallback_key] + [v["key"] for v in variants]
+            ]
 
-            # Upload to hosting via SFTP
-            await upload_file_via_sftp(local_path, remote_path)
+            # Publish to hosting through the same batched path as the feeds
+            report = await sync_files(files)
+            if report["failed"]:
+                raise Exception(f"could not publish {', '.join(report['failed'])}")
 
-            img_url = f"{BOOKERICS_BASE_URL}/thumbnails/{thumbnail_filename}"
+            img_url = public_url(fallback_key)
+            stored_variants = [
+                {
+                    "url": public_url(v["key"]),
+                    "width": v["width"],
+                    "height": v["height"],
+                    "format": v["format"],
+                }
+                for v in variants
+            ]
 
+            await update_bookmark_thumbnail_variants(
+                bookmark["id"], stored_variants, placeholder, analysis=analysis
+            )
             await update_bookmark_thumbnail_url(bookmark["id"], img_url)
+            _announce_thumbnail(bookmark["id"], img_url, stored_variants, placeholder)
             logger.info(
                 f"🥳 Thumbnail for bookmark id # {bookmark['id']} successfully uploaded to hosting!"
             )
 
-            # Clean up local file
-            os.remove(local_path)
-
             return img_url
-        except subprocess.CalledProcessError as e:
+        except (PlaywrightError, RuntimeError, asyncio.TimeoutError) as e:
             logger.error(f"💥 Error generating thumbnail: {e}")
             return ""
         except Exception as e:
             logger.error(f"💥 Error uploading thumbnail to hosting: {e}")
             return ""
+        finally:
+            # Clean up local files
+            shutil.rmtree(work_dir, ignore_errors=True)
+            _pending_thumbnails.discard(int(bookmark["id"]))
+            if not img_url:
+                # Tell waiting pages to stop waiting for this one
+                _announce_thumbnail(bookmark["id"], "", [], None)
+
+
+def referenced_thumbnail_keys() -> Set[str]:
+    """Store keys of every thumbnail a bookmark still points at."""
+    keys = set()
+    rows, _ = execute_query("SELECT thumbnail_url FROM bookmarks WHERE thumbnail_url != ''")
+    keys.update(key_from_url(url) for (url,) in rows)
+    rows, _ = execute_query("SELECT variants FROM thumbnails")
+    for (variants_json,) in rows:
+        try:
+            variants = json.loads(variants_json or "[]")
+        except json.JSONDecodeError:
+            continue
+        keys.update(key_from_url(v.get("url", "")) for v in variants)
+    keys.discard("")
+    return keys
 
 
-async def update_bookmarks_with_thumbnails(bookmarks, schedule_hosting_upload=True):
-    tasks = []
-    for bookmark in bookmarks:
-        # Don't look up thumbnails for db entries we're just browsing
-        source = bookmark.get("source")
-        if source == "external":
-            return bookmarks
-
-        img_url = bookmark.get("thumbnail_url")
-        if img_url in ("", None):
-            if isinstance(bookmark, dict):
-                task = asyncio.create_task(get_bookmark_thumbnail_image(bookmark))
-                tasks.append(task)
-            else:
-                logger.error(f"💥 Bookmark is not a dictionary: {bookmark}")
-
-    # Await all thumbnail fetching tasks
-    thumbnails = await asyncio.gather(*tasks)
-
-    for i, thumbnail_url in enumerate(thumbnails):
-        if thumbnail_url:
-            bookmarks[i]["thumbnail_url"] = thumbnail_url
-
-    # Properly await the hosting upload
-    if schedule_hosting_upload:
-        await schedule_upload_to_hosting()
-    return bookmarks
+async def collect_thumbnail_garbage(dry_run: bool = False) -> Dict[str, Any]:
+    """Remove locally stored thumbnails that no bookmark references."""
+    referenced = referenced_thumbnail_keys()
+    return await asyncio.to_thread(thumbnail_store.gc, referenced, dry_run=dry_run)
 
 
 def _thumbnail_mime_type(url: str) -> str:
@@ -820,108 +1714,170 @@ def _thumbnail_mime_type(url: str) -> str:
     return "image/jpeg"
 
 
-def create_rss_feed(bookmarks: List[Bookmark], tag: Optional[str] = None) -> str:
-    """Creates an RSS feed from a list of bookmarks."""
+FEED_FORMATS = ("rss", "atom", "json")
+
+
+def feed_filename_for(kind: str, tag: Optional[str] = None) -> str:
+    """Return the file name a feed format is written to (and published as)."""
+    suffix = f"-{tag}" if tag else ""
+    if kind == "atom":
+        return f"atom{suffix}.xml"
+    if kind == "json":
+        return f"feed{suffix}.json"
+    return f"rss{suffix}.xml"
+
+
+def _normalize_tags(tags: Any) -> List[str]:
+    # Handle case where tags might be a string (shouldn't happen but just in case)
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags) if tags else []
+        except (json.JSONDecodeError, TypeError):
+            tags = []
+    if not isinstance(tags, list):
+        tags = []
+    return [str(t).strip() for t in tags if t and str(t).strip()]
+
+
+def build_feed_items(
+    bookmarks: List[Bookmark], tag: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Normalize bookmarks into the item model shared by every feed format.
+
+    All per-item work (date formatting, HTML cleaning, XML escaping, tag
+    normalization, enclosure detection) happens here exactly once, so the RSS,
+    Atom and JSON renderers only have to concatenate precomputed strings.
+    """
+    filtered = [b for b in bookmarks if b]
+    if tag:
+        filtered = [b for b in filtered if tag in (b.get("tags") or [])]
+    sorted_bookmarks = sorted(filtered, key=lambda x: x["created_at"], reverse=True)
+
+    items = []
+    for bookmark in sorted_bookmarks:
+        created_at = bookmark["created_at"]
+        dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        local_dt = dt.astimezone()
+        hour = local_dt.hour
+        minute = local_dt.minute
+        am_pm = "am" if hour < 12 else "pm"
+        display_hour = hour if hour <= 12 else hour - 12
+        if display_hour == 0:
+            display_hour = 12
+        human_date = f"{local_dt.strftime('%A, %B %-d, %Y')} @ {display_hour}:{minute:02d}{am_pm}"
+
+        title = clean_html((bookmark.get("title") or "").strip()) or "Untitled"
+        description = clean_html((bookmark.get("description") or "").strip())
+        link = bookmark.get("url", "")
+        tags = _normalize_tags(bookmark.get("tags", []))
+
+        thumbnail = bookmark.get("thumbnail_url") or ""
+        enclosure = (
+            {"url": thumbnail, "type": _thumbnail_mime_type(thumbnail)}
+            if thumbnail
+            else None
+        )
+
+        items.append(
+            {
+                "id": link,
+                "url": link,
+                "title": title,
+                "description": description,
+                "tags": tags,
+                "enclosure": enclosure,
+                # RFC 2822 for RSS, RFC 3339 for Atom and JSON Feed
+                "pub_date": local_dt.strftime("%a, %d %b %Y %H:%M:%S %z"),
+                "iso_date": local_dt.isoformat(timespec="seconds"),
+                "human_date": human_date,
+                "url_xml": safe_escape(link),
+                "title_xml": escape(title),
+                "description_xml": escape(description),
+                "tags_xml": [safe_escape(t) for t in tags],
+                "enclosure_url_xml": safe_escape(thumbnail) if thumbnail else "",
+            }
+        )
+    return items
+
+
+def _feed_channel(
+    kind: str, tag: Optional[str], items: List[Dict[str, Any]]
+) -> Dict[str, str]:
+    feed_filename = feed_filename_for(kind, tag)
+    # Date the channel by its newest item rather than the build time, so an
+    # unchanged collection renders byte-identical feeds (and a stable ETag)
+    if items:
+        rfc_date, iso_date = items[0]["pub_date"], items[0]["iso_date"]
+    else:
+        epoch = datetime.fromtimestamp(0, tz=timezone.utc)
+        rfc_date = epoch.strftime("%a, %d %b %Y %H:%M:%S %z")
+        iso_date = epoch.isoformat(timespec="seconds")
+    return {
+        "filename": feed_filename,
+        "url": f"{RSS_METADATA.get('link', '')}/feeds/{feed_filename}",
+        "title": RSS_METADATA["title"],
+        "link": RSS_METADATA.get("link", ""),
+        "description": RSS_METADATA.get("description", ""),
+        "logo": f"{BOOKERICS_BASE_URL}/{RSS_METADATA.get('logo', 'bookerics.png')}",
+        "rfc_date": rfc_date,
+        "iso_date": iso_date,
+    }
+
+
+def create_rss_feed(
+    bookmarks: List[Bookmark],
+    tag: Optional[str] = None,
+    items: Optional[List[Dict[str, Any]]] = None,
+) -> str:
+    """Creates an RSS 2.0 feed from a list of bookmarks."""
     try:
-        filtered = [b for b in bookmarks if b]
-        if tag:
-            filtered = [
-                b for b in filtered
-                if tag in (b.get("tags") or [])
-            ]
-        sorted_bookmarks = sorted(filtered, key=lambda x: x["created_at"], reverse=True)
-
-        feed_filename = f"rss-{tag}.xml" if tag else "rss.xml"
-        feed_url = f"{RSS_METADATA.get('link', '')}/feeds/{feed_filename}"
-
-        items = []
-        for bookmark in sorted_bookmarks:
-            created_at = bookmark["created_at"]
-            dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-            local_dt = dt.astimezone()
-            hour = local_dt.hour
-            minute = local_dt.minute
-            am_pm = "am" if hour < 12 else "pm"
-            display_hour = hour if hour <= 12 else hour - 12
-            if display_hour == 0:
-                display_hour = 12
-            human_date = f"{local_dt.strftime('%A, %B %-d, %Y')} @ {display_hour}:{minute:02d}{am_pm}"
-            # RFC 2822 format for standard RSS compatibility
-            pub_date = local_dt.strftime("%a, %d %b %Y %H:%M:%S %z")
-
-            title = bookmark.get("title", "").strip()
-            title = clean_html(title) or "Untitled"
-
-            description = bookmark.get("description", "").strip()
-            description = clean_html(description)
-
-            link = bookmark.get("url", "")
-            link = safe_escape(link)
-
-            thumbnail = bookmark.get("thumbnail_url") or ""
-            mime_type = _thumbnail_mime_type(thumbnail) if thumbnail else "image/jpeg"
-
-            # Generate category elements for tags
-            tags = bookmark.get("tags", [])
-            # Handle case where tags might be a string (shouldn't happen but just in case)
-            if isinstance(tags, str):
-                try:
-                    tags = json.loads(tags) if tags else []
-                except (json.JSONDecodeError, TypeError):
-                    tags = []
-            if not isinstance(tags, list):
-                tags = []
-            tags = [t.strip() for t in tags if t and str(t).strip()]
+        if items is None:
+            items = build_feed_items(bookmarks, tag)
+        channel = _feed_channel("rss", tag, items)
 
+        rendered = []
+        for item in items:
             categories_xml = "".join(
-                f"<category>{safe_escape(t)}</category>\n                    "
-                for t in tags
+                f"<category>{t}</category>\n                    "
+                for t in item["tags_xml"]
             )
-
             enclosure = (
-                f'<enclosure url="{thumbnail}" type="{mime_type}" length="0" />'
-                if thumbnail else ""
+                f'<enclosure url="{item["enclosure_url_xml"]}" type="{item["enclosure"]["type"]}" length="0" />'
+                if item["enclosure"]
+                else ""
             )
-
-            item = f"""
+            rendered.append(
+                f"""
                 <item>
-                    <pubDate>{pub_date}</pubDate>
-                    <bookerics:humanDate>{human_date}</bookerics:humanDate>
-                    <title><![CDATA[{title}]]></title>
-                    <link>{link}</link>
-                    <description><![CDATA[{description}]]></description>
+                    <pubDate>{item["pub_date"]}</pubDate>
+                    <bookerics:humanDate>{item["human_date"]}</bookerics:humanDate>
+                    <title>{item["title_xml"]}</title>
+                    <link>{item["url_xml"]}</link>
+                    <description>{item["description_xml"]}</description>
                     {enclosure}
-                    <guid isPermaLink="false">{link}</guid>
+                    <guid isPermaLink="false">{item["url_xml"]}</guid>
                     {categories_xml}
                 </item>
             """
-            items.append(item)
-
-        channel_title = RSS_METADATA["title"]
-        channel_link = RSS_METADATA.get("link", "")
-        channel_description = RSS_METADATA.get("description", "")
-
-        rss_items_str = "\n".join(items)
+            )
 
-        # Use RFC 2822 format for channel dates
-        now = datetime.now().astimezone()
-        rfc_date = now.strftime("%a, %d %b %Y %H:%M:%S %z")
+        rss_items_str = "\n".join(rendered)
 
         return f"""<?xml version="1.0" encoding="UTF-8" ?>
 <?xml-stylesheet type="text/xsl" href="{BOOKERICS_BASE_URL}/feeds/rss.xsl"?>
 <rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" xmlns:bookerics="https://bookerics.com/rss">
 <channel>
-    <title>{channel_title}</title>
-    <link>{channel_link}</link>
-    <description>{channel_description}</description>
+    <title>{channel["title"]}</title>
+    <link>{channel["link"]}</link>
+    <description>{channel["description"]}</description>
     <language>en-us</language>
-    <pubDate>{rfc_date}</pubDate>
-    <lastBuildDate>{rfc_date}</lastBuildDate>
-    <atom:link href="{feed_url}" rel="self" type="application/rss+xml" />
+    <pubDate>{channel["rfc_date"]}</pubDate>
+    <lastBuildDate>{channel["rfc_date"]}</lastBuildDate>
+    <atom:link href="{channel["url"]}" rel="self" type="application/rss+xml" />
     <image>
-        <url>{BOOKERICS_BASE_URL}/{RSS_METADATA.get("logo", "bookerics.png")}</url>
+        <url>{channel["logo"]}</url>
         <title>bookerics</title>
-        <link>{BOOKERICS_BASE_URL}/feeds/{feed_filename}</link>
+        <link>{BOOKERICS_BASE_URL}/feeds/{channel["filename"]}</link>
         <width>128</width>
         <height>128</height>
     </image>
@@ -932,3 +1888,119 @@ def create_rss_feed(bookmarks: List[Bookmark], tag: Optional[str] = None) -> str
     except Exception as e:
         logger.error(f"Error creating RSS feed: {e}")
         raise e
+
+
+def create_atom_feed(
+    bookmarks: List[Bookmark],
+    tag: Optional[str] = None,
+    items: Optional[List[Dict[str, Any]]] = None,
+) -> str:
+    """Creates an Atom 1.0 feed from a list of bookmarks."""
+    try:
+        if items is None:
+            items = build_feed_items(bookmarks, tag)
+        channel = _feed_channel("atom", tag, items)
+        author = RSS_METADATA.get("author", {})
+
+        rendered = []
+        for item in items:
+            categories_xml = "".join(
+                f'<category term="{t}" />\n        ' for t in item["tags_xml"]
+            )
+            enclosure = (
+                f'<link rel="enclosure" href="{item["enclosure_url_xml"]}" type="{item["enclosure"]["type"]}" length="0" />'
+                if item["enclosure"]
+                else ""
+            )
+            rendered.append(
+                f"""
+    <entry>
+        <id>{item["url_xml"]}</id>
+        <title type="text">{item["title_xml"]}</title>
+        <link rel="alternate" href="{item["url_xml"]}" />
+        <published>{item["iso_date"]}</published>
+        <updated>{item["iso_date"]}</updated>
+        <summary type="text">{item["description_xml"]}</summary>
+        {enclosure}
+        {categories_xml}
+    </entry>"""
+            )
+
+        updated = channel["iso_date"]
+        entries_str = "\n".join(rendered)
+
+        return f"""<?xml version="1.0" encoding="UTF-8" ?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="{RSS_METADATA.get("language", "en")}">
+    <id>{safe_escape(RSS_METADATA.get("id", channel["link"]))}</id>
+    <title>{safe_escape(channel["title"])}</title>
+    <subtitle>{safe_escape(channel["description"])}</subtitle>
+    <link rel="self" type="application/atom+xml" href="{channel["url"]}" />
+    <link rel="alternate" type="text/html" href="{channel["link"]}" />
+    <updated>{updated}</updated>
+    <author>
+        <name>{safe_escape(author.get("name", ""))}</name>
+        <email>{safe_escape(author.get("email", ""))}</email>
+    </author>
+    <logo>{channel["logo"]}</logo>
+    {entries_str}
+</feed>
+"""
+    except Exception as e:
+        logger.error(f"Error creating Atom feed: {e}")
+        raise e
+
+
+def create_json_feed(
+    bookmarks: List[Bookmark],
+    tag: Optional[str] = None,
+    items: Optional[List[Dict[str, Any]]] = None,
+) -> str:
+    """Creates a JSON Feed 1.1 document from a list of bookmarks."""
+    try:
+        if items is None:
+            items = build_feed_items(bookmarks, tag)
+        channel = _feed_channel("json", tag, items)
+        author = RSS_METADATA.get("author", {})
+
+        feed_items = []
+        for item in items:
+            feed_item: Dict[str, Any] = {
+                "id": item["id"],
+                "url": item["url"],
+                "title": item["title"],
+                "content_text": item["description"],
+                "date_published": item["iso_date"],
+                "tags": item["tags"],
+            }
+            if item["enclosure"]:
+                feed_item["image"] = item["enclosure"]["url"]
+                feed_item["attachments"] = [
+                    {
+                        "url": item["enclosure"]["url"],
+                        "mime_type": item["enclosure"]["type"],
+                    }
+                ]
+            feed_items.append(feed_item)
+
+        feed = {
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": channel["title"],
+            "home_page_url": channel["link"],
+            "feed_url": channel["url"],
+            "description": channel["description"],
+            "icon": channel["logo"],
+            "language": RSS_METADATA.get("language", "en"),
+            "authors": [{"name": author.get("name", "")}],
+            "items": feed_items,
+        }
+        return json.dumps(feed, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.error(f"Error creating JSON feed: {e}")
+        raise e
+
+
+FEED_RENDERERS = {
+    "rss": create_rss_feed,
+    "atom": create_atom_feed,
+    "json": create_json_feed,
+}
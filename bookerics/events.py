@@ -0,0 +1,85 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .utils import logger
+
+Event = Dict[str, Any]
+
+# Pushed to every subscriber when the bus closes, so streams can end
+CLOSED: Event = {"closed": True}
+
+
+class EventBus:
+    """In-process publish/subscribe for things pages want to hear about.
+
+    Publishers never wait: each subscriber has its own bounded queue, and
+    a subscriber that falls behind loses its oldest events rather than
+    slowing down the thumbnail pipeline. Everything runs on the app's
+    event loop, so `publish` must be called from it.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscribe(self, topic: str) -> Iterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.setdefault(topic, []).append(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(topic, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+
+    def publish(self, topic: str, event: Event) -> None:
+        for queue in list(self._subscribers.get(topic, [])):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def wait_for(
+        self,
+        topic: str,
+        predicate: Callable[[Event], bool],
+        timeout: float,
+        queue: Optional[asyncio.Queue] = None,
+    ) -> Optional[Event]:
+        """Return the first event matching `predicate`, or None on timeout.
+
+        Pass a `queue` from `subscribe` taken before checking current state,
+        so an event published in between isn't missed.
+        """
+
+        async def first_match(q: asyncio.Queue) -> Optional[Event]:
+            while True:
+                event = await q.get()
+                if event is CLOSED:
+                    return None
+                if predicate(event):
+                    return event
+
+        try:
+            if queue is not None:
+                return await asyncio.wait_for(first_match(queue), timeout)
+            with self.subscribe(topic) as q:
+                return await asyncio.wait_for(first_match(q), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        count = sum(len(queues) for queues in self._subscribers.values())
+        if count:
+            logger.info(f"📣 Closing {count} event subscriber(s)")
+        for topic in list(self._subscribers):
+            self.publish(topic, CLOSED)
+
+
+event_bus = EventBus()
+
+THUMBNAIL_READY = "thumbnail"
+ARCHIVE_QUEUED = "archive"
+BOOKMARK_CREATED = "bookmark-created"
+CULL_PROGRESS = "cull"
@@ -0,0 +1,94 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class JobProgress:
+    """Thread-safe progress and throughput counters for a background job.
+
+    One instance lives at module level per kind of job (like `_cull_job`),
+    so a progress page can poll `snapshot()` while the job runs.
+    """
+
+    def __init__(self, name: str, max_errors: int = 50):
+        self.name = name
+        self.max_errors = max_errors
+        self._lock = threading.Lock()
+        self._state: Dict[str, Any] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = {
+                "status": "idle",  # idle | running | stopping | done
+                "total": 0,
+                "done": 0,
+                "succeeded": 0,
+                "failed": 0,
+                "retries": 0,
+                "started_at": None,
+                "finished_at": None,
+                "errors": [],
+                "stats": {},
+            }
+
+    def start(self, total: int) -> None:
+        self.reset()
+        with self._lock:
+            self._state["status"] = "running"
+            self._state["total"] = total
+            self._state["started_at"] = time.time()
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._state["status"] in ("running", "stopping")
+
+    @property
+    def stop_requested(self) -> bool:
+        with self._lock:
+            return self._state["status"] == "stopping"
+
+    def request_stop(self) -> None:
+        with self._lock:
+            if self._state["status"] == "running":
+                self._state["status"] = "stopping"
+
+    def retry(self) -> None:
+        with self._lock:
+            self._state["retries"] += 1
+
+    def advance(self, ok: bool, error: Optional[str] = None, count: int = 1) -> None:
+        with self._lock:
+            self._state["done"] += count
+            self._state["succeeded" if ok else "failed"] += count
+            if error:
+                errors: List[str] = self._state["errors"]
+                errors.append(error)
+                del errors[: -self.max_errors]
+
+    def add_stats(self, **values: float) -> None:
+        """Accumulate job-specific numbers (tokens used, bytes saved, ...)."""
+        with self._lock:
+            stats = self._state["stats"]
+            for key, value in values.items():
+                stats[key] = stats.get(key, 0) + value
+
+    def finish(self) -> None:
+        with self._lock:
+            self._state["status"] = "done"
+            self._state["finished_at"] = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = dict(self._state)
+            state["errors"] = list(self._state["errors"])
+            state["stats"] = dict(self._state["stats"])
+        started = state["started_at"]
+        elapsed = ((state["finished_at"] or time.time()) - started) if started else 0.0
+        rate = state["done"] / elapsed if elapsed > 0 else 0.0
+        remaining = state["total"] - state["done"]
+        state["elapsed"] = elapsed
+        state["per_minute"] = rate * 60
+        state["eta"] = remaining / rate if rate > 0 and state["status"] == "running" else None
+        return state
@@ -1,12 +1,29 @@
+import asyncio
 import os
 from collections.abc import AsyncIterator
 from starlette.routing import Mount
 from starlette.middleware.cors import CORSMiddleware
-from starlette.staticfiles import StaticFiles
 from fasthtml.common import fast_app
 from contextlib import asynccontextmanager
 import tracemalloc
-from .database import load_db_on_startup
+from .ai import stop_ai_enrichment
+from .archiver import archiver
+from .backfill import stop_thumbnail_backfill
+from .cull import stop_cull
+from .constants import (
+    BOOKERICS_BASE_URL,
+    PUBLISH_THUMBNAILS_DIR,
+    THUMBNAIL_STORE_DIR,
+    THUMBS_MOUNT,
+)
+from .database import build_local_indexes, load_db_on_startup
+from .events import event_bus
+from .placeholders import placeholder_pool
+from .publish import publish_backend
+from .screenshots import screenshot_service
+from .snapshots import snapshot_service, stop_snapshot_backfill
+from .vectors import vector_index
+from .static_files import ImmutableStaticFiles, PrecompressedStaticFiles
 
 tracemalloc.start()
 
@@ -23,18 +40,51 @@ if not os.path.exists(static_dir):
 if not os.path.exists(feeds_dir):
     raise RuntimeError(f"Directory '{feeds_dir}' does not exist")
 
+# Filled in as thumbnails are captured
+os.makedirs(THUMBNAIL_STORE_DIR, exist_ok=True)
+
 
 @asynccontextmanager
 async def app_lifespan(app_instance) -> AsyncIterator[None]:
     load_db_on_startup()
+    await asyncio.to_thread(build_local_indexes)
+    placeholder_pool.start()
+    archiver.start()
+    snapshot_service.start()
     yield
+    event_bus.close()
+    await stop_cull()
+    await stop_snapshot_backfill()
+    await snapshot_service.close()
+    await archiver.close()
+    await placeholder_pool.close()
+    await stop_thumbnail_backfill()
+    # Saves whatever was tagged so far and publishes the feed once
+    await stop_ai_enrichment()
+    await screenshot_service.close()
+    await publish_backend.close()
+    vector_index.save()
 
 
 app, rt = fast_app(debug=True, lifespan=app_lifespan, static_path=base_dir)
 
-# Add feeds route manually since FastHTML doesn't handle this by default
+# Add feeds route manually since FastHTML doesn't handle this by default.
+# Serves ETag/Last-Modified, 304s and the precompressed .br/.gz siblings.
+app.router.routes.append(
+    Mount("/feeds", PrecompressedStaticFiles(directory=feeds_dir), name="feeds")
+)
+
+# Content-addressed thumbnails never change, so they're cached as immutable;
+# anything not stored on this machine redirects to the published copy
 app.router.routes.append(
-    Mount("/feeds", StaticFiles(directory=feeds_dir), name="feeds")
+    Mount(
+        THUMBS_MOUNT,
+        ImmutableStaticFiles(
+            directory=THUMBNAIL_STORE_DIR,
+            fallback_url=f"{BOOKERICS_BASE_URL}/{PUBLISH_THUMBNAILS_DIR}",
+        ),
+        name="thumbs",
+    )
 )
 
 app.add_middleware(
@@ -0,0 +1,91 @@
+import asyncio
+import random
+from typing import List, Optional
+
+import aiohttp
+
+from .constants import (
+    GIPHY_API_KEY,
+    PLACEHOLDER_POOL_SIZE,
+    PLACEHOLDER_REFRESH_INTERVAL,
+)
+from .utils import logger
+
+# Shipped with the app, so there is always something to show
+LOCAL_PLACEHOLDER = "/static/images/placeholder.svg"
+
+GIPHY_RANDOM_URL = "https://api.giphy.com/v1/gifs/random"
+
+
+class PlaceholderPool:
+    """Random "waiting" GIFs for bookmarks whose thumbnail isn't ready yet.
+
+    Rendering only ever calls `pick()`, which reads from memory. The pool
+    is filled and refreshed by a background task started with the app, so
+    a slow or unreachable Giphy can never stall a request; until the first
+    refill lands (or without a GIPHY_API_KEY) the local placeholder is used.
+    """
+
+    def __init__(self, size: int = 20, refresh_interval: float = 600.0):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self._urls: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def pick(self) -> str:
+        urls = self._urls
+        return random.choice(urls) if urls else LOCAL_PLACEHOLDER
+
+    async def _fetch_one(self, session: aiohttp.ClientSession) -> Optional[str]:
+        params = {"api_key": GIPHY_API_KEY, "tag": "waiting", "rating": "r"}
+        try:
+            async with session.get(GIPHY_RANDOM_URL, params=params) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+            return data["data"]["images"]["original"]["url"]
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"🎞️ Error fetching Giphy URL: {e}")
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"🎞️ Error parsing Giphy response: {e}")
+        return None
+
+    async def refill(self) -> None:
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            results = await asyncio.gather(
+                *(self._fetch_one(session) for _ in range(self.size))
+            )
+        urls = list(dict.fromkeys(url for url in results if url))
+        if urls:
+            # Swap the whole list so pick() never sees a half-built pool
+            self._urls = urls
+            logger.info(f"🎞️ Placeholder pool refreshed with {len(urls)} GIFs")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refill()
+            except Exception as e:
+                logger.error(f"💥 Placeholder refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if not GIPHY_API_KEY:
+            logger.info("🎞️ No GIPHY_API_KEY set, using the local placeholder")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+placeholder_pool = PlaceholderPool(
+    size=PLACEHOLDER_POOL_SIZE, refresh_interval=PLACEHOLDER_REFRESH_INTERVAL
+)
@@ -0,0 +1,272 @@
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constants import (
+    BOOKERICS_PUBLISH_BACKEND,
+    BOOKERICS_PUBLISH_DIR,
+    BOOKERICS_REMOTE_ROOT,
+    PUBLISH_MANIFEST_PATH,
+)
+from .sftp import SFTPPool, sftp_pool
+from .static_files import read_content_hash
+from .utils import logger
+
+
+class PublishBackend(abc.ABC):
+    """Somewhere published files end up.
+
+    Every path handed to a backend is relative to the site root
+    (`feeds/rss.xml`, `thumbnails/12.jpg`, `index.html`), so callers never
+    need to know whether the site lives on a remote host or a local disk.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def put_many(self, files: List[Tuple[str, str]]) -> List[bool]:
+        """Publish (local_path, site_path) pairs; returns one success flag each."""
+
+    async def close(self) -> None:
+        pass
+
+
+class SFTPBackend(PublishBackend):
+    """Publishes to web hosting over the pooled SFTP connection."""
+
+    name = "sftp"
+
+    def __init__(self, pool: SFTPPool, root: str):
+        self.pool = pool
+        self.root = root.rstrip("/")
+
+    async def put_many(self, files: List[Tuple[str, str]]) -> List[bool]:
+        return await self.pool.put_many(
+            [(local_path, f"{self.root}/{site_path}") for local_path, site_path in files]
+        )
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+
+class LocalDirectoryBackend(PublishBackend):
+    """Publishes into a local directory, swapping in each batch atomically.
+
+    `path` is a symlink to the current release under `<path>.releases/`.
+    A batch hard-links the current release into a new one (no file data
+    is copied, only directory entries), writes the batch's files there and
+    then repoints the symlink with a single rename. Readers see either the
+    whole previous site or the whole new one, never a mix of feeds from
+    one publish and an index page from another.
+    """
+
+    name = "local"
+
+    def __init__(self, path: str, keep_releases: int = 3):
+        self.path = os.path.abspath(path)
+        self.releases_dir = f"{self.path}.releases"
+        self.keep_releases = keep_releases
+
+    async def put_many(self, files: List[Tuple[str, str]]) -> List[bool]:
+        return await asyncio.to_thread(self._publish, files)
+
+    def _publish(self, files: List[Tuple[str, str]]) -> List[bool]:
+        release = os.path.join(self.releases_dir, str(time.time_ns()))
+        try:
+            os.makedirs(self.releases_dir, exist_ok=True)
+            if os.path.isdir(self.path) and not os.path.islink(self.path):
+                # Adopt a plain directory as the first release
+                os.rename(self.path, os.path.join(self.releases_dir, "0"))
+                os.symlink(os.path.join(self.releases_dir, "0"), self.path)
+            if os.path.islink(self.path):
+                shutil.copytree(os.path.realpath(self.path), release, copy_function=os.link)
+            else:
+                os.makedirs(release)
+        except OSError as e:
+            logger.error(f"💥 Error preparing a release in {self.releases_dir}: {e}")
+            shutil.rmtree(release, ignore_errors=True)
+            return [False] * len(files)
+
+        results = []
+        for local_path, site_path in files:
+            dest = os.path.join(release, site_path)
+            try:
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                # Unlink first: dest is a hard link shared with the live release
+                if os.path.lexists(dest):
+                    os.unlink(dest)
+                shutil.copy2(local_path, dest)
+                results.append(True)
+            except OSError as e:
+                logger.error(f"💥 Error publishing {local_path} to {dest}: {e}")
+                results.append(False)
+
+        tmp_link = f"{self.path}.tmp-{os.getpid()}"
+        try:
+            if os.path.lexists(tmp_link):
+                os.unlink(tmp_link)
+            os.symlink(release, tmp_link)
+            os.replace(tmp_link, self.path)
+        except OSError as e:
+            logger.error(f"💥 Error switching {self.path} to {release}: {e}")
+            shutil.rmtree(release, ignore_errors=True)
+            return [False] * len(files)
+        logger.info(f"📦 Published {sum(results)} file(s) to {self.path}")
+        self._prune(release)
+        return results
+
+    def _prune(self, current: str) -> None:
+        releases = sorted(
+            (os.path.join(self.releases_dir, r) for r in os.listdir(self.releases_dir)),
+            key=lambda r: int(os.path.basename(r)) if os.path.basename(r).isdigit() else 0,
+            reverse=True,
+        )
+        for old in releases[self.keep_releases :]:
+            if old != current:
+                shutil.rmtree(old, ignore_errors=True)
+
+
+def make_backend(kind: str) -> PublishBackend:
+    if kind == "local":
+        return LocalDirectoryBackend(BOOKERICS_PUBLISH_DIR)
+    if kind != "sftp":
+        logger.warning(f"🧾 Unknown publish backend {kind!r}, using sftp")
+    return SFTPBackend(sftp_pool, BOOKERICS_REMOTE_ROOT)
+
+
+publish_backend = make_backend(BOOKERICS_PUBLISH_BACKEND)
+
+
+def file_digest(path: str) -> Tuple[str, int]:
+    """Return (sha256, size) for a local file, reusing a `.sha256` sidecar if fresh."""
+    size = os.path.getsize(path)
+    digest = read_content_hash(path)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+    return digest, size
+
+
+class PublishManifest:
+    """Records the content hash of every file last published.
+
+    Keys are `<backend>:<site path>`, so switching backends republishes
+    everything once instead of trusting another target's state.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is not None:
+            return self._entries
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"🧾 Ignoring unreadable publish manifest: {e}")
+        self._entries = entries
+        return entries
+
+    def is_current(self, key: str, digest: str) -> bool:
+        entry = self.entries.get(key)
+        return bool(entry and entry.get("sha256") == digest)
+
+    def record(self, key: str, local_path: str, digest: str, size: int) -> None:
+        self.entries[key] = {
+            "local_path": local_path,
+            "sha256": digest,
+            "size": size,
+            "uploaded_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def forget(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+manifest = PublishManifest(PUBLISH_MANIFEST_PATH)
+_sync_lock = asyncio.Lock()
+
+
+async def sync_files(
+    files: List[Tuple[str, str]],
+    dry_run: bool = False,
+    backend: Optional[PublishBackend] = None,
+) -> Dict[str, Any]:
+    """Publish only the (local_path, site_path) pairs whose content changed.
+
+    This is the one batched entry point for feeds, thumbnails and the index
+    page. With `dry_run=True` nothing is published and the manifest is left
+    alone; the report says what would be sent and how many bytes skipping
+    the unchanged files saves.
+    """
+    backend = backend or publish_backend
+    report: Dict[str, Any] = {
+        "backend": backend.name,
+        "dry_run": dry_run,
+        "uploaded": [],
+        "skipped": [],
+        "failed": [],
+        "bytes_uploaded": 0,
+        "bytes_saved": 0,
+    }
+    started = time.perf_counter()
+    async with _sync_lock:
+        changed = []
+        for local_path, site_path in files:
+            if not os.path.exists(local_path):
+                logger.warning(f"🧾 Skipping missing file {local_path}")
+                continue
+            digest, size = await asyncio.to_thread(file_digest, local_path)
+            if manifest.is_current(f"{backend.name}:{site_path}", digest):
+                report["skipped"].append(site_path)
+                report["bytes_saved"] += size
+            else:
+                changed.append((local_path, site_path, digest, size))
+
+        if dry_run:
+            for _, site_path, _, size in changed:
+                report["uploaded"].append(site_path)
+                report["bytes_uploaded"] += size
+        elif changed:
+            results = await backend.put_many(
+                [(local_path, site_path) for local_path, site_path, _, _ in changed]
+            )
+            for (local_path, site_path, digest, size), ok in zip(changed, results):
+                if ok:
+                    manifest.record(f"{backend.name}:{site_path}", local_path, digest, size)
+                    report["uploaded"].append(site_path)
+                    report["bytes_uploaded"] += size
+                else:
+                    report["failed"].append(site_path)
+
+        if not dry_run and report["uploaded"]:
+            await asyncio.to_thread(manifest.save)
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    verb = "Would publish" if dry_run else "Published"
+    logger.info(
+        f"🧾 {verb} {len(report['uploaded'])} file(s) ({report['bytes_uploaded']:,} bytes) via {backend.name}, "
+        f"skipped {len(report['skipped'])} unchanged ({report['bytes_saved']:,} bytes saved)"
+    )
+    return report
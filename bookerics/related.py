@@ -0,0 +1,203 @@
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from .utils import logger
+
+# Added to the tag similarity of two bookmarks from the same site that
+# already share a tag
+DOMAIN_BOOST = 0.15
+# Tags on more than this share of bookmarks say little about relatedness
+MAX_TAG_SHARE = 0.2
+
+
+def _domain(url: str) -> str:
+    return (urlparse(url or "").hostname or "").removeprefix("www.")
+
+
+class RelatedIndex:
+    """Precomputed "related bookmarks" for every bookmark.
+
+    Relatedness is a weighted Jaccard over tags: shared tags count by
+    their inverse document frequency, so two bookmarks sharing a rare tag
+    are closer than two sharing a common one. Bookmarks on the same site
+    get a small boost on top, but only if they already share a tag: a big
+    site would otherwise make every one of its bookmarks a candidate for
+    every other.
+
+    Each bookmark's top-K list is cached. When a bookmark's tags change,
+    it and every bookmark that shares a tag (old or new) with it are
+    marked stale and recomputed the next time they're asked for, entirely
+    in memory. The tag co-occurrence counts kept alongside power
+    `related_tags`.
+    """
+
+    def __init__(self, k: int = 6, domain_boost: float = DOMAIN_BOOST):
+        self.k = k
+        self.domain_boost = domain_boost
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._tags: Dict[int, Set[str]] = {}
+        self._domains: Dict[int, str] = {}
+        self._titles: Dict[int, Tuple[str, str]] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._cooccurrence: Dict[str, Counter] = defaultdict(Counter)
+        self._related: Dict[int, List[Tuple[int, float]]] = {}
+        self._stale: Set[int] = set()
+        # While rebuilding everything is recomputed anyway
+        self._bulk = False
+
+    def _max_postings(self) -> int:
+        return max(10, int(MAX_TAG_SHARE * len(self._titles)))
+
+    def _mark_stale(self, bookmark_ids: Set[int]) -> None:
+        # Lists built from very common tags skip them, so they don't
+        # change when one more bookmark joins
+        if not self._bulk and len(bookmark_ids) <= self._max_postings():
+            self._stale.update(bookmark_ids)
+
+    @property
+    def size(self) -> int:
+        return len(self._titles)
+
+    def _weight(self, tag: str) -> float:
+        return math.log((len(self._titles) + 1) / (len(self._postings.get(tag, ())) + 1)) + 1
+
+    def _remove(self, bookmark_id: int) -> None:
+        tags = self._tags.pop(bookmark_id, set())
+        for tag in tags:
+            self._postings[tag].discard(bookmark_id)
+            self._mark_stale(self._postings[tag])
+            if not self._postings[tag]:
+                del self._postings[tag]
+            for other in tags:
+                if other != tag:
+                    self._cooccurrence[tag][other] -= 1
+        self._domains.pop(bookmark_id, None)
+        self._titles.pop(bookmark_id, None)
+        self._related.pop(bookmark_id, None)
+        self._stale.discard(bookmark_id)
+
+    def update(self, bookmark: Dict[str, Any]) -> None:
+        """Add or refresh a bookmark; related lists it affects go stale."""
+        bookmark_id = int(bookmark["id"])
+        tags = {t for t in bookmark.get("tags") or [] if t and t.strip()}
+        domain = _domain(bookmark.get("url") or "")
+        with self._lock:
+            self._remove(bookmark_id)
+            self._tags[bookmark_id] = tags
+            self._domains[bookmark_id] = domain
+            self._titles[bookmark_id] = (bookmark.get("title") or "", bookmark.get("url") or "")
+            for tag in tags:
+                self._mark_stale(self._postings[tag])
+                self._postings[tag].add(bookmark_id)
+                for other in tags:
+                    if other != tag:
+                        self._cooccurrence[tag][other] += 1
+            self._stale.add(bookmark_id)
+
+    def remove(self, bookmark_id: int) -> None:
+        with self._lock:
+            self._remove(int(bookmark_id))
+
+    def rebuild(self, bookmarks: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._reset()
+            self._bulk = True
+        try:
+            for bookmark in bookmarks:
+                self.update(bookmark)
+        finally:
+            self._bulk = False
+        # Compute every list now so the first page views don't pay for it
+        with self._lock:
+            # Weights don't change until the next edit, so share them
+            weights: Dict[str, float] = {}
+            totals: Dict[int, float] = {}
+            for bookmark_id in self._titles:
+                self._related[bookmark_id] = self._compute(bookmark_id, weights, totals)
+            self._stale.clear()
+        logger.info(f"🔗 Related bookmarks computed for {self.size:,} bookmarks")
+
+    def _compute(
+        self,
+        bookmark_id: int,
+        weights: Optional[Dict[str, float]] = None,
+        totals: Optional[Dict[int, float]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Top-k related bookmarks; `weights` and `totals` memoize tag
+        weights and per-bookmark weight sums across calls."""
+        tags = self._tags.get(bookmark_id, set())
+        domain = self._domains.get(bookmark_id, "")
+        max_postings = self._max_postings()
+        weights = {} if weights is None else weights
+        totals = {} if totals is None else totals
+
+        def weight(tag: str) -> float:
+            if tag not in weights:
+                weights[tag] = self._weight(tag)
+            return weights[tag]
+
+        def total(other: int) -> float:
+            if other not in totals:
+                totals[other] = sum(weight(t) for t in self._tags.get(other, ()))
+            return totals[other]
+
+        shared: Dict[int, float] = defaultdict(float)
+        for tag in tags:
+            postings = self._postings.get(tag, ())
+            if len(postings) > max_postings:
+                continue
+            tag_weight = weight(tag)
+            for other in postings:
+                if other != bookmark_id:
+                    shared[other] += tag_weight
+
+        own_weight = total(bookmark_id)
+        scores: List[Tuple[int, float]] = []
+        for other, overlap in shared.items():
+            # |A ∪ B| = |A| + |B| - |A ∩ B|, all weighted
+            union = own_weight + total(other) - overlap
+            score = overlap / union if union > 0 else 0.0
+            if domain and self._domains.get(other) == domain:
+                score += self.domain_boost
+            if score > 0:
+                scores.append((other, score))
+        scores.sort(key=lambda pair: -pair[1])
+        return scores[: self.k]
+
+    def related(self, bookmark_id: int) -> List[Dict[str, Any]]:
+        """The cached related list for a bookmark, recomputed if stale."""
+        bookmark_id = int(bookmark_id)
+        with self._lock:
+            if bookmark_id in self._stale or bookmark_id not in self._related:
+                if bookmark_id not in self._titles:
+                    return []
+                self._related[bookmark_id] = self._compute(bookmark_id)
+                self._stale.discard(bookmark_id)
+            return [
+                {
+                    "id": other,
+                    "title": self._titles[other][0],
+                    "url": self._titles[other][1],
+                    "score": round(score, 3),
+                }
+                for other, score in self._related[bookmark_id]
+                if other in self._titles
+            ]
+
+    def related_tags(self, tag: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Tags most often used together with `tag`."""
+        with self._lock:
+            counts = self._cooccurrence.get(tag)
+            if not counts:
+                return []
+            return [(t, c) for t, c in counts.most_common(limit) if c > 0]
+
+
+related_index = RelatedIndex()
+
@@ -1,19 +1,20 @@
+import asyncio
 import secrets
 import logging
 import json
-import threading
-import urllib.request
-import urllib.error
-import socket
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from starlette.requests import Request
-from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fasthtml.common import to_xml
-from .ai import get_tags_and_description_from_bookmark
+from .ai import (
+    ai_enrichment,
+    get_tags_and_description_from_bookmark,
+    start_ai_enrichment,
+)
 from .core import Page
 from .components import (
+    A,
     Div,
     NavMenu,
     SearchBar,
@@ -25,115 +26,59 @@ from .components import (
     _render_tags_html,
     PreviewImage,
     KeyboardShortcutsHelpModal,
+    CullItem,
     CullPage,
     CullResultsFragment,
+    cull_group_index,
+    ThumbnailBackfillFragment,
+    ThumbnailBackfillPage,
+    SuspectThumbnailsPage,
+    AIEnrichmentFragment,
+    AIEnrichmentPage,
+    TagSuggestions,
+    RelatedTags,
+    TagChangeReport,
+    TagManagePage,
+    SnapshotPage,
 )
 
-# ---------------------------------------------------------------------------
-# Cull feature — concurrent URL health checking
-# ---------------------------------------------------------------------------
-
-_cull_job: Dict[str, Any] = {
-    "status": "idle",  # idle | running | done
-    "total": 0,
-    "checked": 0,
-    "results": [],
-}
-_cull_lock = threading.Lock()
-
-
-class _NoRedirect(urllib.request.HTTPRedirectHandler):
-    """Suppress automatic redirect following so we can capture 3xx codes."""
-
-    def redirect_request(self, req, fp, code, msg, headers, newurl):
-        raise urllib.error.HTTPError(req.full_url, code, msg, headers, fp)
-
-
-def _check_url_sync(bookmark: Dict[str, Any]) -> Dict[str, Any]:
-    """Check a single URL synchronously (called from ThreadPoolExecutor)."""
-    url = bookmark["url"]
-    result: Dict[str, Any] = {
-        "id": bookmark["id"],
-        "title": bookmark["title"],
-        "url": url,
-        "status_code": None,
-        "error": None,
-    }
-    try:
-        opener = urllib.request.build_opener(_NoRedirect)
-        req = urllib.request.Request(
-            url,
-            headers={"User-Agent": "Mozilla/5.0 (compatible; bookerics-health-check/1.0)"},
-            method="HEAD",
-        )
-        with opener.open(req, timeout=10) as resp:
-            result["status_code"] = resp.status
-    except urllib.error.HTTPError as e:
-        result["status_code"] = e.code
-    except urllib.error.URLError as e:
-        reason = str(getattr(e, "reason", e)).lower()
-        result["error"] = "timeout" if "timed out" in reason or isinstance(getattr(e, "reason", None), socket.timeout) else "connection_error"
-    except socket.timeout:
-        result["error"] = "timeout"
-    except Exception:
-        result["error"] = "connection_error"
-    return result
-
-
-def _run_cull_job(bookmarks: List[Dict[str, Any]]) -> None:
-    """Run URL checks concurrently in a background daemon thread."""
-    with _cull_lock:
-        _cull_job["status"] = "running"
-        _cull_job["total"] = len(bookmarks)
-        _cull_job["checked"] = 0
-        _cull_job["results"] = []
-
-    with ThreadPoolExecutor(max_workers=20) as executor:
-        futures = {executor.submit(_check_url_sync, bm): bm for bm in bookmarks}
-        for future in as_completed(futures):
-            try:
-                r = future.result()
-            except Exception:
-                bm = futures[future]
-                r = {"id": bm["id"], "title": bm["title"], "url": bm["url"], "status_code": None, "error": "connection_error"}
-            with _cull_lock:
-                _cull_job["results"].append(r)
-                _cull_job["checked"] += 1
-
-    with _cull_lock:
-        _cull_job["status"] = "done"
-
-
-def _snapshot_cull_state() -> Dict[str, Any]:
-    """Thread-safe snapshot of current cull state."""
-    with _cull_lock:
-        return {
-            "status": _cull_job["status"],
-            "total": _cull_job["total"],
-            "checked": _cull_job["checked"],
-            "results": list(_cull_job["results"]),
-        }
 from .database import (
+    archive_queue_stats,
     backup_bookerics_db,
+    collect_thumbnail_garbage,
     create_bookmark,
     create_feed,
     delete_bookmark_by_id,
+    enqueue_missing_archives,
     fetch_bookmark_by_id,
     fetch_bookmark_by_url,
     fetch_bookmarks,
     fetch_bookmarks_all,
     fetch_bookmarks_by_tag,
+    fetch_bookmarks_missing_thumbnails,
+    fetch_suspect_thumbnails,
     fetch_unique_tags,
     get_bookmark_count,
     schedule_upload_to_hosting,
+    SEARCH_SCOPES,
     search_bookmarks,
-    search_bookmarks_all,
+    similar_bookmarks,
+    apply_tag_changes,
+    preview_tag_changes,
+    resolve_tag_mapping,
     update_bookmark_description,
     update_bookmark_tags,
     update_bookmark_title,
     verify_table_structure,
     Bookmark,
 )
+from .backfill import start_thumbnail_backfill, thumbnail_backfill
+from .cull import cull_changes, cull_state, start_cull
+from .constants import SUGGEST_MIN_CONFIDENCE
+from .events import CLOSED, CULL_PROGRESS, THUMBNAIL_READY, event_bus
+from .related import related_index
+from .suggest import tag_suggester
+from .snapshots import snapshot_backfill, snapshot_store, start_snapshot_backfill
 from .main import rt as main_fasthtml_router
 from .utils import logger
 
@@ -169,12 +114,17 @@ async def bookmarks_page(request: Request):
     page: int = int(request.query_params.get("page", 2))
     kind: str = request.query_params.get("kind", "newest") or "newest"
     query: str = request.query_params.get("query", "")  # Add support for search query
+    scope: str = request.query_params.get("scope", "all")
+    if scope not in SEARCH_SCOPES:
+        scope = "all"
 
     logger.info(f"📄 Loading page {page} for kind {kind}, query: '{query}'")
 
     # Handle search pagination
     if kind == "search" and query:
-        bookmarks: List[Bookmark] = search_bookmarks(query, page=page, per_page=25)
+        bookmarks, total = search_bookmarks(query, page=page, per_page=25, scope=scope)
+        if scope in ("all", "hybrid"):
+            snapshot_store.attach_snippets(bookmarks, query)
         logger.info(f"📄 Loaded {len(bookmarks)} search results for page {page}")
 
         # If no bookmarks, return empty response
@@ -183,13 +133,13 @@ async def bookmarks_page(request: Request):
             return HTMLResponse("", status_code=200)
 
         # Add infinite scroll trigger to the last bookmark if there might be more results
-        all_search_results = search_bookmarks_all(query)
-        if len(all_search_results) > page * 25:
+        if total > page * 25:
             last_bookmark = bookmarks[-1]
             last_bookmark["is_last"] = True
             last_bookmark["next_page"] = page + 1
             last_bookmark["kind"] = "search"
             last_bookmark["query"] = query
+            last_bookmark["scope"] = scope
 
     else:
         # Handle regular pagination (newest, oldest, untagged)
@@ -273,6 +223,7 @@ async def tags_route():
         NavMenu(bookmark_count=bookmark_count, active="tags"),
         SearchBar(),
         TagCloud(tags=tag_list),
+        Div(A("Manage tags", href="/tags/manage"), cls="tag-manage-link"),
     )
 
 
@@ -288,6 +239,74 @@ async def tags_newest_route():
     )
 
 
+def _parse_tag_mapping(form_data: Any) -> Tuple[Dict[str, Optional[str]], str]:
+    """Build a tag mapping from the tag management form; returns (mapping, error)."""
+    operation = str(form_data.get("operation", "rename"))
+    tags = str(form_data.get("tags", "")).split()
+    target = str(form_data.get("target", "")).strip()
+    mapping: Dict[str, Optional[str]] = {}
+
+    if operation == "delete":
+        mapping.update({tag: None for tag in tags})
+    elif tags or target:
+        if not tags or not target or " " in target:
+            return {}, "Pick the tag(s) to change and a single new tag name."
+        if operation == "rename" and len(tags) > 1:
+            return {}, "Rename takes one tag; use merge for several."
+        mapping.update({tag: target for tag in tags})
+
+    # Synonyms: "alias = canonical" (or "alias canonical"), one per line
+    for line in str(form_data.get("synonyms", "")).splitlines():
+        parts = line.replace("=", " ").split()
+        if not parts:
+            continue
+        if len(parts) != 2:
+            return {}, f"Couldn't read synonym line: {line!r}"
+        mapping[parts[0]] = parts[1]
+
+    if not mapping:
+        return {}, "Nothing to change."
+    try:
+        return resolve_tag_mapping(mapping), ""
+    except ValueError as e:
+        return {}, str(e)
+
+
+@main_fasthtml_router("/tags/manage")
+async def tag_manage_route():
+    bookmark_count = get_bookmark_count(kind="newest")
+    return Page(
+        NavMenu(bookmark_count=bookmark_count, active="tags"),
+        SearchBar(),
+        TagManagePage(tags=fetch_unique_tags(kind="frequency")),
+    )
+
+
+@main_fasthtml_router("/tags/manage/preview", methods=["POST"])
+async def tag_manage_preview_route(request: Request):
+    mapping, error = _parse_tag_mapping(await request.form())
+    if error:
+        return HTMLResponse(to_xml(TagChangeReport({}, error=error)))
+    report = preview_tag_changes(mapping)
+    return HTMLResponse(to_xml(TagChangeReport(report)))
+
+
+@main_fasthtml_router("/tags/manage/apply", methods=["POST"])
+async def tag_manage_apply_route(request: Request):
+    mapping, error = _parse_tag_mapping(await request.form())
+    if error:
+        return HTMLResponse(to_xml(TagChangeReport({}, error=error)))
+    report = await apply_tag_changes(mapping)
+    return HTMLResponse(
+        to_xml(TagChangeReport(report, applied=True)),
+        headers={
+            "HX-Trigger": json.dumps(
+                {"showToast": f"Tags updated on {report['bookmarks']:,} bookmarks."}
+            )
+        },
+    )
+
+
 @main_fasthtml_router("/tags/{tag}")
 async def bookmarks_by_tag_route(tag: str):
     bookmarks_for_tag: List[Bookmark] = fetch_bookmarks_by_tag(tag)
@@ -295,6 +314,7 @@ async def bookmarks_by_tag_route(tag: str):
     return Page(
         NavMenu(bookmark_count=len(bookmarks_for_tag)),
         SearchBar(),
+        RelatedTags(related_index.related_tags(tag)),
         BookmarkImageList(bookmarks=bookmarks_for_tag),
         title_str=f"Bookerics - Tag: {tag}",
     )
@@ -329,12 +349,29 @@ async def bookmark_by_id_partial(id: str):
     bookmark: Optional[Bookmark] = await fetch_bookmark_by_id(id=id)
     if not bookmark:
         return HTMLResponse("Bookmark not found", status_code=404)
+    # Precomputed, so the related strip costs no query
+    bookmark["related"] = related_index.related(bookmark["id"])
     bookmarks: List[Bookmark] = [bookmark]
     # BookmarkImageList returns a Div component, convert to HTML fragment for HTMX
     component = BookmarkImageList(bookmarks=bookmarks)
     return HTMLResponse(to_xml(component))
 
 
+@main_fasthtml_router("/similar/{id}")
+async def similar_bookmarks_route(id: str):
+    bookmark: Optional[Bookmark] = await fetch_bookmark_by_id(id=id)
+    if not bookmark:
+        return HTMLResponse("Bookmark not found", status_code=404)
+    similar: List[Bookmark] = similar_bookmarks(int(id), limit=24)
+    bookmark_count = get_bookmark_count(kind="newest")
+    return Page(
+        NavMenu(bookmark_count=bookmark_count),
+        SearchBar(),
+        Div(f"Similar to “{bookmark['title']}”", cls="bookmark-list-switcher"),
+        BookmarkImageList(bookmarks=similar),
+    )
+
+
 @main_fasthtml_router("/id/c/{id}")  # Changed from @app.get
 async def bookmark_by_id_compact_partial(id: str):
     bookmark: Optional[Bookmark] = await fetch_bookmark_by_id(id=id)
@@ -350,6 +387,12 @@ async def bookmark_by_id_compact_partial(id: str):
 async def search_route(request: Request):
     query: str = request.query_params.get("query", "")
     page: int = int(request.query_params.get("page", 1))
+    scope: str = request.query_params.get("scope", "all")
+    # ?mode=hybrid mixes in nearest neighbours from the vector index
+    if request.query_params.get("mode") == "hybrid":
+        scope = "hybrid"
+    if scope not in SEARCH_SCOPES:
+        scope = "all"
     logger.info(f"🔍 Received search request with query: '{query}', page: {page}")
 
     if not query.strip():
@@ -362,30 +405,28 @@ async def search_route(request: Request):
 
     try:
         # Get paginated search results and total count
-        searched_bookmarks: List[Bookmark] = search_bookmarks(
-            query, page=page, per_page=25
-        )
-        all_search_results: List[Bookmark] = search_bookmarks_all(
-            query
-        )  # For total count
+        searched_bookmarks, total = search_bookmarks(query, page=page, per_page=25, scope=scope)
+        if scope in ("all", "hybrid"):
+            snapshot_store.attach_snippets(searched_bookmarks, query)
         logger.info(
-            f"🔍 Search completed successfully, found {len(searched_bookmarks)} bookmarks on page {page}, total: {len(all_search_results)}"
+            f"🔍 Search completed successfully, found {len(searched_bookmarks)} bookmarks on page {page}, total: {total}"
         )
 
         # Add infinite scroll trigger to the last bookmark if we have bookmarks and there might be more
-        if searched_bookmarks and len(all_search_results) > page * 25:
+        if searched_bookmarks and total > page * 25:
             last_bookmark = searched_bookmarks[-1]
             last_bookmark["is_last"] = True
             last_bookmark["next_page"] = page + 1
             last_bookmark["kind"] = "search"
             last_bookmark["query"] = query
+            last_bookmark["scope"] = scope
 
         # Return all components since #results-container contains NavMenu, SearchBar, and BookmarkImageList
         logger.info(
             f"🔍 Creating components with {len(searched_bookmarks)} search results"
         )
         return Div(
-            NavMenu(bookmark_count=len(all_search_results)),
+            NavMenu(bookmark_count=total),
             SearchBar(query=query),
             BookmarkImageList(
                 bookmarks=searched_bookmarks
@@ -402,14 +443,48 @@ async def search_route(request: Request):
 # utils
 
 
+@main_fasthtml_router("/ai/backfill")
+async def ai_enrichment_page_route():
+    bookmark_count = get_bookmark_count(kind="newest")
+    untagged = get_bookmark_count(kind="untagged")
+    return Page(
+        NavMenu(bookmark_count=bookmark_count),
+        SearchBar(),
+        AIEnrichmentPage(state=ai_enrichment.snapshot(), untagged=untagged),
+    )
+
+
+@main_fasthtml_router("/ai/backfill/start", methods=["POST"])
+async def ai_enrichment_start_route():
+    if start_ai_enrichment():
+        # Let the task fetch its work list so the first render shows totals
+        await asyncio.sleep(0)
+    return HTMLResponse(to_xml(AIEnrichmentFragment(state=ai_enrichment.snapshot())))
+
+
+@main_fasthtml_router("/ai/backfill/stop", methods=["POST"])
+async def ai_enrichment_stop_route():
+    ai_enrichment.request_stop()
+    return HTMLResponse(to_xml(AIEnrichmentFragment(state=ai_enrichment.snapshot())))
+
+
+@main_fasthtml_router("/ai/backfill/progress")
+async def ai_enrichment_progress_route():
+    return HTMLResponse(to_xml(AIEnrichmentFragment(state=ai_enrichment.snapshot())))
+
+
 @main_fasthtml_router("/ai/{id}")
-async def get_ai_info_for_bookmark_by_id_route(id: str) -> HTMLResponse:
+async def get_ai_info_for_bookmark_by_id_route(id: str, request: Request) -> HTMLResponse:
     bookmark: Optional[Bookmark] = await fetch_bookmark_by_id(id=id)
     if not bookmark:
         return HTMLResponse("Bookmark not found for AI processing.", status_code=404)
 
+    # ?force=1 skips the cached answer and asks the model again
+    force = request.query_params.get("force") in ("1", "true")
     try:
-        ai_tags, ai_description = await get_tags_and_description_from_bookmark(bookmark)
+        ai_tags, ai_description = await get_tags_and_description_from_bookmark(
+            bookmark, force=force
+        )
         if ai_tags:
             await update_bookmark_tags(id=id, tags=ai_tags)
         if ai_description:
@@ -428,29 +503,6 @@ async def get_ai_info_for_bookmark_by_id_route(id: str) -> HTMLResponse:
         return HTMLResponse(f"Error: {e}", status_code=500)
 
 
-@main_fasthtml_router("/get_thumbnail/{id}")
-async def get_thumbnail_route(request: Request) -> HTMLResponse:
-    bookmark_id: str = request.path_params["id"]
-    headers = {"HX-Trigger": "loadThumbnail"}
-    bookmark: Optional[Bookmark] = await fetch_bookmark_by_id(bookmark_id)
-    if bookmark and bookmark.get("thumbnail_url"):
-        # Using PreviewImage component to render the image tag for consistency
-        # PreviewImage itself handles placeholder logic if thumbnail_url is empty, though here we check it.
-        img_component = PreviewImage(
-            src=bookmark["thumbnail_url"], id=f"thumbnail-{bookmark_id}"
-        )
-        img_html = to_xml(img_component)
-        return HTMLResponse(img_html, headers=headers)
-
-    logging.error(f"💥 Bookmark or thumbnail not found for id: {bookmark_id}")
-    # Return a placeholder or an empty response with appropriate status
-    img_component = PreviewImage(
-        src=None, id=f"thumbnail-{bookmark_id}"
-    )  # Shows placeholder
-    img_html = to_xml(img_component)
-    return HTMLResponse(img_html, headers=headers, status_code=404)
-
-
 @main_fasthtml_router("/check")
 async def check_if_bookmark_already_saved_route(request: Request):
     url: Union[str, None] = request.query_params.get("url", "")
@@ -539,6 +591,19 @@ async def add_bookmark_route(request: Request):
 
         return Response("Failed to fetch new bookmark.", status_code=500)
 
+    if not tags:
+        # The local suggester answers instantly; the LLM is only asked when it
+        # isn't confident or there's no description to go with the tags
+        suggested = [
+            tag
+            for tag, confidence in tag_suggester.suggest(title, url, description)
+            if confidence >= SUGGEST_MIN_CONFIDENCE
+        ]
+        if len(suggested) >= 2 and description.strip():
+            logger.info(f"🏷️ Using local tag suggestions for {url}: {suggested}")
+            await update_bookmark_tags(id=str(bookmark_id), tags=suggested)
+            tags = suggested
+
     if not tags:
         try:
             ai_tags, ai_description = await get_tags_and_description_from_bookmark(
@@ -559,22 +624,77 @@ async def add_bookmark_route(request: Request):
     return Response("Bookmark added successfully.", headers=headers)
 
 
+@main_fasthtml_router("/suggest")
+async def suggest_tags_route(request: Request):
+    """Local tag suggestions for arbitrary metadata, e.g. from the bookmarklet."""
+    params = request.query_params
+    limit = params.get("limit", "4")
+    if not limit.isdigit():
+        return JSONResponse(
+            {"status": "error", "message": "limit must be a whole number."}, status_code=400
+        )
+    current = params.get("tags", "").split()
+    suggestions = tag_suggester.suggest(
+        params.get("title", ""),
+        params.get("url", ""),
+        params.get("description", ""),
+        limit=min(max(int(limit), 1), 20),
+        exclude=current,
+    )
+    return JSONResponse(
+        {
+            "status": "success",
+            "message": f"{len(suggestions)} suggestion(s)",
+            "suggestions": [{"tag": t, "confidence": c} for t, c in suggestions],
+        }
+    )
+
+
+@main_fasthtml_router("/suggest/{id}")
+async def suggest_tags_for_bookmark_route(id: str):
+    bookmark: Optional[Bookmark] = await fetch_bookmark_by_id(id=id)
+    if not bookmark:
+        return HTMLResponse("Bookmark not found", status_code=404)
+    suggestions = tag_suggester.suggest(
+        bookmark["title"] or "",
+        bookmark["url"] or "",
+        bookmark["description"] or "",
+        exclude=bookmark.get("tags", []),
+    )
+    return HTMLResponse(to_xml(TagSuggestions(suggestions)))
+
+
 @main_fasthtml_router("/update")  # Changed from @app.get
-async def update_route():
+async def update_route(request: Request):
+    dry_run = request.query_params.get("dry_run", "") in ("1", "true", "yes")
     try:
+        if dry_run:
+            # Rebuild feeds locally and report what a sync would upload
+            all_bookmarks = fetch_bookmarks_all(kind="newest")
+            await create_feed(tag=None, bookmarks=all_bookmarks, publish=False)
+            report = await schedule_upload_to_hosting(dry_run=True)
+            return JSONResponse(
+                {
+                    "status": "success",
+                    "message": f"Dry run: {report.get('bytes_saved', 0):,} bytes would be saved.",
+                    "report": report,
+                }
+            )
+
         backup_bookerics_db()
 
         # Create and upload the main RSS feed
         all_bookmarks = fetch_bookmarks_all(kind="newest")
         await create_feed(tag=None, bookmarks=all_bookmarks, publish=True)
 
-        # Upload all feeds to hosting
-        await schedule_upload_to_hosting()
+        # Upload any other changed feed files to hosting
+        report = await schedule_upload_to_hosting()
 
         return JSONResponse(
             {
                 "status": "success",
                 "message": "Database backed up and RSS feed updated successfully.",
+                "report": report,
             }
         )
     except Exception as e:
@@ -582,13 +702,83 @@ async def update_route():
         return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
 
 
-@main_fasthtml_router("/update_thumbnail/{id}")  # Changed from @app.get
-async def update_thumbnail_route(request: Request) -> JSONResponse:
-    bookmark_id: str = request.path_params["id"]
-    # The actual thumbnail URL is fetched by /get_thumbnail/{id} or embedded.
-    headers = {"HX-Trigger": json.dumps({"loadThumbnail": f"#{bookmark_id}"})}
-    logger.info(f"Sending HX-Trigger header for bookmark id: {bookmark_id}")
-    return JSONResponse({"status": "thumbnail update triggered"}, headers=headers)
+@main_fasthtml_router("/thumbnails/gc", methods=["GET", "POST"])
+async def thumbnail_gc_route(request: Request):
+    """GET previews what would be deleted; only a POST deletes anything."""
+    dry_run = request.query_params.get("dry_run", "") in ("1", "true", "yes")
+    if request.method != "POST":
+        dry_run = True
+    try:
+        report = await collect_thumbnail_garbage(dry_run=dry_run)
+        verb = "would be" if dry_run else "were"
+        return JSONResponse(
+            {
+                "status": "success",
+                "message": f"{len(report['removed'])} unreferenced thumbnails {verb} removed.",
+                "report": report,
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error collecting thumbnails: {e}")
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
+
+
+@main_fasthtml_router("/events/thumbnails")
+async def thumbnail_events_route(request: Request):
+    """Server-Sent Events: one `thumbnail` event per image as it becomes ready.
+
+    Each event carries the bookmark id and the rendered image, which the
+    page swaps in for `#thumbnail-{id}` if it is showing that bookmark.
+    """
+
+    async def stream():
+        with event_bus.subscribe(THUMBNAIL_READY) as queue:
+            # Tell EventSource to wait a bit before reconnecting after a restart
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                if event is CLOSED:
+                    break
+                bookmark_id = event["bookmark_id"]
+                html = to_xml(
+                    PreviewImage(
+                        src=event["thumbnail_url"],
+                        variants=event["variants"],
+                        placeholder=event["placeholder"],
+                        id=f"thumbnail-{bookmark_id}",
+                    )
+                )
+                data = json.dumps({"id": bookmark_id, "html": html})
+                yield f"event: thumbnail\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@main_fasthtml_router("/archive/status")
+async def archive_status_route():
+    return JSONResponse({"status": "success", "queue": archive_queue_stats()})
+
+
+@main_fasthtml_router("/archive/backfill", methods=["POST"])
+async def archive_backfill_route():
+    """Queue every bookmark without an archive URL; the archiver paces them."""
+    queued = enqueue_missing_archives()
+    return JSONResponse(
+        {
+            "status": "success",
+            "message": f"{queued:,} bookmarks queued for archiving.",
+            "queue": archive_queue_stats(),
+        }
+    )
 
 
 @main_fasthtml_router("/delete/{bookmark_id}", methods=["DELETE"])
@@ -795,7 +985,7 @@ async def close_modal():
 @main_fasthtml_router("/cull")
 async def cull_page_route():
     bookmark_count = get_bookmark_count(kind="newest")
-    state = _snapshot_cull_state()
+    state = cull_state()
     return Page(
         NavMenu(bookmark_count=bookmark_count),
         SearchBar(),
@@ -804,20 +994,178 @@ async def cull_page_route():
 
 
 @main_fasthtml_router("/cull/start", methods=["POST"])
-async def cull_start_route():
-    with _cull_lock:
-        already_running = _cull_job["status"] == "running"
-
-    if not already_running:
-        bookmarks = fetch_bookmarks_all(kind="newest")
-        thread = threading.Thread(target=_run_cull_job, args=(bookmarks,), daemon=True)
-        thread.start()
-
-    state = _snapshot_cull_state()
+async def cull_start_route(request: Request):
+    form = await request.form()
+    if start_cull(full=form.get("full") == "1"):
+        # Let the task start so the first render shows totals
+        await asyncio.sleep(0)
+    state = cull_state()
     return HTMLResponse(to_xml(CullResultsFragment(state=state)))
 
 
 @main_fasthtml_router("/cull/progress")
 async def cull_progress_route():
-    state = _snapshot_cull_state()
+    state = cull_state()
     return HTMLResponse(to_xml(CullResultsFragment(state=state)))
+
+
+@main_fasthtml_router("/cull/stream")
+async def cull_stream_route(request: Request):
+    """Server-Sent Events for a running cull.
+
+    A `results` event carries the rendered items that changed since the
+    last one, each tagged with the group it belongs in, and the ids of
+    links that are healthy again. A `progress` event carries the counters.
+    `done` tells the page to fetch the final fragment.
+    """
+
+    async def stream():
+        sent = 0
+        with event_bus.subscribe(CULL_PROGRESS) as queue:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                changes, progress = cull_changes(sent)
+                sent += len(changes)
+                if changes:
+                    items = []
+                    resolved = []
+                    for change in changes:
+                        if change.get("resolved"):
+                            resolved.append(change["id"])
+                            continue
+                        group = cull_group_index(change)
+                        if group is not None:
+                            items.append(
+                                {"id": change["id"], "group": group, "html": to_xml(CullItem(change))}
+                            )
+                    data = json.dumps({"items": items, "resolved": resolved})
+                    yield f"event: results\ndata: {data}\n\n"
+                yield f"event: progress\ndata: {json.dumps(progress)}\n\n"
+                if progress["status"] != "running":
+                    yield "event: done\ndata: {}\n\n"
+                    break
+
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is CLOSED:
+                    break
+                # Results arrive in bursts; send each burst as one message
+                await asyncio.sleep(0.25)
+                while not queue.empty():
+                    if queue.get_nowait() is CLOSED:
+                        return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Thumbnail backfill routes
+# ---------------------------------------------------------------------------
+
+
+@main_fasthtml_router("/thumbnails/backfill")
+async def thumbnail_backfill_page_route():
+    bookmark_count = get_bookmark_count(kind="newest")
+    missing = len(fetch_bookmarks_missing_thumbnails())
+    return Page(
+        NavMenu(bookmark_count=bookmark_count),
+        SearchBar(),
+        ThumbnailBackfillPage(state=thumbnail_backfill.snapshot(), missing=missing),
+    )
+
+
+@main_fasthtml_router("/thumbnails/backfill/start", methods=["POST"])
+async def thumbnail_backfill_start_route():
+    if start_thumbnail_backfill():
+        # Let the task fetch its work list so the first render shows totals
+        await asyncio.sleep(0)
+    state = thumbnail_backfill.snapshot()
+    return HTMLResponse(to_xml(ThumbnailBackfillFragment(state=state)))
+
+
+@main_fasthtml_router("/thumbnails/backfill/stop", methods=["POST"])
+async def thumbnail_backfill_stop_route():
+    thumbnail_backfill.request_stop()
+    state = thumbnail_backfill.snapshot()
+    return HTMLResponse(to_xml(ThumbnailBackfillFragment(state=state)))
+
+
+@main_fasthtml_router("/thumbnails/backfill/progress")
+async def thumbnail_backfill_progress_route():
+    state = thumbnail_backfill.snapshot()
+    return HTMLResponse(to_xml(ThumbnailBackfillFragment(state=state)))
+
+
+@main_fasthtml_router("/thumbnails/suspect")
+async def suspect_thumbnails_route():
+    bookmark_count = get_bookmark_count(kind="newest")
+    return Page(
+        NavMenu(bookmark_count=bookmark_count),
+        SearchBar(),
+        SuspectThumbnailsPage(report=fetch_suspect_thumbnails()),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Local page snapshots
+# ---------------------------------------------------------------------------
+
+
+@main_fasthtml_router("/snapshot/{id}")
+async def snapshot_route(id: str):
+    bookmark = await fetch_bookmark_by_id(id)
+    meta = (
+        await asyncio.to_thread(snapshot_store.meta, int(id))
+        if bookmark and id.isdigit()
+        else None
+    )
+    if not bookmark or not meta:
+        return HTMLResponse("No snapshot saved for this bookmark.", status_code=404)
+    text = await asyncio.to_thread(snapshot_store.load, int(id), "text")
+    bookmark_count = get_bookmark_count(kind="newest")
+    return Page(
+        NavMenu(bookmark_count=bookmark_count),
+        SearchBar(),
+        SnapshotPage(bookmark=bookmark, meta=meta, text=(text or b"").decode("utf-8")),
+    )
+
+
+@main_fasthtml_router("/snapshot/{id}/raw")
+async def snapshot_raw_route(id: str):
+    html = await asyncio.to_thread(snapshot_store.load, int(id), "html") if id.isdigit() else None
+    if html is None:
+        return Response("No snapshot saved for this bookmark.", status_code=404)
+    # Sandboxed so the saved page's scripts can't run with this app's origin
+    return Response(
+        html,
+        media_type="text/html",
+        headers={"Content-Security-Policy": "sandbox", "X-Content-Type-Options": "nosniff"},
+    )
+
+
+@main_fasthtml_router("/snapshots/status")
+async def snapshots_status_route():
+    stats = await asyncio.to_thread(snapshot_store.stats)
+    return JSONResponse(
+        {"status": "success", "store": stats, "backfill": snapshot_backfill.snapshot()}
+    )
+
+
+@main_fasthtml_router("/snapshots/backfill", methods=["POST"])
+async def snapshots_backfill_route():
+    started = start_snapshot_backfill()
+    return JSONResponse(
+        {
+            "status": "success",
+            "message": "Snapshot backfill started." if started else "Snapshot backfill already running.",
+            "backfill": snapshot_backfill.snapshot(),
+        }
+    )
+
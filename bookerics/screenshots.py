@@ -0,0 +1,160 @@
+import asyncio
+from typing import Dict, Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from .constants import (
+    SCREENSHOT_MAX_USES,
+    SCREENSHOT_PAGE_TIMEOUT,
+    SCREENSHOT_POOL_SIZE,
+)
+from .utils import logger
+
+
+class ScreenshotService:
+    """A small pool of warm Chromium contexts that take bookmark screenshots.
+
+    The browser is launched once, on first use. Each capture borrows a
+    context from the pool, so at most `pool_size` pages render at a time.
+    Contexts are thrown away and replaced after `max_uses` captures or after
+    any failure, which keeps cookies, caches and leaked pages from piling up.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 2,
+        page_timeout: float = 20.0,
+        max_uses: int = 25,
+        width: int = 1280,
+        height: int = 720,
+        settle_ms: int = 500,
+    ):
+        self.pool_size = pool_size
+        self.page_timeout = page_timeout
+        self.max_uses = max_uses
+        self.width = width
+        self.height = height
+        self.settle_ms = settle_ms
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._contexts: Optional[asyncio.Queue] = None
+        self._uses: Dict[BrowserContext, int] = {}
+        self._start_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._browser is not None:
+                logger.warning("📸 Browser went away, restarting screenshot pool")
+                await self._shutdown()
+
+            logger.info(f"📸 Launching screenshot pool ({self.pool_size} contexts)")
+            self._playwright = await async_playwright().start()
+            try:
+                self._browser = await self._playwright.chromium.launch()
+            except Exception as e:
+                await self._playwright.stop()
+                self._playwright = None
+                # Never install browsers on the request path; that is a setup step
+                raise RuntimeError(
+                    f"Could not launch Chromium ({e}). Run `playwright install chromium`."
+                ) from e
+
+            self._contexts = asyncio.Queue()
+            for _ in range(self.pool_size):
+                await self._contexts.put(await self._new_context())
+
+    async def _new_context(self) -> BrowserContext:
+        assert self._browser is not None
+        context = await self._browser.new_context(
+            viewport={"width": self.width, "height": self.height}
+        )
+        self._uses[context] = 0
+        return context
+
+    async def _recycle(self, context: BrowserContext) -> BrowserContext:
+        self._uses.pop(context, None)
+        try:
+            await context.close()
+        except Exception:
+            pass
+        return await self._new_context()
+
+    async def _render(self, context: BrowserContext, url: str) -> bytes:
+        page = await context.new_page()
+        try:
+            timeout_ms = self.page_timeout * 1000
+            page.set_default_timeout(timeout_ms)
+            await page.goto(url, wait_until="load", timeout=timeout_ms)
+            # Give late layout and web fonts a moment, like shot-scraper does
+            await page.wait_for_timeout(self.settle_ms)
+            return await page.screenshot(type="jpeg", quality=90)
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def capture(self, url: str) -> bytes:
+        """Render `url` at the pool's viewport size and return JPEG bytes."""
+        await self.start()
+        queue = self._contexts
+        assert queue is not None
+        context = await queue.get()
+        failed = False
+        try:
+            # Hard ceiling in case navigation hangs past Playwright's own timeout
+            return await asyncio.wait_for(
+                self._render(context, url), timeout=self.page_timeout + 10
+            )
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if queue is not self._contexts:
+                # The pool was restarted or closed while this capture ran, so
+                # the context belongs to a browser that is gone; don't hand
+                # it (or a replacement) to a queue nobody reads any more
+                self._uses.pop(context, None)
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            else:
+                self._uses[context] = self._uses.get(context, 0) + 1
+                if failed or self._uses[context] >= self.max_uses:
+                    try:
+                        context = await self._recycle(context)
+                    except Exception as e:
+                        logger.error(f"💥 Could not replace screenshot context: {e}")
+                await queue.put(context)
+
+    async def _shutdown(self) -> None:
+        for context in list(self._uses):
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._uses.clear()
+        self._contexts = None
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def close(self) -> None:
+        async with self._start_lock:
+            await self._shutdown()
+
+
+screenshot_service = ScreenshotService(
+    pool_size=SCREENSHOT_POOL_SIZE,
+    page_timeout=SCREENSHOT_PAGE_TIMEOUT,
+    max_uses=SCREENSHOT_MAX_USES,
+)
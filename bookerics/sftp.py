@@ -0,0 +1,164 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+import asyncssh
+
+from .constants import (
+    BOOKERICS_PASSWORD,
+    BOOKERICS_SERVER,
+    BOOKERICS_SFTP_PARALLELISM,
+    BOOKERICS_SFTP_PORT,
+    BOOKERICS_USERNAME,
+)
+from .utils import logger
+
+
+# SFTPError subclasses that mean the channel is gone, not that the remote
+# side refused the file
+_CONNECTION_ERRORS = (asyncssh.SFTPConnectionLost, asyncssh.SFTPNoConnection)
+
+
+class _PoolClient(asyncssh.SSHClient):
+    """Tells the pool when the server side drops the connection."""
+
+    def __init__(self, pool: "SFTPPool"):
+        self._pool = pool
+        self._conn: Optional[asyncssh.SSHClientConnection] = None
+
+    def connection_made(self, conn: asyncssh.SSHClientConnection) -> None:
+        self._conn = conn
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._pool._mark_lost(exc, self._conn)
+
+
+class SFTPPool:
+    """One long-lived SSH connection and SFTP session shared by every upload.
+
+    The connection is opened lazily, kept alive with SSH keepalives, and
+    re-established once if an upload fails because it went away. Up to
+    `max_parallel` puts run concurrently over the single SFTP channel.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str],
+        username: Optional[str],
+        password: Optional[str],
+        port: int = 22,
+        max_parallel: int = 4,
+        keepalive_interval: int = 30,
+        connect_timeout: int = 15,
+        known_hosts: Optional[str] = None,
+    ):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.port = port
+        self.max_parallel = max_parallel
+        self.keepalive_interval = keepalive_interval
+        self.connect_timeout = connect_timeout
+        self.known_hosts = known_hosts
+        self._conn: Optional[asyncssh.SSHClientConnection] = None
+        self._sftp: Optional[asyncssh.SFTPClient] = None
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_parallel)
+
+    @property
+    def configured(self) -> bool:
+        return all([self.host, self.username, self.password])
+
+    def _mark_lost(
+        self,
+        exc: Optional[Exception],
+        conn: Optional[asyncssh.SSHClientConnection] = None,
+    ) -> None:
+        # Ignore late notifications from a connection we already replaced
+        if conn is not None and conn is not self._conn:
+            return
+        if exc:
+            logger.warning(f"🔌 SFTP connection lost: {exc}")
+        self._conn = None
+        self._sftp = None
+
+    async def _client(self) -> asyncssh.SFTPClient:
+        async with self._lock:
+            if self._sftp is None:
+                logger.info(f"🔌 Opening SFTP connection to {self.host}:{self.port}")
+                conn = await asyncssh.connect(
+                    self.host,
+                    port=self.port,
+                    client_factory=lambda: _PoolClient(self),
+                    username=self.username,
+                    password=self.password,
+                    known_hosts=self.known_hosts,
+                    keepalive_interval=self.keepalive_interval,
+                    keepalive_count_max=3,
+                    connect_timeout=self.connect_timeout,
+                )
+                try:
+                    self._sftp = await conn.start_sftp_client()
+                except Exception:
+                    conn.close()
+                    raise
+                self._conn = conn
+            return self._sftp
+
+    async def _reset(self, stale: Optional[asyncssh.SFTPClient]) -> None:
+        async with self._lock:
+            # Another upload may already have reconnected
+            if stale is not None and self._sftp is not stale:
+                return
+            conn = self._conn
+            self._mark_lost(None)
+        if conn is not None:
+            conn.close()
+
+    async def put(self, local_path: str, remote_path: str, retries: int = 1) -> bool:
+        """Upload one file, reconnecting and retrying on connection failure."""
+        if not self.configured:
+            logger.error("💥 Web hosting credentials not configured")
+            return False
+
+        async with self._semaphore:
+            for attempt in range(retries + 1):
+                sftp = None
+                try:
+                    sftp = await self._client()
+                    await sftp.put(local_path, remote_path)
+                    logger.info(f"⬆️ Uploaded {local_path} to {remote_path}")
+                    return True
+                except (asyncssh.Error, OSError) as e:
+                    if isinstance(e, (asyncssh.SFTPError, FileNotFoundError)) and not isinstance(
+                        e, _CONNECTION_ERRORS
+                    ):
+                        # The connection is fine; the file or remote path is not
+                        logger.error(f"💥 Error uploading {local_path} via SFTP: {e}")
+                        break
+                    await self._reset(sftp)
+                    if attempt < retries:
+                        logger.warning(f"🔁 Retrying upload of {local_path}: {e}")
+                        continue
+                    logger.error(f"💥 Error uploading {local_path} via SFTP: {e}")
+                except Exception as e:
+                    logger.error(f"💥 Error uploading {local_path} via SFTP: {e}")
+                    break
+        return False
+
+    async def put_many(self, files: List[Tuple[str, str]]) -> List[bool]:
+        """Upload (local_path, remote_path) pairs in parallel over one connection."""
+        return list(
+            await asyncio.gather(*(self.put(local, remote) for local, remote in files))
+        )
+
+    async def close(self) -> None:
+        await self._reset(None)
+
+
+sftp_pool = SFTPPool(
+    BOOKERICS_SERVER,
+    BOOKERICS_USERNAME,
+    BOOKERICS_PASSWORD,
+    port=BOOKERICS_SFTP_PORT,
+    max_parallel=BOOKERICS_SFTP_PARALLELISM,
+)
@@ -0,0 +1,614 @@
+import asyncio
+import codecs
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+import zstandard
+
+from .constants import (
+    SNAPSHOT_CONCURRENCY,
+    SNAPSHOT_MAX_BYTES,
+    SNAPSHOT_TIMEOUT,
+)
+from .database import Bookmark, fetch_bookmarks_missing_snapshots, get_db_connection
+from .events import BOOKMARK_CREATED, event_bus
+from .jobs import JobProgress
+from .utils import logger
+
+# ---------------------------------------------------------------------------
+# Main-text extraction
+# ---------------------------------------------------------------------------
+
+_SKIP_TAGS = set(
+    "script style noscript template svg iframe canvas "
+    "nav header footer aside form button select".split()
+)
+_BLOCK_TAGS = set(
+    "p div section article main li ul ol br tr blockquote pre figcaption "
+    "dd dt table h1 h2 h3 h4 h5 h6".split()
+)
+_VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr"}
+
+
+class _TextExtractor(HTMLParser):
+    """Collects readable text, split into blocks, skipping page chrome.
+
+    Text inside <article>/<main> is also kept separately, since that is
+    usually the part worth reading.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self._in_title = False
+        self._skip_depth = 0
+        self._main_depth = 0
+        self.blocks: List[str] = []
+        self.main_blocks: List[str] = []
+        self._current: List[str] = []
+
+    def _flush(self) -> None:
+        text = re.sub(r"\s+", " ", "".join(self._current)).strip()
+        self._current = []
+        if text:
+            self.blocks.append(text)
+            if self._main_depth:
+                self.main_blocks.append(text)
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag == "title":
+            self._in_title = True
+        if tag in _VOID_TAGS:
+            if tag == "br":
+                self._current.append("\n")
+            return
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+        if tag in ("article", "main"):
+            self._main_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._in_title = False
+        if tag in _VOID_TAGS:
+            return
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+        if tag in ("article", "main"):
+            self._flush()
+            self._main_depth = max(0, self._main_depth - 1)
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self._current.append(data)
+
+
+def extract_main_text(html: str) -> Tuple[str, str]:
+    """Return (title, readable text) for an HTML page.
+
+    Paragraphs are separated by blank lines. Prefers the <article>/<main>
+    content when there is a meaningful amount of it.
+    """
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:  # html.parser is lenient, but not infinitely so
+        logger.warning(f"📄 Could not fully parse page: {e}")
+    parser._flush()
+    blocks = parser.main_blocks if sum(map(len, parser.main_blocks)) >= 500 else parser.blocks
+    return re.sub(r"\s+", " ", parser.title).strip(), "\n\n".join(blocks)
+
+
+def text_snippet(text: str, query: str, size: int = 24) -> Optional[str]:
+    """About `size` words of `text` around the first word that matches `query`.
+
+    Words match by prefix, which catches most of what the porter stemmer
+    matched. The text index is contentless, so FTS5's snippet() has no
+    text to work from.
+    """
+    terms = [w.lower() for w in re.findall(r"\w+", query)]
+    if not terms:
+        return None
+    words = text.split()
+    for i, word in enumerate(words):
+        token = re.sub(r"\W+", "", word).lower()
+        if token and any(token.startswith(t) for t in terms):
+            break
+    else:
+        return None
+    start = max(0, i - size // 3)
+    end = min(len(words), start + size)
+    snippet = " ".join(words[start:end])
+    return ("…" if start else "") + snippet + ("…" if end < len(words) else "")
+
+
+# ---------------------------------------------------------------------------
+# Content-defined chunking
+# ---------------------------------------------------------------------------
+
+# A fixed pseudo-random table for the gear rolling hash
+_GEAR = [
+    int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=8).digest(), "big")
+    for i in range(256)
+]
+_MASK64 = (1 << 64) - 1
+
+
+def split_chunks(
+    data: bytes, min_size: int = 2048, avg_bits: int = 13, max_size: int = 65536
+) -> List[bytes]:
+    """Split `data` at content-defined boundaries (about 2**avg_bits bytes apart).
+
+    Boundaries depend only on nearby bytes, so two versions of a page (or
+    two pages sharing a template) produce mostly the same chunks even when
+    something is inserted near the top.
+    """
+    # Test the high bits: in a gear hash each byte shifts one bit further
+    # left, so the top bits depend on the last 64 bytes while the low bits
+    # only see the last few (as in FastCDC)
+    mask = ((1 << avg_bits) - 1) << (64 - avg_bits)
+    chunks = []
+    start, n = 0, len(data)
+    while start < n:
+        end = min(start + max_size, n)
+        i = start + min_size
+        if i >= end:
+            chunks.append(data[start:end])
+            break
+        h = 0
+        while i < end:
+            h = ((h << 1) + _GEAR[data[i]]) & _MASK64
+            i += 1
+            if not h & mask:
+                break
+        chunks.append(data[start:i])
+        start = i
+    return chunks
+
+
+# ---------------------------------------------------------------------------
+# Chunk store (SQLite, zstd with trained dictionaries)
+# ---------------------------------------------------------------------------
+
+
+class SnapshotStore:
+    """Deduplicated, compressed storage for page snapshots.
+
+    A snapshot is a list of chunk hashes per part (`html`, `text`). Each
+    distinct chunk is stored once, compressed with zstd. Once enough chunks
+    exist a dictionary is trained on them; HTML from thousands of sites
+    shares so much boilerplate that dictionary compression roughly doubles
+    the ratio on small chunks. Each chunk records the dictionary it was
+    compressed with, so retraining never invalidates older chunks.
+    """
+
+    def __init__(self, level: int = 12, dict_size: int = 112_640, train_after: int = 500):
+        self.level = level
+        self.dict_size = dict_size
+        self.train_after = train_after
+        self._dicts: Dict[int, zstandard.ZstdCompressionDict] = {}
+        # Saves run in worker threads; one at a time keeps chunk refcounting simple
+        self._write_lock = threading.Lock()
+
+    def _load_dict(self, conn: Any, dict_id: int) -> Optional[zstandard.ZstdCompressionDict]:
+        if dict_id == 0:
+            return None
+        if dict_id not in self._dicts:
+            row = conn.execute(
+                "SELECT data FROM snapshot_dicts WHERE id = ?", (dict_id,)
+            ).fetchone()
+            self._dicts[dict_id] = zstandard.ZstdCompressionDict(row[0])
+        return self._dicts[dict_id]
+
+    def _current_dict_id(self, conn: Any) -> int:
+        row = conn.execute("SELECT MAX(id) FROM snapshot_dicts").fetchone()
+        return row[0] or 0
+
+    def maybe_train(self) -> Optional[int]:
+        """Train the first dictionary once there are enough sample chunks."""
+        with self._write_lock, get_db_connection() as conn:
+            if self._current_dict_id(conn):
+                return None
+            count = conn.execute("SELECT COUNT(*) FROM snapshot_chunks").fetchone()[0]
+            if count < self.train_after:
+                return None
+            return self.train(conn)
+
+    def train(self, conn: Any) -> int:
+        samples = []
+        rows = conn.execute(
+            "SELECT data, dict_id FROM snapshot_chunks ORDER BY RANDOM() LIMIT 2000"
+        ).fetchall()
+        for data, dict_id in rows:
+            samples.append(self._decompress(conn, data, dict_id))
+        trained = zstandard.train_dictionary(self.dict_size, samples)
+        cursor = conn.execute(
+            "INSERT INTO snapshot_dicts (data, created_at) VALUES (?, ?)",
+            (trained.as_bytes(), datetime.now(timezone.utc).isoformat()),
+        )
+        conn.commit()
+        logger.info(f"🗜️ Trained snapshot dictionary {cursor.lastrowid} on {len(samples)} chunks")
+        return cursor.lastrowid
+
+    def _compress(self, conn: Any, data: bytes) -> Tuple[bytes, int]:
+        dict_id = self._current_dict_id(conn)
+        compressor = zstandard.ZstdCompressor(
+            level=self.level, dict_data=self._load_dict(conn, dict_id)
+        )
+        return compressor.compress(data), dict_id
+
+    def _decompress(self, conn: Any, data: bytes, dict_id: int) -> bytes:
+        decompressor = zstandard.ZstdDecompressor(dict_data=self._load_dict(conn, dict_id))
+        return decompressor.decompress(data)
+
+    def save(self, bookmark_id: int, meta: Dict[str, Any], parts: Dict[str, bytes]) -> Dict[str, int]:
+        """Store (or replace) a bookmark's snapshot; returns byte counts."""
+        stats = {"raw_bytes": 0, "new_bytes": 0, "chunks": 0, "new_chunks": 0}
+        with self._write_lock, get_db_connection() as conn:
+            previous = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT chunk_hash FROM snapshot_parts WHERE bookmark_id = ?",
+                    (bookmark_id,),
+                )
+            ]
+            conn.execute("DELETE FROM snapshot_parts WHERE bookmark_id = ?", (bookmark_id,))
+            for part, data in parts.items():
+                for seq, chunk in enumerate(split_chunks(data)):
+                    digest = hashlib.sha256(chunk).hexdigest()
+                    stats["raw_bytes"] += len(chunk)
+                    stats["chunks"] += 1
+                    exists = conn.execute(
+                        "SELECT 1 FROM snapshot_chunks WHERE hash = ?", (digest,)
+                    ).fetchone()
+                    if not exists:
+                        compressed, dict_id = self._compress(conn, chunk)
+                        conn.execute(
+                            "INSERT INTO snapshot_chunks (hash, data, dict_id, size) VALUES (?, ?, ?, ?)",
+                            (digest, compressed, dict_id, len(chunk)),
+                        )
+                        stats["new_bytes"] += len(compressed)
+                        stats["new_chunks"] += 1
+                    conn.execute(
+                        "INSERT INTO snapshot_parts (bookmark_id, part, seq, chunk_hash) VALUES (?, ?, ?, ?)",
+                        (bookmark_id, part, seq, digest),
+                    )
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO snapshots
+                    (bookmark_id, url, final_url, status_code, content_type, title,
+                     html_size, text_size, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    bookmark_id,
+                    meta["url"],
+                    meta.get("final_url"),
+                    meta.get("status_code"),
+                    meta.get("content_type"),
+                    meta.get("title"),
+                    len(parts.get("html", b"")),
+                    len(parts.get("text", b"")),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+            if "text" in parts:
+                self._index(
+                    conn, bookmark_id, meta.get("title") or "", parts["text"].decode("utf-8", "replace")
+                )
+            # Drop chunks that only this bookmark's previous snapshot used
+            for digest in previous:
+                still_used = conn.execute(
+                    "SELECT 1 FROM snapshot_parts WHERE chunk_hash = ? LIMIT 1", (digest,)
+                ).fetchone()
+                if not still_used:
+                    conn.execute("DELETE FROM snapshot_chunks WHERE hash = ?", (digest,))
+            conn.commit()
+        return stats
+
+    def _index(self, conn: Any, bookmark_id: int, title: str, text: str) -> None:
+        """(Re)index a snapshot's text for search; rowid is the bookmark id."""
+        conn.execute("DELETE FROM snapshot_fts WHERE rowid = ?", (bookmark_id,))
+        conn.execute(
+            "INSERT INTO snapshot_fts (rowid, title, body) VALUES (?, ?, ?)",
+            (bookmark_id, title, text),
+        )
+
+    def index_missing(self) -> int:
+        """Index snapshots saved before the search index existed."""
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT s.bookmark_id, s.title FROM snapshots s
+                WHERE s.bookmark_id NOT IN (SELECT rowid FROM snapshot_fts)
+                """
+            ).fetchall()
+        for bookmark_id, title in rows:
+            text = self.load(bookmark_id, "text")
+            if text is None:
+                continue
+            with self._write_lock, get_db_connection() as conn:
+                self._index(conn, bookmark_id, title or "", text.decode("utf-8", "replace"))
+                conn.commit()
+        if rows:
+            logger.info(f"🔍 Indexed text of {len(rows):,} existing snapshot(s)")
+        return len(rows)
+
+    def load(self, bookmark_id: int, part: str) -> Optional[bytes]:
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT c.data, c.dict_id FROM snapshot_parts p
+                JOIN snapshot_chunks c ON c.hash = p.chunk_hash
+                WHERE p.bookmark_id = ? AND p.part = ?
+                ORDER BY p.seq
+                """,
+                (bookmark_id, part),
+            ).fetchall()
+            if not rows:
+                return None
+            return b"".join(self._decompress(conn, data, dict_id) for data, dict_id in rows)
+
+    def attach_snippets(self, bookmarks: List[Bookmark], query: str) -> None:
+        """Show where the page text matched, for results found only by content."""
+        needle = query.lower()
+        for b in bookmarks:
+            if any(
+                needle in str(b.get(field) or "").lower()
+                for field in ("title", "url", "description", "tags")
+            ):
+                continue
+            text = self.load(b["id"], "text")
+            snippet = text_snippet(text.decode("utf-8", "replace"), query) if text else None
+            if snippet:
+                b["content_snippet"] = snippet
+
+    def meta(self, bookmark_id: int) -> Optional[Dict[str, Any]]:
+        with get_db_connection() as conn:
+            row = conn.execute(
+                """
+                SELECT url, final_url, status_code, content_type, title,
+                       html_size, text_size, fetched_at
+                FROM snapshots WHERE bookmark_id = ?
+                """,
+                (bookmark_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = [
+            "url",
+            "final_url",
+            "status_code",
+            "content_type",
+            "title",
+            "html_size",
+            "text_size",
+            "fetched_at",
+        ]
+        return dict(zip(keys, row))
+
+    def stats(self) -> Dict[str, Any]:
+        with get_db_connection() as conn:
+            snapshots, raw = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(html_size + text_size), 0) FROM snapshots"
+            ).fetchone()
+            chunks, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM snapshot_chunks"
+            ).fetchone()
+            dicts = conn.execute("SELECT COUNT(*) FROM snapshot_dicts").fetchone()[0]
+        return {
+            "snapshots": snapshots,
+            "chunks": chunks,
+            "dictionaries": dicts,
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "ratio": round(raw / stored, 2) if stored else None,
+        }
+
+
+snapshot_store = SnapshotStore()
+
+
+# ---------------------------------------------------------------------------
+# Fetching
+# ---------------------------------------------------------------------------
+
+
+class SnapshotService:
+    """Fetches pages and stores their snapshots, a few at a time.
+
+    New bookmarks are picked up from the event bus; `backfill` covers
+    everything saved before snapshots existed. Both share one session and
+    one semaphore, so at most `concurrency` pages are fetched at once.
+    """
+
+    def __init__(self, concurrency: int = 4, timeout: float = 30.0, max_bytes: int = 5_000_000):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: set = set()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5",
+                },
+            )
+        return self._session
+
+    async def _fetch(self, url: str) -> Tuple[Dict[str, Any], bytes]:
+        async with self._get_session().get(url, allow_redirects=True) as resp:
+            content_type = resp.headers.get("Content-Type", "")
+            meta = {
+                "url": url,
+                "final_url": str(resp.url),
+                "status_code": resp.status,
+                "content_type": content_type,
+                "charset": resp.charset,
+            }
+            if "html" not in content_type.lower():
+                return meta, b""
+            body = bytearray()
+            async for block in resp.content.iter_chunked(64 * 1024):
+                body.extend(block)
+                if len(body) > self.max_bytes:
+                    raise ValueError(f"page larger than {self.max_bytes:,} bytes")
+            return meta, bytes(body)
+
+    async def snapshot(self, bookmark_id: int, url: str) -> bool:
+        """Fetch `url` and store it as the snapshot for `bookmark_id`."""
+        if not url.startswith(("http://", "https://")):
+            return False
+        async with self._semaphore:
+            try:
+                meta, html = await self._fetch(url)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning(f"📄 Snapshot of {url} failed: {e}")
+                return False
+        if not html:
+            logger.info(f"📄 Not snapshotting {url} ({meta['content_type'] or 'no content type'})")
+            return False
+
+        def process() -> Dict[str, int]:
+            charset = meta["charset"] or "utf-8"
+            try:
+                codecs.lookup(charset)
+            except LookupError:
+                # Servers send all sorts of made-up charset names
+                charset = "utf-8"
+            text_html = html.decode(charset, errors="replace")
+            meta["title"], text = extract_main_text(text_html)
+            stats = snapshot_store.save(
+                bookmark_id, meta, {"html": html, "text": text.encode("utf-8")}
+            )
+            snapshot_store.maybe_train()
+            return stats
+
+        try:
+            stats = await asyncio.to_thread(process)
+        except (sqlite3.Error, zstandard.ZstdError, OSError) as e:
+            logger.error(f"💥 Could not store snapshot of {url}: {e}")
+            return False
+        logger.info(
+            f"📄 Snapshot of bookmark {bookmark_id}: {stats['raw_bytes']:,} bytes, "
+            f"{stats['new_chunks']}/{stats['chunks']} new chunks, {stats['new_bytes']:,} bytes stored"
+        )
+        return True
+
+    async def _run(self) -> None:
+        with event_bus.subscribe(BOOKMARK_CREATED) as created:
+            while True:
+                event = await created.get()
+                if event.get("closed"):
+                    return
+                task = asyncio.create_task(self.snapshot(event["bookmark_id"], event["url"]))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            # Catch up on snapshots taken before the text index existed
+            task = asyncio.create_task(asyncio.to_thread(snapshot_store.index_missing))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def close(self) -> None:
+        for task in [self._task, *self._pending]:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in [self._task, *self._pending] if t is not None),
+            return_exceptions=True,
+        )
+        self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+snapshot_service = SnapshotService(
+    concurrency=SNAPSHOT_CONCURRENCY,
+    timeout=SNAPSHOT_TIMEOUT,
+    max_bytes=SNAPSHOT_MAX_BYTES,
+)
+
+snapshot_backfill = JobProgress("snapshot-backfill")
+_backfill_task: Optional[asyncio.Task] = None
+
+
+async def run_snapshot_backfill() -> None:
+    """Snapshot every bookmark that doesn't have one yet."""
+    bookmarks: List[Bookmark] = fetch_bookmarks_missing_snapshots()
+    snapshot_backfill.start(len(bookmarks))
+    started = time.perf_counter()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for bookmark in bookmarks:
+        queue.put_nowait(bookmark)
+
+    async def worker() -> None:
+        # Checked before every bookmark, so Stop leaves the rest of the
+        # queue alone instead of letting it drain
+        while not queue.empty() and not snapshot_backfill.stop_requested:
+            bookmark = queue.get_nowait()
+            try:
+                ok = await snapshot_service.snapshot(bookmark["id"], bookmark["url"])
+            except Exception as e:
+                logger.error(f"💥 Snapshot of {bookmark['url']} failed: {e}")
+                ok = False
+            snapshot_backfill.advance(
+                ok, error=None if ok else f"#{bookmark['id']} {bookmark['url']}"
+            )
+
+    try:
+        await asyncio.gather(
+            *(worker() for _ in range(max(1, snapshot_service.concurrency))),
+            return_exceptions=True,
+        )
+    finally:
+        snapshot_backfill.finish()
+    state = snapshot_backfill.snapshot()
+    logger.info(
+        f"📄 Snapshot backfill finished: {state['succeeded']:,} stored, "
+        f"{state['failed']:,} skipped or failed in {time.perf_counter() - started:.0f}s"
+    )
+
+
+def start_snapshot_backfill() -> bool:
+    global _backfill_task
+    if _backfill_task is not None and not _backfill_task.done():
+        return False
+    _backfill_task = asyncio.create_task(run_snapshot_backfill())
+    return True
+
+
+async def stop_snapshot_backfill() -> None:
+    snapshot_backfill.request_stop()
+    if _backfill_task is not None and not _backfill_task.done():
+        _backfill_task.cancel()
+        try:
+            await _backfill_task
+        except asyncio.CancelledError:
+            pass
+
@@ -143,6 +143,14 @@ document.addEventListener('DOMContentLoaded', function() {
 
 
 
+    // Swap in thumbnails as soon as the server says they're ready
+    connectThumbnailEvents();
+    document.body.addEventListener('htmx:afterSwap', connectThumbnailEvents);
+
+    // Follow a running cull as results come in
+    connectCullStream();
+    document.body.addEventListener('htmx:afterSwap', connectCullStream);
+
     // Enhanced keyboard shortcuts system
     let currentBookmarkIndex = -1;
     let bookmarkElements = [];
@@ -436,6 +444,83 @@ document.addEventListener('DOMContentLoaded', function() {
     formatDates();
 });
 
+/* Thumbnail readiness (Server-Sent Events) */
+let thumbnailEvents = null;
+
+function connectThumbnailEvents() {
+    // Only hold a connection open while something on the page is waiting
+    if (thumbnailEvents || !window.EventSource) return;
+    if (!document.querySelector('img[data-placeholder][id^="thumbnail-"]')) return;
+
+    thumbnailEvents = new EventSource('/events/thumbnails');
+    thumbnailEvents.addEventListener('thumbnail', function(event) {
+        const data = JSON.parse(event.data);
+        const element = document.getElementById(`thumbnail-${data.id}`);
+        if (element) {
+            console.log('🖼️ Thumbnail ready for bookmark:', data.id);
+            element.outerHTML = data.html;
+        }
+        if (!document.querySelector('img[data-placeholder][id^="thumbnail-"]')) {
+            thumbnailEvents.close();
+            thumbnailEvents = null;
+        }
+    });
+}
+
+/* Cull progress (Server-Sent Events) */
+let cullStream = null;
+
+function updateCullGroup(group) {
+    const count = group.querySelector('.cull-group-items').children.length;
+    group.querySelector('.cull-group-count').textContent = count;
+    group.hidden = count === 0;
+}
+
+function connectCullStream() {
+    const container = document.querySelector('#cull-results[data-cull-stream]');
+    if (cullStream || !container || !window.EventSource) return;
+
+    cullStream = new EventSource(container.dataset.cullStream);
+    cullStream.addEventListener('results', function(event) {
+        const data = JSON.parse(event.data);
+        const touched = new Set();
+        const take = function(id) {
+            const existing = document.getElementById(`cull-item-${id}`);
+            if (existing) {
+                touched.add(existing.closest('.cull-group'));
+                existing.remove();
+            }
+        };
+        data.resolved.forEach(take);
+        data.items.forEach(function(item) {
+            take(item.id);
+            const group = document.getElementById(`cull-group-${item.group}`);
+            if (!group) return;
+            group.querySelector('.cull-group-items').insertAdjacentHTML('beforeend', item.html);
+            touched.add(group);
+        });
+        touched.forEach(function(group) {
+            if (group) updateCullGroup(group);
+        });
+        htmx.process(container);
+    });
+    cullStream.addEventListener('progress', function(event) {
+        const data = JSON.parse(event.data);
+        const pct = data.total > 0 ? Math.floor(data.checked / data.total * 100) : 0;
+        document.getElementById('cull-progress-fill').style.width = `${pct}%`;
+        document.getElementById('cull-progress-label').textContent =
+            `Checking ${data.checked.toLocaleString()} of ${data.total.toLocaleString()}… ` +
+            `(${Math.round(data.per_minute).toLocaleString()}/min)`;
+        document.getElementById('cull-progress-counts').textContent =
+            `✅ ${data.alive.toLocaleString()} alive  •  ⚠️ ${data.issues.toLocaleString()} need attention`;
+    });
+    cullStream.addEventListener('done', function() {
+        cullStream.close();
+        cullStream = null;
+        htmx.ajax('GET', '/cull/progress', {target: '#cull-results', swap: 'outerHTML'});
+    });
+}
+
 // Theme Management Functions
 function initializeTheme() {
     console.log('🎨 Initializing theme system...');
@@ -552,3 +637,32 @@ function getCurrentTheme() {
     return localStorage.getItem('bookerics-theme') || 
            (window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light');
 }
+
+// Add a suggested tag to the tags input of the form it belongs to
+function addSuggestedTag(button) {
+    const form = button.closest('form');
+    const input = form && form.querySelector('input[name="tags"]');
+    if (!input) return;
+    const tags = input.value.split(/\s+/).filter(Boolean);
+    if (!tags.includes(button.textContent)) {
+        tags.push(button.textContent);
+        input.value = tags.join(' ');
+    }
+    button.remove();
+}
+
+// Tag management: clicking a tag in the cloud adds it to the tags field
+function selectManagedTag(button) {
+    const input = document.getElementById('manage-tags');
+    if (!input) return;
+    const tag = button.dataset.tag;
+    const tags = input.value.split(/\s+/).filter(Boolean);
+    const index = tags.indexOf(tag);
+    if (index === -1) {
+        tags.push(tag);
+    } else {
+        tags.splice(index, 1);
+    }
+    button.classList.toggle('selected', index === -1);
+    input.value = tags.join(' ');
+}
@@ -0,0 +1,221 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import stat
+import tempfile
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import brotli
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, RedirectResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+# Encodings we precompress to, in order of preference when the client accepts both
+PRECOMPRESSED_ENCODINGS: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+HASH_SUFFIX = ".sha256"
+SIDECAR_SUFFIXES = tuple(ext for _, ext in PRECOMPRESSED_ENCODINGS) + (HASH_SUFFIX,)
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    # A unique temp file per call: several to_thread workers may write the
+    # same path at once
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.", delete=False
+    ) as f:
+        f.write(data)
+    try:
+        # NamedTemporaryFile creates 0600; these files are served to everyone
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+
+def read_content_hash(path: str) -> Optional[str]:
+    """Return the hash recorded next to `path`, if it is not older than the file."""
+    hash_path = f"{path}{HASH_SUFFIX}"
+    try:
+        if os.stat(hash_path).st_mtime_ns < os.stat(path).st_mtime_ns:
+            return None
+        with open(hash_path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_precompressed(path: str, data: bytes) -> str:
+    """Write `data` to `path` plus `.gz`, `.br` and `.sha256` siblings.
+
+    Returns the sha256 of the content. If the file on disk already has the
+    same hash nothing is rewritten, so its mtime (and therefore the
+    `Last-Modified` header) only moves when the content really changes.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if os.path.exists(path) and read_content_hash(path) == digest:
+        return digest
+
+    _atomic_write(path, data)
+    # mtime=0 keeps the gzip bytes deterministic for identical input
+    _atomic_write(f"{path}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+    _atomic_write(f"{path}.br", brotli.compress(data, quality=11))
+    _atomic_write(f"{path}{HASH_SUFFIX}", digest.encode())
+    return digest
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+    return accepted
+
+
+def _etag_matches(if_none_match: str, digest: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # Any encoding of the same content counts as the same version
+        if candidate.strip('"').split(".")[0] == digest:
+            return True
+    return False
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves strong ETags, 304s and pre-encoded siblings.
+
+    Used for `/feeds`, whose files are written by `write_precompressed`.
+    Feed readers polling an unchanged feed get a bodyless 304, and changed
+    feeds are sent as the already-compressed `.br`/`.gz` sibling.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._hash_cache: Dict[str, Tuple[int, int, str]] = {}
+
+    def _content_hash(self, full_path: str, stat_result: os.stat_result) -> str:
+        cached = self._hash_cache.get(full_path)
+        if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+        digest = read_content_hash(full_path)
+        if digest is None:
+            with open(full_path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        self._hash_cache[full_path] = (
+            stat_result.st_mtime_ns,
+            stat_result.st_size,
+            digest,
+        )
+        return digest
+
+    def _pick_variant(
+        self, full_path: str, stat_result: os.stat_result, accept_encoding: str
+    ) -> Tuple[Optional[str], str, os.stat_result]:
+        accepted = _parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for encoding, ext in PRECOMPRESSED_ENCODINGS:
+            if accepted.get(encoding, wildcard) <= 0:
+                continue
+            try:
+                variant_stat = os.stat(f"{full_path}{ext}")
+            except OSError:
+                continue
+            # Ignore stale siblings left behind by an interrupted write
+            if variant_stat.st_mtime_ns >= stat_result.st_mtime_ns:
+                return encoding, f"{full_path}{ext}", variant_stat
+        return None, full_path, stat_result
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        full_path, stat_result = await run_in_threadpool(self.lookup_path, path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return await super().get_response(path, scope)
+        if full_path.endswith(SIDECAR_SUFFIXES):
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        digest = await run_in_threadpool(self._content_hash, full_path, stat_result)
+        last_modified = datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc)
+        encoding, variant_path, variant_stat = self._pick_variant(
+            full_path, stat_result, request_headers.get("accept-encoding", "")
+        )
+
+        headers = {
+            "etag": f'"{digest}.{encoding}"' if encoding else f'"{digest}"',
+            "last-modified": format_datetime(last_modified, usegmt=True),
+            "cache-control": "no-cache",
+            "vary": "Accept-Encoding",
+        }
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            if _etag_matches(if_none_match, digest):
+                return Response(status_code=304, headers=headers)
+        elif if_modified_since := request_headers.get("if-modified-since"):
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+                if last_modified.replace(microsecond=0) <= since:
+                    return Response(status_code=304, headers=headers)
+            except (TypeError, ValueError):
+                pass
+
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        if encoding:
+            headers["content-encoding"] = encoding
+        return FileResponse(
+            variant_path,
+            stat_result=variant_stat,
+            media_type=media_type,
+            headers=headers,
+        )
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed files, which never change once written.
+
+    Used for `/thumbs`, served from the local thumbnail store: a file's name
+    is its hash, so browsers may cache it forever. Files missing locally
+    (say, a restored database on a fresh machine) redirect to the published
+    copy under `fallback_url` when one is given.
+    """
+
+    cache_control = "public, max-age=31536000, immutable"
+
+    def __init__(self, *args, fallback_url: Optional[str] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.fallback_url = fallback_url.rstrip("/") if fallback_url else None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        try:
+            response = await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404 or not self.fallback_url:
+                raise
+            response = Response(status_code=404)
+        if response.status_code == 404 and self.fallback_url:
+            return RedirectResponse(
+                f"{self.fallback_url}/{path.replace(os.sep, '/')}", status_code=302
+            )
+        if response.status_code in (200, 304):
+            response.headers["cache-control"] = self.cache_control
+        return response
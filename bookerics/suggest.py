@@ -0,0 +1,220 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from .utils import logger
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be but by for from has have how i in into is it its of on or
+    our that the this to was we what when where which who why will with you your
+    com org net www http https html htm php index page home
+    """.split()
+)
+
+# Title words say more about a page than its description does
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+URL_WEIGHT = 1.0
+HOST_WEIGHT = 1.5
+
+
+def _words(text: str) -> List[str]:
+    return [
+        w
+        for w in _WORD_RE.findall((text or "").lower())
+        if len(w) > 2 and w not in STOPWORDS and not w.isdigit()
+    ]
+
+
+def extract_features(title: str, url: str, description: str) -> Dict[str, float]:
+    """Weighted term counts for a bookmark: title, description, URL path and host."""
+    features: Dict[str, float] = defaultdict(float)
+    for w in _words(title):
+        features[w] += TITLE_WEIGHT
+    for w in _words(description):
+        features[w] += DESCRIPTION_WEIGHT
+    parsed = urlparse(url or "")
+    host = (parsed.hostname or "").removeprefix("www.")
+    if host:
+        # The whole host is a strong signal on its own (github.com → code, ...)
+        features[f"host:{host}"] += HOST_WEIGHT
+    for w in _words(parsed.path):
+        features[w] += URL_WEIGHT
+    return dict(features)
+
+
+def _add(counter: Counter, key: str, delta: int) -> None:
+    """Add `delta` to a count, dropping it once it reaches zero."""
+    count = counter[key] + delta
+    if count > 0:
+        counter[key] = count
+    else:
+        counter.pop(key, None)
+
+
+class TagSuggester:
+    """Suggests tags for a bookmark from how existing bookmarks are tagged.
+
+    Each term (title, description and URL words, plus the host) votes for
+    the tags it has appeared with, weighted by its TF-IDF in the new
+    bookmark. Tags that usually appear together with the top candidates
+    then get a share of their score (co-occurrence smoothing), so "python"
+    pulls in "programming" even when no word pointed at it directly.
+
+    The model is a handful of counters, updated in place as bookmarks are
+    saved, edited or deleted. A suggestion only reads the `top_tags` most
+    frequent tags of each of the bookmark's own terms; those short lists
+    are cached and dropped whenever the term's counts change.
+    """
+
+    def __init__(
+        self,
+        smoothing: float = 1.0,
+        cooccurrence_weight: float = 0.3,
+        max_df: float = 0.5,
+        min_docs: int = 25,
+        top_tags: int = 20,
+    ):
+        self.smoothing = smoothing
+        self.cooccurrence_weight = cooccurrence_weight
+        self.max_df = max_df
+        self.min_docs = min_docs
+        self.top_tags = top_tags
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._docs: Dict[int, Tuple[Set[str], Set[str]]] = {}
+        self._df: Counter = Counter()
+        self._term_tags: Dict[str, Counter] = defaultdict(Counter)
+        self._tag_counts: Counter = Counter()
+        self._cooccurrence: Dict[str, Counter] = defaultdict(Counter)
+        # Cached most_common(top_tags) of _term_tags and _cooccurrence
+        self._top_term_tags: Dict[str, List[Tuple[str, int]]] = {}
+        self._top_cooccurrence: Dict[str, List[Tuple[str, int]]] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self._docs)
+
+    def _apply(self, terms: Set[str], tags: Set[str], sign: int) -> None:
+        for term in terms:
+            _add(self._df, term, sign)
+            counts = self._term_tags[term]
+            for tag in tags:
+                _add(counts, tag, sign)
+            if not counts:
+                del self._term_tags[term]
+            self._top_term_tags.pop(term, None)
+        for tag in tags:
+            _add(self._tag_counts, tag, sign)
+            co = self._cooccurrence[tag]
+            for other in tags:
+                if other != tag:
+                    _add(co, other, sign)
+            if not co:
+                del self._cooccurrence[tag]
+            self._top_cooccurrence.pop(tag, None)
+
+    def _top(
+        self, counters: Dict[str, Counter], cache: Dict[str, List[Tuple[str, int]]], key: str
+    ) -> List[Tuple[str, int]]:
+        top = cache.get(key)
+        if top is None:
+            counts = counters.get(key)
+            top = cache[key] = counts.most_common(self.top_tags) if counts else []
+        return top
+
+    def _forget(self, bookmark_id: int) -> None:
+        previous = self._docs.pop(bookmark_id, None)
+        if previous is not None:
+            self._apply(*previous, sign=-1)
+
+    def learn(self, bookmark: Dict[str, Any]) -> None:
+        """Add a bookmark, replacing what was learned from it before."""
+        tags = {t for t in bookmark.get("tags") or [] if t and t.strip()}
+        terms = set(
+            extract_features(
+                bookmark.get("title") or "",
+                bookmark.get("url") or "",
+                bookmark.get("description") or "",
+            )
+        )
+        with self._lock:
+            self._forget(bookmark["id"])
+            # Untagged bookmarks teach nothing about tags
+            if tags:
+                self._docs[bookmark["id"]] = (terms, tags)
+                self._apply(terms, tags, sign=1)
+
+    def forget(self, bookmark_id: int) -> None:
+        with self._lock:
+            self._forget(bookmark_id)
+
+    def rebuild(self, bookmarks: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._reset()
+        for bookmark in bookmarks:
+            self.learn(bookmark)
+        logger.info(
+            f"🏷️ Tag suggester trained on {self.size:,} tagged bookmarks, "
+            f"{len(self._tag_counts):,} tags"
+        )
+
+    def suggest(
+        self,
+        title: str,
+        url: str,
+        description: str,
+        limit: int = 4,
+        exclude: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Up to `limit` (tag, confidence) pairs, best first.
+
+        Confidence is the weighted share of the bookmark's terms that agree
+        on the tag, between 0 and 1. Returns nothing until at least
+        `min_docs` tagged bookmarks have been learned.
+        """
+        features = extract_features(title, url, description)
+        excluded = set(exclude or ())
+        with self._lock:
+            n_docs = len(self._docs)
+            if n_docs < self.min_docs or not features:
+                return []
+            scores: Dict[str, float] = defaultdict(float)
+            total_weight = 0.0
+            for term, tf in features.items():
+                df = self._df.get(term, 0)
+                if df == 0 or df > self.max_df * n_docs:
+                    continue
+                weight = tf * (math.log((n_docs + 1) / (df + 1)) + 1)
+                total_weight += weight
+                for tag, count in self._top(self._term_tags, self._top_term_tags, term):
+                    scores[tag] += weight * count / (df + self.smoothing)
+            if not scores:
+                return []
+
+            top = heapq.nlargest(limit * 2, scores.items(), key=lambda kv: kv[1])
+            for tag, score in top:
+                tag_count = self._tag_counts.get(tag, 0)
+                if tag_count <= 0:
+                    continue
+                for other, together in self._top(self._cooccurrence, self._top_cooccurrence, tag):
+                    scores[other] += self.cooccurrence_weight * score * together / tag_count
+
+        ranked = heapq.nlargest(
+            limit,
+            ((tag, score / total_weight) for tag, score in scores.items() if tag not in excluded),
+            key=lambda kv: kv[1],
+        )
+        return [(tag, round(min(score, 1.0), 3)) for tag, score in ranked]
+
+
+tag_suggester = TagSuggester()
@@ -0,0 +1,146 @@
+import base64
+import hashlib
+import os
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image, features
+
+# Card images render at most ~720px wide (see .container / .image-placeholder),
+# so these cover 1x phones through 1.5x desktop without shipping the full capture
+THUMBNAIL_WIDTHS: Tuple[int, ...] = (360, 720, 1080)
+
+# (format, quality) in order of preference; AVIF only if this Pillow build has it
+THUMBNAIL_FORMATS: Tuple[Tuple[str, int], ...] = (("avif", 50), ("webp", 72))
+
+THUMBNAIL_MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpg": "image/jpeg",
+}
+
+# Rendered width of a card image, for the <img sizes> attribute
+THUMBNAIL_SIZES = "(max-width: 800px) calc(100vw - 5rem), 720px"
+
+# Width of the inline blurred preview; at this size it is a few hundred bytes
+PLACEHOLDER_WIDTH = 16
+
+# Grayscale histogram entropy (bits, 0-8) below which a capture is blank
+# (a white page, a spinner); those are retried instead of stored. The
+# white background dominates the histogram: a plain text article measures
+# around 1-3, a one-line error page about 0.1, an empty page 0.
+BLANK_ENTROPY_THRESHOLD = 0.05
+# Below this a capture is kept but listed as suspect (a one-line error
+# page, a cookie wall over an empty page)
+LOW_ENTROPY_THRESHOLD = 0.5
+
+
+def available_formats() -> List[Tuple[str, int]]:
+    return [
+        (fmt, quality)
+        for fmt, quality in THUMBNAIL_FORMATS
+        if fmt != "avif" or features.check("avif")
+    ]
+
+
+def _save(image: Image.Image, path: str, fmt: str, quality: int) -> int:
+    if fmt == "webp":
+        image.save(path, "WEBP", quality=quality, method=6)
+    elif fmt == "avif":
+        image.save(path, "AVIF", quality=quality, speed=6)
+    else:
+        image.save(path, "JPEG", quality=quality, optimize=True, progressive=True)
+    return os.path.getsize(path)
+
+
+def perceptual_hash(image: Image.Image) -> str:
+    """64-bit difference hash (dHash) as 16 hex digits.
+
+    Captures that look the same (the same "site unavailable" screen, say)
+    hash the same even when their bytes differ. At 9x8 pixels different
+    pages with one layout can collide too, so a match only marks a
+    possible duplicate; `pixel_hash` decides whether files are shared.
+    """
+    gray = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = gray.tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | int(left > right)
+    return f"{bits:016x}"
+
+
+def analyze_screenshot(image_bytes: bytes) -> Dict[str, Any]:
+    """Fingerprint a raw capture before any work is spent encoding it.
+
+    Returns `phash`, `pixel_hash` (sha256 of the decoded pixels, equal
+    only for pixel-identical captures), `entropy` and `blank`. Cheap
+    enough to run on every capture; call it from a worker thread.
+    """
+    with Image.open(BytesIO(image_bytes)) as source:
+        image = source.convert("RGB")
+    entropy = image.convert("L").entropy()
+    pixels = hashlib.sha256(f"{image.width}x{image.height}:".encode())
+    pixels.update(image.tobytes())
+    return {
+        "phash": perceptual_hash(image),
+        "pixel_hash": pixels.hexdigest(),
+        "entropy": round(entropy, 3),
+        "blank": entropy < BLANK_ENTROPY_THRESHOLD,
+    }
+
+
+def blur_placeholder(image: Image.Image) -> str:
+    """Return a tiny data: URI of `image`, shown blurred while the real one loads."""
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = image.resize((PLACEHOLDER_WIDTH, height), Image.Resampling.BILINEAR)
+    buffer = BytesIO()
+    if features.check("webp"):
+        tiny.save(buffer, "WEBP", quality=40)
+        mime = "image/webp"
+    else:
+        tiny.save(buffer, "JPEG", quality=40)
+        mime = "image/jpeg"
+    return f"data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+
+
+def process_screenshot(
+    image_bytes: bytes, out_dir: str, stem: str
+) -> Tuple[str, List[Dict[str, Any]], str]:
+    """Turn a raw capture into a JPEG fallback plus resized AVIF/WebP variants.
+
+    Returns the fallback path, a list of variant dicts
+    (`path`, `width`, `height`, `format`, `bytes`), smallest first, and an
+    inline blur placeholder (see `blur_placeholder`).
+    Runs synchronously; call it from a worker thread.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with Image.open(BytesIO(image_bytes)) as source:
+        image = source.convert("RGB")
+
+    fallback_path = os.path.join(out_dir, f"{stem}.jpg")
+    _save(image, fallback_path, "jpg", 80)
+
+    variants: List[Dict[str, Any]] = []
+    # Never upscale; a capture narrower than every preset gets one variant
+    widths = [w for w in THUMBNAIL_WIDTHS if w <= image.width] or [image.width]
+    for width in widths:
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize(
+            (width, height), Image.Resampling.LANCZOS
+        )
+        for fmt, quality in available_formats():
+            path = os.path.join(out_dir, f"{stem}-{width}.{fmt}")
+            size = _save(resized, path, fmt, quality)
+            variants.append(
+                {
+                    "path": path,
+                    "width": width,
+                    "height": height,
+                    "format": fmt,
+                    "bytes": size,
+                }
+            )
+    return fallback_path, variants, blur_placeholder(image)
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Iterator, Set, Tuple
+
+from .constants import (
+    BOOKERICS_BASE_URL,
+    PUBLISH_THUMBNAILS_DIR,
+    THUMBNAIL_STORE_DIR,
+    THUMBS_MOUNT,
+)
+from .utils import logger
+
+# "ab/cd/abcd…ef.webp": two levels of shards keep directories small
+_KEY_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$")
+
+
+def is_content_key(key: str) -> bool:
+    return bool(_KEY_RE.match(key))
+
+
+class ThumbnailStore:
+    """Content-addressed thumbnail files on local disk.
+
+    Every image is stored once under its sha256 (`ab/cd/<sha256>.<ext>`),
+    so a re-capture gets a new name instead of overwriting one that
+    browsers and the publish manifest have already seen. Nothing is ever
+    modified in place; `gc` removes files no bookmark refers to anymore.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, src_path: str) -> str:
+        """Copy `src_path` into the store and return its key."""
+        h = hashlib.sha256()
+        with open(src_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        ext = os.path.splitext(src_path)[1].lstrip(".").lower() or "bin"
+        key = f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+        dest = self.path_for(key)
+        if not os.path.exists(dest):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with open(src_path, "rb") as src, tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(dest), prefix=".", delete=False
+            ) as tmp:
+                shutil.copyfileobj(src, tmp)
+            os.chmod(tmp.name, 0o644)
+            os.replace(tmp.name, dest)
+        return key
+
+    def keys(self) -> Iterator[Tuple[str, os.stat_result]]:
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                full_path = os.path.join(dirpath, name)
+                key = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                if is_content_key(key):
+                    yield key, os.stat(full_path)
+
+    def gc(
+        self, referenced: Set[str], min_age: float = 3600, dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """Delete stored files whose key isn't in `referenced`.
+
+        Files younger than `min_age` seconds are kept, so a capture that is
+        stored but not yet written to the database is never collected.
+        """
+        report: Dict[str, Any] = {"dry_run": dry_run, "kept": 0, "removed": [], "bytes_freed": 0}
+        cutoff = time.time() - min_age
+        for key, st in self.keys():
+            if key in referenced or st.st_mtime > cutoff:
+                report["kept"] += 1
+                continue
+            if not dry_run:
+                try:
+                    os.unlink(self.path_for(key))
+                except OSError as e:
+                    logger.warning(f"🧹 Could not remove thumbnail {key}: {e}")
+                    continue
+            report["removed"].append(key)
+            report["bytes_freed"] += st.st_size
+        verb = "Would remove" if dry_run else "Removed"
+        logger.info(
+            f"🧹 {verb} {len(report['removed'])} unreferenced thumbnail(s) "
+            f"({report['bytes_freed']:,} bytes), kept {report['kept']}"
+        )
+        return report
+
+
+thumbnail_store = ThumbnailStore(THUMBNAIL_STORE_DIR)
+
+
+def public_url(key: str) -> str:
+    """Where a stored thumbnail lives once published."""
+    return f"{BOOKERICS_BASE_URL}/{PUBLISH_THUMBNAILS_DIR}/{key}"
+
+
+def key_from_url(url: str) -> str:
+    """The store key of a published thumbnail URL, or "" for legacy URLs."""
+    prefix = f"{BOOKERICS_BASE_URL}/{PUBLISH_THUMBNAILS_DIR}/"
+    if url and url.startswith(prefix) and is_content_key(url[len(prefix) :]):
+        return url[len(prefix) :]
+    return ""
+
+
+def local_url(url: str) -> str:
+    """Serve a published thumbnail from the app's immutable `/thumbs` mount.
+
+    Legacy `<id>.jpg` URLs aren't content-addressed and are left alone.
+    """
+    key = key_from_url(url)
+    return f"{THUMBS_MOUNT}/{key}" if key else url
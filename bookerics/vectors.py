@@ -0,0 +1,323 @@
+import hashlib
+import math
+import os
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .constants import (
+    VECTOR_DIM,
+    VECTOR_INDEX_PATH,
+    VECTOR_IVF_NPROBE,
+    VECTOR_IVF_THRESHOLD,
+)
+from .suggest import _words
+from .utils import logger
+
+# Feature weights: tags describe a bookmark best, then its title
+TAG_WEIGHT = 3.0
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+# Character trigrams let "database" and "databases" land near each other
+TRIGRAM_WEIGHT = 0.3
+# Bump when embed() changes so stored vectors are recomputed at startup
+EMBED_VERSION = 2
+
+
+def _features(title: str, description: str, tags: Iterable[str]) -> Dict[str, float]:
+    counts: Dict[str, float] = {}
+
+    def add(feature: str, weight: float) -> None:
+        counts[feature] = counts.get(feature, 0.0) + weight
+
+    for weight, words in (
+        (TITLE_WEIGHT, _words(title)),
+        (DESCRIPTION_WEIGHT, _words(description)),
+        (TAG_WEIGHT, [w for tag in tags for w in _words(tag.replace("-", " "))]),
+    ):
+        for word in words:
+            add(word, weight)
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                add(f"#{padded[i : i + 3]}", weight * TRIGRAM_WEIGHT)
+    return counts
+
+
+def embed(
+    title: str, description: str = "", tags: Iterable[str] = (), dim: int = VECTOR_DIM
+) -> np.ndarray:
+    """A unit-length float32 vector for some text, computed locally.
+
+    Features are hashed into `dim` buckets with a random sign (the
+    "hashing trick"), with sublinear term weights (log1p, which stays
+    positive for the small trigram weights). crc32 is stable across
+    processes, so stored vectors stay comparable after a restart.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    for feature, weight in _features(title, description, tags).items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % dim] += math.log1p(weight) * (1.0 if h & 0x80000000 else -1.0)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+def content_digest(bookmark: Dict[str, Any]) -> int:
+    """Changes whenever anything that goes into a bookmark's vector changes."""
+    text = "\x1f".join(
+        [
+            str(EMBED_VERSION),
+            bookmark.get("title") or "",
+            bookmark.get("description") or "",
+            *(bookmark.get("tags") or []),
+        ]
+    )
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class VectorIndex:
+    """Bookmark vectors in a memory-mapped float32 matrix on disk.
+
+    `<path>.f32` holds one row per bookmark; `<path>.rows.npz` records
+    which bookmark each row belongs to and a digest of the text it was
+    computed from, so a restart only re-embeds bookmarks that changed.
+    Deleted bookmarks leave a free row that the next insert reuses.
+
+    Search is a single matrix-vector product over all rows. Above
+    `ivf_threshold` rows the index also clusters the vectors (spherical
+    k-means, about sqrt(n) clusters) and a query only scores the rows in
+    its `nprobe` nearest clusters.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dim: int = 256,
+        ivf_threshold: int = 20000,
+        nprobe: int = 32,
+    ):
+        self.path = path
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.memmap] = None
+        self._ids = np.full(0, -1, dtype=np.int64)
+        self._digests = np.zeros(0, dtype=np.uint64)
+        self._rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._used = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._clusters: Optional[np.ndarray] = None
+
+    @property
+    def _matrix_path(self) -> str:
+        return f"{self.path}.f32"
+
+    @property
+    def _rows_path(self) -> str:
+        return f"{self.path}.rows.npz"
+
+    @property
+    def size(self) -> int:
+        return len(self._rows)
+
+    def _map(self, capacity: int) -> None:
+        mode = "r+" if os.path.exists(self._matrix_path) else "w+"
+        if mode == "r+" and os.path.getsize(self._matrix_path) != capacity * self.dim * 4:
+            if self._matrix is not None:
+                self._matrix.flush()
+                del self._matrix
+            with open(self._matrix_path, "r+b") as f:
+                f.truncate(capacity * self.dim * 4)
+        self._matrix = np.memmap(
+            self._matrix_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim)
+        )
+
+    def open(self) -> None:
+        """Load the index from disk, or start an empty one."""
+        with self._lock:
+            if os.path.exists(self._rows_path) and os.path.exists(self._matrix_path):
+                rows = np.load(self._rows_path)
+                if int(rows["dim"]) == self.dim:
+                    self._ids = rows["ids"].astype(np.int64)
+                    self._digests = rows["digests"].astype(np.uint64)
+                    self._used = int(rows["used"])
+                    self._map(len(self._ids))
+                    self._rows = {
+                        int(bid): row
+                        for row, bid in enumerate(self._ids[: self._used])
+                        if bid >= 0
+                    }
+                    self._free = [row for row in range(self._used) if self._ids[row] < 0]
+                    return
+                logger.info(f"🧭 Vector size changed to {self.dim}; rebuilding the index")
+                os.unlink(self._matrix_path)
+            self._ids = np.full(1024, -1, dtype=np.int64)
+            self._digests = np.zeros(1024, dtype=np.uint64)
+            self._map(1024)
+
+    def save(self) -> None:
+        with self._lock:
+            if self._matrix is None:
+                return
+            self._matrix.flush()
+            tmp_path = f"{self.path}.rows.tmp.npz"
+            np.savez(
+                tmp_path, ids=self._ids, digests=self._digests, used=self._used, dim=self.dim
+            )
+            os.replace(tmp_path, self._rows_path)
+
+    def _grow(self) -> None:
+        capacity = len(self._ids) * 2
+        self._ids = np.concatenate(
+            [self._ids, np.full(capacity - len(self._ids), -1, dtype=np.int64)]
+        )
+        self._digests = np.concatenate(
+            [self._digests, np.zeros(capacity - len(self._digests), dtype=np.uint64)]
+        )
+        self._map(capacity)
+
+    def upsert(self, bookmark: Dict[str, Any]) -> None:
+        """(Re)compute a bookmark's vector if its text changed."""
+        digest = content_digest(bookmark)
+        bookmark_id = int(bookmark["id"])
+        with self._lock:
+            if self._matrix is None:
+                self.open()
+            row = self._rows.get(bookmark_id)
+            if row is not None and int(self._digests[row]) == digest:
+                return
+            if row is None:
+                if self._free:
+                    row = self._free.pop()
+                else:
+                    if self._used == len(self._ids):
+                        self._grow()
+                    row = self._used
+                    self._used += 1
+                self._rows[bookmark_id] = row
+            vec = embed(
+                bookmark.get("title") or "",
+                bookmark.get("description") or "",
+                bookmark.get("tags") or [],
+                self.dim,
+            )
+            assert self._matrix is not None
+            self._matrix[row] = vec
+            self._ids[row] = bookmark_id
+            self._digests[row] = digest
+            if self._clusters is not None and self._centroids is not None:
+                if row >= len(self._clusters):
+                    missing = len(self._ids) - len(self._clusters)
+                    self._clusters = np.concatenate(
+                        [self._clusters, np.full(missing, -1, dtype=np.int32)]
+                    )
+                self._clusters[row] = int(np.argmax(self._centroids @ vec))
+
+    def remove(self, bookmark_id: int) -> None:
+        with self._lock:
+            row = self._rows.pop(int(bookmark_id), None)
+            if row is None or self._matrix is None:
+                return
+            self._matrix[row] = 0.0
+            self._ids[row] = -1
+            self._digests[row] = 0
+            if self._clusters is not None and row < len(self._clusters):
+                self._clusters[row] = -1
+            self._free.append(row)
+
+    def vector(self, bookmark_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(int(bookmark_id))
+            if row is None or self._matrix is None:
+                return None
+            return np.array(self._matrix[row])
+
+    def sync(self, bookmarks: List[Dict[str, Any]]) -> None:
+        """Bring the index in line with the database after startup."""
+        with self._lock:
+            if self._matrix is None:
+                self.open()
+            before = {bid: int(self._digests[row]) for bid, row in self._rows.items()}
+            present: Set[int] = set()
+            for bookmark in bookmarks:
+                present.add(int(bookmark["id"]))
+                self.upsert(bookmark)
+            for bookmark_id in list(self._rows):
+                if bookmark_id not in present:
+                    self.remove(bookmark_id)
+            changed = sum(
+                1 for bid, row in self._rows.items() if before.get(bid) != int(self._digests[row])
+            )
+            self.save()
+            self.build_ivf()
+        logger.info(
+            f"🧭 Vector index ready: {self.size:,} bookmarks, {changed:,} (re)embedded"
+            + (f", {len(self._centroids)} IVF clusters" if self._centroids is not None else "")
+        )
+
+    def build_ivf(self, iterations: int = 8) -> None:
+        """Cluster the vectors for IVF search, or drop the clusters if small."""
+        with self._lock:
+            if self._matrix is None or self.size < self.ivf_threshold:
+                self._centroids = None
+                self._clusters = None
+                return
+            live = np.array(sorted(self._rows.values()))
+            data = np.asarray(self._matrix[live])
+            nlist = max(2, int(math.sqrt(len(live))))
+            rng = np.random.default_rng(0)
+            centroids = data[rng.choice(len(live), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(data @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = data[assignment == c]
+                    if len(members):
+                        mean = members.sum(axis=0)
+                        norm = np.linalg.norm(mean)
+                        if norm > 0:
+                            centroids[c] = mean / norm
+            clusters = np.full(len(self._ids), -1, dtype=np.int32)
+            clusters[live] = np.argmax(data @ centroids.T, axis=1)
+            self._centroids = centroids.astype(np.float32)
+            self._clusters = clusters
+
+    def search(
+        self, query: np.ndarray, k: int = 10, exclude: Iterable[int] = ()
+    ) -> List[Tuple[int, float]]:
+        """The `k` most similar bookmarks as (bookmark id, cosine similarity)."""
+        excluded = {int(i) for i in exclude}
+        with self._lock:
+            if self._matrix is None or not self._rows:
+                return []
+            if self._centroids is not None and self._clusters is not None:
+                probe = np.argsort(-(self._centroids @ query))[: self.nprobe]
+                rows = np.nonzero(np.isin(self._clusters[: self._used], probe))[0]
+            else:
+                rows = np.arange(self._used)
+            if not len(rows):
+                return []
+            scores = np.asarray(self._matrix[rows]) @ query
+            ids = self._ids[rows]
+        scores[ids < 0] = -np.inf
+        for bookmark_id in excluded:
+            scores[ids == bookmark_id] = -np.inf
+        top = min(k, len(scores))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        return [
+            (int(ids[i]), float(scores[i]))
+            for i in best
+            if np.isfinite(scores[i]) and scores[i] > 0
+        ]
+
+
+vector_index = VectorIndex(
+    VECTOR_INDEX_PATH,
+    dim=VECTOR_DIM,
+    ivf_threshold=VECTOR_IVF_THRESHOLD,
+    nprobe=VECTOR_IVF_NPROBE,
+)